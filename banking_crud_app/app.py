@@ -10,13 +10,20 @@ from resources.accountsResource import (
     DeleteAccountResource,
     DepositMoneyResource,
     WithdrawMoneyResource,
+    BatchTransactionsResource,
     TransactionHistoryResource,
     AccountStatementJsonResource,
     AccountStatementPdfResource,
     MonthlyInterestResource,
+    BatchInterestResource,
     CloseAccountResource,
-    BlockAccountResource
+    BlockAccountResource,
+    init_db
 )
+from resources.healthResource import HealthResource
+from resources.jobsResource import JobResource
+from resources.activityResource import AccountEventsResource
+from util.requestMetrics import init_metrics
 
 # ============================================
 # Configuration (Defined here, not from common.py)
@@ -33,6 +40,7 @@ app = application
 app.config['PROPAGATE_EXCEPTIONS'] = True
 CORS(app)
 api = Api(app, prefix=PREFIX, catch_all_404s=True)
+init_metrics(app) # GET /metrics (Prometheus text format)
 
 
 # ============================================
@@ -72,18 +80,26 @@ api.add_resource(DeleteAccountResource, '/accounts/<int:id>') # DELETE /accounts
 # Transaction Endpoints
 api.add_resource(DepositMoneyResource, '/accounts/deposit') # POST /accounts/deposit
 api.add_resource(WithdrawMoneyResource, '/accounts/withdraw') # POST /accounts/withdraw
-api.add_resource(TransactionHistoryResource, '/accounts/transactions/<int:id>/') # GET /accounts/<id>/transactions
+api.add_resource(BatchTransactionsResource, '/accounts/transactions/batch') # POST /accounts/transactions/batch
+api.add_resource(TransactionHistoryResource, '/accounts/transactions/<int:id>/', '/accounts/<int:id>/transactions') # GET /accounts/<id>/transactions
 api.add_resource(AccountStatementJsonResource, '/accounts/statement/<int:id>') # GET /accounts/<id>/transactions
-api.add_resource(AccountStatementPdfResource, '/accounts/statement/pdf/<int:id>') # GET /accounts/<id>/transactions
+api.add_resource(AccountStatementPdfResource, '/accounts/statement/pdf/<int:id>') # GET (sync) / POST ?async=1 (job)
 api.add_resource(MonthlyInterestResource, '/accounts/interest/<int:id>')
+api.add_resource(BatchInterestResource, '/accounts/interest/batch') # GET/POST /accounts/interest/batch
 api.add_resource(BlockAccountResource, '/accounts/block/<int:id>')
 api.add_resource(CloseAccountResource, '/accounts/close/<int:id>')
 
+# Operations Endpoints
+api.add_resource(HealthResource, '/health') # GET /health
+api.add_resource(JobResource, '/jobs/<string:job_id>') # GET /jobs/<job_id>
+api.add_resource(AccountEventsResource, '/accounts/<int:id>/events') # GET (Server-Sent Events)
+
 
 
 
 
 
 if __name__ == '__main__':
+    init_db()
     print(f"Starting Flask Banking API at http://{DOMAIN}:{PORT}{PREFIX}")
     app.run(debug=True, host=DOMAIN, port=PORT)
\ No newline at end of file
@@ -0,0 +1,317 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, UTC
+
+import numpy as np
+
+# ============================================
+# Latency Benchmarks (per-endpoint scenarios)
+# ============================================
+# Usage:
+#   python benchmark.py                                  # all scenarios against mongomock
+#   python benchmark.py --backend mongod --concurrency 8 --workers 4
+#   python benchmark.py --save-baseline                  # store the numbers as the baseline
+#   python benchmark.py --compare                        # fail if p95/throughput regressed vs the baseline
+#
+# Each worker is a separate process with its own Flask test client per thread, so the
+# numbers measure accountsResource.py and the database driver, not an HTTP server.
+
+BASELINE_FILE = os.environ.get(
+    "BENCHMARK_BASELINE_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+)
+BENCHMARK_ACCOUNT_PREFIX = "bench-"
+
+
+def _account_payload(run_id, label):
+    return {'name': f"{BENCHMARK_ACCOUNT_PREFIX}{run_id}-{label}", 'balance': 1_000_000.00, 'no_of_months': 12}
+
+
+# Scenario functions take (client, account_id, run_id, i) and return the response
+def scenario_create(client, account_id, run_id, i):
+    return client.post('/accounts', json=_account_payload(run_id, f"create-{i}"))
+
+
+def scenario_deposit(client, account_id, run_id, i):
+    return client.post('/accounts/deposit', json={'id': account_id, 'amount': 1.00})
+
+
+def scenario_withdraw(client, account_id, run_id, i):
+    return client.post('/accounts/withdraw', json={'id': account_id, 'amount': 1.00})
+
+
+def scenario_history(client, account_id, run_id, i):
+    return client.get(f'/accounts/{account_id}/transactions?limit=50')
+
+
+def scenario_statement_json(client, account_id, run_id, i):
+    return client.get(f'/accounts/statement/{account_id}')
+
+
+def scenario_statement_pdf(client, account_id, run_id, i):
+    return client.get(f'/accounts/statement/pdf/{account_id}')
+
+
+def scenario_interest(client, account_id, run_id, i):
+    return client.get(f'/accounts/interest/{account_id}')
+
+
+def scenario_interest_batch(client, account_id, run_id, i):
+    return client.get('/accounts/interest/batch')
+
+
+# name -> (function, share of --requests it runs; heavy scenarios run fewer iterations)
+SCENARIOS = {
+    "create": (scenario_create, 1.0),
+    "deposit": (scenario_deposit, 1.0),
+    "withdraw": (scenario_withdraw, 1.0),
+    "history": (scenario_history, 1.0),
+    "statement_json": (scenario_statement_json, 0.2),
+    "statement_pdf": (scenario_statement_pdf, 0.1),
+    "interest": (scenario_interest, 1.0),
+    "interest_batch": (scenario_interest_batch, 0.05),
+}
+
+
+def _configure_backend(backend):
+    """Points pymongo at the requested backend before the app (and its MongoClient) is imported."""
+    if backend == "mongomock":
+        try:
+            import mongomock
+        except ImportError:
+            raise SystemExit("The mongomock backend needs the mongomock package (pip install mongomock)")
+        import pymongo
+        pymongo.MongoClient = mongomock.MongoClient
+        # mongomock has no per-collection storage engine options
+        os.environ.setdefault("ARCHIVE_COMPRESSOR", "")
+    # The statement jobs pool is not exercised; keep it from spawning render processes
+    os.environ.setdefault("JOB_WORKER_MODE", "thread")
+
+
+def _create_fixtures(client, run_id, worker, threads, history_size):
+    """One funded account per thread, each with `history_size` transactions to read back."""
+    account_ids = []
+    for thread in range(threads):
+        response = client.post('/accounts', json=_account_payload(run_id, f"w{worker}-t{thread}"))
+        account_id = response.get_json()['id']
+        items = [{'id': account_id, 'type': 'Deposit', 'amount': 1.00} for _ in range(history_size)]
+        if items:
+            client.post('/accounts/transactions/batch', json={'transactions': items})
+        account_ids.append(account_id)
+    return account_ids
+
+
+def _run_scenario(app, function, account_ids, run_id, iterations):
+    """Runs `iterations` calls split over one thread (and test client) per fixture account."""
+    threads = len(account_ids)
+    latencies = [[] for _ in range(threads)]
+    errors = [0] * threads
+    response_bytes = [0] * threads
+
+    def run(thread):
+        client = app.test_client()
+        for i in range(thread, iterations, threads):
+            started = time.perf_counter()
+            response = function(client, account_ids[thread], run_id, i)
+            body = response.get_data()
+            latencies[thread].append(time.perf_counter() - started)
+            response_bytes[thread] += len(body)
+            if response.status_code >= 400:
+                errors[thread] += 1
+
+    workers = [threading.Thread(target=run, args=(thread,)) for thread in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "latencies": [value for thread_latencies in latencies for value in thread_latencies],
+        "errors": sum(errors),
+        "response_bytes": sum(response_bytes),
+        "elapsed": elapsed
+    }
+
+
+def _cleanup(run_id):
+    from resources.accountsResource import get_mongo_db, account_cache
+    db = get_mongo_db()
+    ids = [a["id"] for a in db.accounts.find({"name": {"$regex": f"^{BENCHMARK_ACCOUNT_PREFIX}{run_id}-"}}, {"_id": 0, "id": 1})]
+    db.transactions.delete_many({"account_id": {"$in": ids}})
+    db.balance_snapshots.delete_many({"account_id": {"$in": ids}})
+    db.accounts.delete_many({"id": {"$in": ids}})
+    account_cache.invalidate(*ids)
+
+
+def run_worker(config):
+    """Entry point of one benchmark worker process. Returns raw latencies and its peak memory."""
+    _configure_backend(config["backend"])
+    from app import app
+    from resources.accountsResource import init_db
+    init_db()
+
+    client = app.test_client()
+    account_ids = _create_fixtures(client, config["run_id"], config["worker"], config["concurrency"], config["history_size"])
+
+    results = {}
+    try:
+        for name in config["scenarios"]:
+            function, share = SCENARIOS[name]
+            iterations = max(config["concurrency"], int(config["requests"] * share))
+            results[name] = _run_scenario(app, function, account_ids, config["run_id"], iterations)
+    finally:
+        if config["cleanup"]:
+            _cleanup(config["run_id"])
+
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    max_rss_mb = max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+    return {"worker": config["worker"], "pid": os.getpid(), "max_rss_mb": round(max_rss_mb, 1), "scenarios": results}
+
+
+def summarize(worker_results, scenarios):
+    """Merges per-worker samples into p50/p95/p99 latency (ms), throughput and errors per scenario."""
+    summary = {}
+    for name in scenarios:
+        runs = [worker["scenarios"][name] for worker in worker_results if name in worker["scenarios"]]
+        latencies = np.array([value for run in runs for value in run["latencies"]]) * 1000.0
+        if latencies.size == 0:
+            continue
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        # Workers run concurrently, so the slowest one bounds the scenario's wall time
+        elapsed = max(run["elapsed"] for run in runs)
+        summary[name] = {
+            "requests": int(latencies.size),
+            "errors": sum(run["errors"] for run in runs),
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "mean_ms": round(float(latencies.mean()), 3),
+            "throughput_rps": round(latencies.size / elapsed, 1) if elapsed else None,
+            "avg_response_bytes": int(sum(run["response_bytes"] for run in runs) / latencies.size)
+        }
+    return summary
+
+
+def run_benchmark(scenarios=None, requests=200, concurrency=4, workers=1, backend="mongomock", history_size=200, cleanup=True):
+    """Runs the scenarios on `workers` spawned processes with `concurrency` threads each. Returns the report."""
+    scenarios = list(scenarios or SCENARIOS)
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"Unknown scenarios: {', '.join(unknown)} (expected: {', '.join(SCENARIOS)})")
+
+    run_id = uuid.uuid4().hex[:8]
+    configs = [{
+        "run_id": run_id,
+        "worker": worker,
+        "backend": backend,
+        "scenarios": scenarios,
+        "requests": max(1, requests // workers),
+        "concurrency": concurrency,
+        "history_size": history_size,
+        "cleanup": cleanup
+    } for worker in range(workers)]
+
+    # Spawned (not forked) workers: a clean interpreter each, so memory figures are per worker
+    with multiprocessing.get_context("spawn").Pool(workers) as pool:
+        worker_results = pool.map(run_worker, configs)
+
+    return {
+        "generated_at": datetime.now(UTC).isoformat(),
+        "backend": backend,
+        "workers": workers,
+        "concurrency": concurrency,
+        "history_size": history_size,
+        "scenarios": summarize(worker_results, scenarios),
+        "memory": [{"worker": w["worker"], "pid": w["pid"], "max_rss_mb": w["max_rss_mb"]} for w in worker_results]
+    }
+
+
+def compare_to_baseline(report, baseline, max_regression):
+    """Lists scenarios whose p95 latency rose, or throughput fell, by more than `max_regression` (a fraction)."""
+    regressions = []
+    for name, current in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if previous["throughput_rps"] and current["throughput_rps"] < previous["throughput_rps"] * (1 - max_regression):
+            regressions.append(f"{name}: throughput {previous['throughput_rps']}/s -> {current['throughput_rps']}/s")
+    return regressions
+
+
+def print_table(report, baseline=None):
+    print(f"{'scenario':<16}{'reqs':>7}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'p95 vs base':>13}")
+    for name, row in report["scenarios"].items():
+        previous = (baseline or {}).get("scenarios", {}).get(name)
+        delta = ""
+        if previous and previous["p95_ms"]:
+            delta = f"{(row['p95_ms'] / previous['p95_ms'] - 1) * 100:+.1f}%"
+        print(f"{name:<16}{row['requests']:>7}{row['errors']:>5}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}"
+              f"{row['p99_ms']:>10.2f}{row['throughput_rps'] or 0:>10.1f}{delta:>13}")
+    for worker in report["memory"]:
+        print(f"worker {worker['worker']} (pid {worker['pid']}): max RSS {worker['max_rss_mb']} MB")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Banking API latency benchmarks")
+    parser.add_argument("--scenario", action="append", dest="scenarios", choices=list(SCENARIOS),
+                        help="Scenario to run (repeatable, default: all)")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario (heavy scenarios run a share of it)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Threads per worker")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes")
+    parser.add_argument("--backend", choices=["mongomock", "mongod"], default="mongomock",
+                        help="mongomock (in-process) or the mongod at MONGO_URI")
+    parser.add_argument("--history-size", type=int, default=200, help="Transactions seeded per fixture account")
+    parser.add_argument("--keep-data", action="store_true", help="Do not delete the bench-* accounts afterwards")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--compare", action="store_true", help="Exit non-zero if a scenario regressed vs the baseline")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed p95/throughput change (fraction)")
+    parser.add_argument("--output", default=None, help="Also write the full report to this JSON file")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    report = run_benchmark(
+        scenarios=args.scenarios, requests=args.requests, concurrency=args.concurrency, workers=args.workers,
+        backend=args.backend, history_size=args.history_size, cleanup=not args.keep_data
+    )
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_table(report, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+
+    if args.compare:
+        if baseline is None:
+            print(f"No baseline at {args.baseline}; run with --save-baseline first")
+            return 1
+        regressions = compare_to_baseline(report, baseline, args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
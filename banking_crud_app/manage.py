@@ -0,0 +1,102 @@
+import argparse
+import json
+import sys
+from resources.accountsResource import (
+    archive_transactions, compact_balance_snapshots, init_db, migrate_transactions, reconcile_ledger, run_interest_batch,
+    get_mongo_db, ARCHIVE_AFTER_MONTHS, ARCHIVE_BATCH_SIZE, INTEREST_CHUNK_SIZE, MIGRATION_BATCH_SIZE, RECONCILE_CHUNK_SIZE, RECONCILE_WORKERS, RECONCILE_TOLERANCE
+)
+
+# ============================================
+# Maintenance Commands (run outside the request path)
+# ============================================
+# Usage: python manage.py <command> [options]
+
+def initialize_database(args):
+    init_db()
+
+
+def compact_snapshots(args):
+    written = compact_balance_snapshots(account_id=args.account_id, rebuild=args.rebuild)
+    print(f"Wrote closing balances for {written} monthly snapshots.")
+
+
+def migrate(args):
+    updated = migrate_transactions(account_id=args.account_id, batch_size=args.batch_size)
+    print(f"Backfilled balance_after and timestamps on {updated} transactions.")
+
+
+def reconcile(args):
+    report = reconcile_ledger(
+        account_id=args.account_id, chunk_size=args.chunk_size, workers=args.workers, tolerance=args.tolerance
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    print(f"Checked {report['accounts_checked']} accounts / {report['transactions_checked']} transactions: "
+          f"{report['accounts_with_issues']} with issues (total drift {report['total_drift']:.2f}).", file=sys.stderr)
+    # Non-zero exit so schedulers can alert on drift
+    return 1 if report["accounts_with_issues"] else 0
+
+
+def archive(args):
+    summary = archive_transactions(
+        older_than_months=args.older_than_months, include_closed=not args.skip_closed,
+        account_id=args.account_id, batch_size=args.batch_size
+    )
+    print(f"Archived {summary['old_transactions']} transactions before {summary['cutoff']} and "
+          f"{summary['closed_account_transactions']} of Closed accounts ({summary['accounts']} accounts).")
+
+
+def interest(args):
+    summary = run_interest_batch(get_mongo_db(), post=args.post, chunk_size=args.chunk_size)
+    action = "Credited" if args.post else "Calculated"
+    print(f"{action} {summary['total_interest']:.2f} interest over {summary['accounts']} accounts "
+          f"({summary['posted_accounts']} credited).")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Banking API maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    init = commands.add_parser("init-db", help="Create indexes and seed an empty database")
+    init.set_defaults(handler=initialize_database)
+
+    compact = commands.add_parser("compact-snapshots", help="Store closing balances for completed months")
+    compact.add_argument("--account-id", type=int, default=None, help="Only compact this account")
+    compact.add_argument("--rebuild", action="store_true", help="Recompute monthly movements from the transactions first")
+    compact.set_defaults(handler=compact_snapshots)
+
+    backfill = commands.add_parser("migrate-transactions", help="Backfill balance_after and BSON date timestamps on old transactions")
+    backfill.add_argument("--account-id", type=int, default=None, help="Only migrate this account")
+    backfill.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE, help="Updates per bulk_write")
+    backfill.set_defaults(handler=migrate)
+
+    ledger = commands.add_parser("reconcile", help="Check account balances against their transactions and print a JSON report")
+    ledger.add_argument("--account-id", type=int, default=None, help="Only reconcile this account")
+    ledger.add_argument("--chunk-size", type=int, default=RECONCILE_CHUNK_SIZE, help="Account ids per aggregation")
+    ledger.add_argument("--workers", type=int, default=RECONCILE_WORKERS, help="Chunks reconciled in parallel")
+    ledger.add_argument("--tolerance", type=float, default=RECONCILE_TOLERANCE, help="Largest drift treated as rounding")
+    ledger.add_argument("--output", default=None, help="Write the report to this file instead of stdout")
+    ledger.set_defaults(handler=reconcile)
+
+    cold = commands.add_parser("archive", help="Move old and Closed-account transactions to the archive collection")
+    cold.add_argument("--older-than-months", type=int, default=ARCHIVE_AFTER_MONTHS, help="Archive transactions before the start of the month this many months ago")
+    cold.add_argument("--skip-closed", action="store_true", help="Leave recent transactions of Closed accounts in place")
+    cold.add_argument("--account-id", type=int, default=None, help="Only archive this account")
+    cold.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE, help="Transactions moved per batch")
+    cold.set_defaults(handler=archive)
+
+    batch_interest = commands.add_parser("interest", help="Calculate (and optionally credit) interest for all Active accounts")
+    batch_interest.add_argument("--post", action="store_true", help="Credit the interest as Interest transactions")
+    batch_interest.add_argument("--chunk-size", type=int, default=INTEREST_CHUNK_SIZE, help="Accounts per chunk")
+    batch_interest.set_defaults(handler=interest)
+
+    return parser
+
+
+if __name__ == '__main__':
+    args = build_parser().parse_args()
+    sys.exit(args.handler(args))
@@ -1,135 +1,404 @@
 from flask_restful import Resource
-from flask import request, Response
-from pymongo import MongoClient
-from datetime import datetime, UTC 
+from flask import request, Response, stream_with_context
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, CollectionInvalid
+from datetime import datetime, timedelta, UTC 
 from bson.objectid import ObjectId # Import ObjectId for updating
 import os
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from io import BytesIO
+import re
+import socket
+import json
+import uuid
+import numpy as np
+from tempfile import SpooledTemporaryFile
+from concurrent.futures import ThreadPoolExecutor
+from util.mongoConnection import MongoConnectionManager
+from util.accountCache import build_account_cache
+from util.statementPdf import (
+    StatementPdfCache, render_statement_pdf, iter_file_chunks, PDF_STREAM_CHUNK_SIZE, JOB_RESULTS_DIR, JOB_RESULTS_MAX_ENTRIES
+)
+from util.jobQueue import JobQueue, QueueFullError
+from util.idempotency import IdempotencyStore
+from util.idGenerator import build_id_generator
+from util.responseFormats import (
+    JSON_MIMETYPE, ARROW_MIMETYPE, FORMAT_BATCH_ROWS, negotiate_format, not_acceptable, encode_rows, arrow_schema
+)
 
 # ============================================
 # MongoDB Configuration
 # ============================================
 
-MONGO_URI = os.environ.get("MONGO_URI", "mongodb://localhost:27017/")
 DATABASE_NAME = "banking"
-client = None
-db = None
+# Wrap balance updates and their transaction log entry in one multi-document transaction.
+# Requires a replica set, so it is opt-in for local standalone mongod setups.
+USE_MONGO_TRANSACTIONS = os.environ.get("MONGO_USE_TRANSACTIONS", "false").lower() == "true"
+# Pooled, fork-aware client shared by every request in this worker process
+mongo = MongoConnectionManager(DATABASE_NAME)
+# Read-through cache for single-account lookups; every mutating path invalidates it
+account_cache = build_account_cache()
+# Rendered statement PDFs, keyed by everything they depend on
+pdf_cache = StatementPdfCache()
+# PDFs rendered by async jobs, until downloaded or evicted (never disabled, unlike pdf_cache)
+job_results = StatementPdfCache(JOB_RESULTS_DIR, JOB_RESULTS_MAX_ENTRIES)
+# Stored responses for deposit/withdraw retries carrying an Idempotency-Key header
+idempotency = IdempotencyStore(lambda: mongo.get_db().idempotency_keys)
+# Account IDs come from per-worker blocks of the `sequences` document (or time-ordered IDs)
+account_ids = build_id_generator(lambda: mongo.get_db().sequences, "account_id")
 
 # ============================================
 # MongoDB Setup and Helpers
 # ============================================
 
-def _get_statement_data(account_id):
-    db = get_mongo_db()
-    account = db.accounts.find_one({"id": account_id})
-    if not account:
-        return {"message": f"Account with id {account_id} not found"}, 404
+STATEMENT_BATCH_SIZE = 500 # Transactions fetched per cursor round trip
+STATEMENT_CHUNK_ROWS = 200 # Transactions serialised per chunk of the JSON stream
+SNAPSHOT_PERIOD_FORMAT = "%Y-%m" # Balance snapshots are kept per calendar month
+CREDIT_TYPES = ["deposit", "interest"] # Transaction types that add to the balance
 
-    transactions_cursor = db.transactions.find(
-        {"account_id": account_id}, 
-        {"_id": 0, "account_id": 0}
-    ).sort("timestamp", 1)
+def _is_credit(transaction_type):
+    """Transactions are logged as "Deposit"/"Withdrawal"/"Interest", so compare case-insensitively."""
+    return transaction_type.lower() in CREDIT_TYPES
 
-    transactions = []
-    
-    # Fetch all transactions to calculate the running balance
-    temp_transactions = list(transactions_cursor)
-    
-    # Calculate total net transactions to find the opening balance
-    total_net_transaction_amount = sum(
-        t['amount'] if t['type'] == 'deposit' else -t['amount'] 
-        for t in temp_transactions
+def _signed_amount_expression():
+    """Aggregation expression for +amount on credits and -amount on everything else."""
+    return {
+        "$cond": [
+            {"$in": [{"$toLower": "$type"}, CREDIT_TYPES]},
+            "$amount",
+            {"$multiply": ["$amount", -1]}
+        ]
+    }
+
+# Archived transactions live in a cold collection (optionally in another database); reads span both tiers
+ARCHIVE_COLLECTION = os.environ.get("ARCHIVE_COLLECTION", "transactions_archive")
+ARCHIVE_DATABASE = os.environ.get("ARCHIVE_DATABASE")
+# WiredTiger block compressor for the archive ("" for engines without per-collection options)
+ARCHIVE_COMPRESSOR = os.environ.get("ARCHIVE_COMPRESSOR", "zstd")
+
+def get_archive_collection(db):
+    """Cold tier holding transactions moved out by `archive_transactions`."""
+    if ARCHIVE_DATABASE:
+        return mongo.get_client()[ARCHIVE_DATABASE][ARCHIVE_COLLECTION]
+    return db[ARCHIVE_COLLECTION]
+
+def _transaction_tiers(db, oldest_first=True):
+    """
+    Both transaction collections in time order. For any one account every archived
+    transaction is older than every hot one (old ones and whole Closed accounts are moved).
+    """
+    tiers = [get_archive_collection(db), db.transactions]
+    return tiers if oldest_first else tiers[::-1]
+
+def _net_transaction_amount(db, match):
+    """Sums signed transaction amounts server-side with a single $group per tier."""
+    net = 0.0
+    for collection in _transaction_tiers(db):
+        result = list(collection.aggregate([
+            {"$match": match},
+            {"$group": {"_id": None, "net": {"$sum": _signed_amount_expression()}}}
+        ]))
+        net += result[0]["net"] if result else 0.0
+    return net
+
+def _timestamp_bound(moment):
+    """Converts a datetime into the representation used by stored transaction timestamps (BSON dates in UTC)."""
+    return moment.astimezone(UTC)
+
+def _signed_amount(transaction):
+    return transaction['amount'] if _is_credit(transaction['type']) else -transaction['amount']
+
+def _recorded_balance_before(db, account, moment=None):
+    """
+    Balance just before `moment` (or before the first transaction when `moment` is None),
+    read from the `balance_after` stored on the neighbouring transaction: one index lookup.
+    Returns None when that transaction predates `balance_after` (not yet migrated).
+    """
+    account_id = account["id"]
+    if moment is not None:
+        for collection in _transaction_tiers(db, oldest_first=False):
+            previous = collection.find_one(
+                {"account_id": account_id, "timestamp": {"$lt": _timestamp_bound(moment)}},
+                {"_id": 0, "balance_after": 1},
+                sort=[("timestamp", -1), ("_id", -1)]
+            )
+            if previous is not None:
+                return previous.get("balance_after")
+
+    # Nothing before `moment`: the balance before the account's first transaction
+    for collection in _transaction_tiers(db):
+        first = collection.find_one(
+            {"account_id": account_id},
+            {"_id": 0, "type": 1, "amount": 1, "balance_after": 1},
+            sort=[("timestamp", 1), ("_id", 1)]
+        )
+        if first is not None:
+            break
+    if first is None:
+        return round(account["balance"], 2)
+    if "balance_after" not in first:
+        return None
+    return round(first["balance_after"] - _signed_amount(first), 2)
+
+def _period_key(moment):
+    """Snapshot period (calendar month) a datetime falls into, e.g. "2025-11"."""
+    return moment.astimezone(UTC).strftime(SNAPSHOT_PERIOD_FORMAT)
+
+def _period_start(period):
+    return datetime.strptime(period, SNAPSHOT_PERIOD_FORMAT).replace(tzinfo=UTC)
+
+def _next_period_start(period):
+    start = _period_start(period)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+def _timestamp_range(start=None, end=None):
+    """Builds a timestamp filter for the half-open window [start, end)."""
+    window = {}
+    if start is not None:
+        window["$gte"] = _timestamp_bound(start)
+    if end is not None:
+        window["$lt"] = _timestamp_bound(end)
+    return window
+
+def _get_opening_balance(db, account, start=None):
+    """
+    Balance of the account at `start` (or before its first transaction when `start` is None).
+    Read from the stored `balance_after` of the preceding transaction when available. For
+    transactions logged before `balance_after` existed, uses the latest closed balance
+    snapshot before `start`, so only the transactions between that snapshot and `start` are
+    summed, and otherwise subtracts every later transaction from the current balance.
+    """
+    recorded = _recorded_balance_before(db, account, start)
+    if recorded is not None:
+        return recorded
+
+    if start is None:
+        net = _net_transaction_amount(db, {"account_id": account["id"]})
+        return round(account["balance"] - net, 2)
+
+    snapshot = db.balance_snapshots.find_one(
+        {"account_id": account["id"], "period": {"$lt": _period_key(start)}, "closing_balance": {"$exists": True}},
+        sort=[("period", -1)]
     )
-    
-    opening_balance = round(account["balance"] - total_net_transaction_amount, 2)
+    if snapshot:
+        gap_start = _next_period_start(snapshot["period"])
+        net = 0.0
+        if gap_start < start:
+            net = _net_transaction_amount(db, {
+                "account_id": account["id"],
+                "timestamp": _timestamp_range(gap_start, start)
+            })
+        return round(snapshot["closing_balance"] + net, 2)
+
+    net = _net_transaction_amount(db, {"account_id": account["id"], "timestamp": _timestamp_range(start)})
+    return round(account["balance"] - net, 2)
+
+def _timestamp_value(timestamp):
+    """Stored timestamp (BSON date, or ISO string on unmigrated rows) as an aware UTC datetime."""
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=UTC)
+    return timestamp.astimezone(UTC)
+
+def _format_timestamp(timestamp):
+    return _timestamp_value(timestamp).isoformat()
+
+def _iter_statement_rows(db, account_id, opening_balance, start=None, end=None):
+    """
+    Yields transactions oldest first with their running balance, one cursor batch at a time,
+    reading the archive tier and then the hot one. The running balance is the stored
+    `balance_after`; it is only recomputed for transactions logged before that field existed.
+    """
+    query = {"account_id": account_id}
+    if start is not None or end is not None:
+        query["timestamp"] = _timestamp_range(start, end)
+
+    def transactions():
+        for collection in _transaction_tiers(db):
+            yield from collection.find(
+                query,
+                {"_id": 0, "account_id": 0}
+            ).sort([("timestamp", 1), ("_id", 1)]).batch_size(STATEMENT_BATCH_SIZE)
+
     current_running_balance = opening_balance
-    ISO_FORMAT_WITH_TZ = '%Y-%m-%dT%H:%M:%S.%f%z'
-    # Iterate forward to calculate and store the running balance for the statement
-    for t in temp_transactions:
-        if isinstance(t["timestamp"], str):
-            t["timestamp"] = datetime.strptime(t["timestamp"], '%Y-%m-%dT%H:%M:%S.%f%z')
-        t["timestamp"] = t["timestamp"].isoformat()
-        if t['type'] == 'deposit':
-            current_running_balance += t['amount']
-        else:
-            current_running_balance -= t['amount']
+    for t in transactions():
+        t["timestamp"] = _format_timestamp(t["timestamp"])
+        balance_after = t.pop("balance_after", None)
+        if balance_after is None:
+            balance_after = current_running_balance + _signed_amount(t)
+        current_running_balance = balance_after
         t['running_balance'] = round(current_running_balance, 2)
-        transactions.append(t)
+        yield t
+
+def _parse_statement_date(value, end_of_range=False):
+    """
+    Parses a `from`/`to` query parameter (ISO date or datetime, UTC assumed when naive).
+    A plain date used as the end of the range covers that whole day.
+    """
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=UTC)
+    if end_of_range and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+def _get_statement_data(account_id, start=None, end=None, account=None):
+    """
+    Returns the account, its opening/closing balance for the window [start, end) and a lazy
+    iterator over the statement rows. Nothing is materialised, so memory stays bounded by
+    the cursor batch size.
+    """
+    db = get_mongo_db()
+    if account is None:
+        account = db.accounts.find_one({"id": account_id})
+    if not account:
+        return {"message": f"Account with id {account_id} not found"}, 404
+
+    opening_balance = _get_opening_balance(db, account, start)
+
+    closing_balance = account["balance"]
+    if end is not None:
+        closing_balance = _recorded_balance_before(db, account, end)
+        if closing_balance is None:
+            window = {"account_id": account_id, "timestamp": _timestamp_range(start, end)}
+            closing_balance = round(opening_balance + _net_transaction_amount(db, window), 2)
 
     return {
         "account": format_account(account),
-        "transactions": transactions,
-        "opening_balance": opening_balance
+        "transactions": _iter_statement_rows(db, account_id, opening_balance, start, end),
+        "opening_balance": opening_balance,
+        "closing_balance": closing_balance
     }, 200
 
+def _get_statement_window():
+    """Reads the optional `from`/`to` query parameters as a (start, end) window."""
+    try:
+        start = request.args.get('from')
+        end = request.args.get('to')
+        start = _parse_statement_date(start) if start else None
+        end = _parse_statement_date(end, end_of_range=True) if end else None
+    except ValueError:
+        return {"message": "Invalid date format for 'from'/'to' (expected YYYY-MM-DD or ISO 8601)"}, 400
+
+    if start and end and start >= end:
+        return {"message": "'from' must be earlier than 'to'"}, 400
+
+    return (start, end), 200
+
+def _get_statement_request_data(account_id):
+    """Loads the statement for the window given in the request's query parameters."""
+    window, status = _get_statement_window()
+    if status != 200:
+        return window, status
+    return _get_statement_data(account_id, *window)
+
+def _stream_statement_json(statement, transactions):
+    """Writes the statement as chunked JSON: the summary fields first, then the transactions array."""
+    yield json.dumps(statement)[:-1] + ', "transactions": ['
+    chunk = []
+    first = True
+    for t in transactions:
+        chunk.append(json.dumps(t))
+        if len(chunk) >= STATEMENT_CHUNK_ROWS:
+            yield ("" if first else ",") + ",".join(chunk)
+            chunk = []
+            first = False
+    if chunk:
+        yield ("" if first else ",") + ",".join(chunk)
+    yield "]}"
+
 def get_mongo_db():
-    global client, db
-    if db is None:
+    """Returns the database handle from this process's pooled client (no setup work on the request path)."""
+    return mongo.get_db()
+
+def get_cached_account(db, account_id):
+    """Looks up an account through the account cache (None when it does not exist)."""
+    return account_cache.get(account_id, lambda: db.accounts.find_one({"id": account_id}, {"_id": 0}))
+
+def ensure_indexes(db):
+    db.accounts.create_index("id", unique=True)
+    db.accounts.create_index([("status", 1), ("id", 1)])
+    db.transactions.create_index("account_id")
+    db.transactions.create_index([("account_id", 1), ("timestamp", 1), ("_id", 1)])
+    db.balance_snapshots.create_index([("account_id", 1), ("period", 1)], unique=True)
+    db.jobs.create_index("created_at", expireAfterSeconds=JOB_TTL_SECONDS)
+    db.jobs.create_index("status")
+    db.job_workers.create_index("heartbeat_at", expireAfterSeconds=JOB_TTL_SECONDS)
+    idempotency.ensure_indexes(db.idempotency_keys)
+
+    archive = get_archive_collection(db)
+    if archive.name not in archive.database.list_collection_names():
+        options = {}
+        if ARCHIVE_COMPRESSOR:
+            options["storageEngine"] = {"wiredTiger": {"configString": f"block_compressor={ARCHIVE_COMPRESSOR}"}}
         try:
-            client = MongoClient(MONGO_URI) 
-            db = client[DATABASE_NAME]
-            print(f"Connected to MongoDB database: {DATABASE_NAME}")
+            archive.database.create_collection(archive.name, **options)
+        except CollectionInvalid:
+            pass # Created concurrently
+    archive.create_index([("account_id", 1), ("timestamp", 1), ("_id", 1)])
 
-            # 1. Ensure indexes
-            db.accounts.create_index("id", unique=True)
-            db.transactions.create_index("account_id")
-            
-            
-            if db.accounts.count_documents({}) == 0:
-                print("Initializing database with dummy accounts...")
-                db.sequences.insert_one({"_id": "account_id", "sequence_value": 0}) 
-                initial_accounts = [
-                    # Added 'no_of_months' and 'address' for initial dummy accounts
-                    {"name": "Dheekshith B G", "balance": 1000.50, "status": "Active", "no_of_months": 12, "address": "123 Main St, Anytown"}, 
-                    {"name": "Ninad Agarwal", "balance": 500.00, "status": "Active", "no_of_months": 6, "address": "456 Oak Ave, Othercity"},
-                    {"name": "Mouneesh", "balance": 200.00, "status": "Active", "no_of_months": 24, "address": "789 Pine Ln, Somewhere"},
-                    {"name": "Mahith", "balance": 500.00, "status": "Active", "no_of_months": 25, "address": "789 Pine Ln, Somewhere"}
-                ]
-                
-                # Fetch the current sequence value and initialize if not exists
-                sequence_doc = db.sequences.find_one_and_update(
-                    {'_id': "account_id"}, 
-                    {'$inc': {'sequence_value': len(initial_accounts)}},
-                    upsert=True, 
-                    return_document=True
-                )
-                start_id = sequence_doc['sequence_value'] - len(initial_accounts)
-                
-                # Assign IDs and insert
-                for i, account in enumerate(initial_accounts):
-                    account['id'] = start_id + i + 1
-                    db.accounts.insert_one(account)
-                    
-                print(f"Inserted {len(initial_accounts)} initial accounts.")
-            
-        except Exception as e:
-            print(f"Error connecting to MongoDB: {e}")
-            client = None
-            db = None
-    return db
+def seed_accounts(db):
+    """Inserts the dummy accounts into an empty database."""
+    if db.accounts.count_documents({}) != 0:
+        return
 
+    print("Initializing database with dummy accounts...")
+    initial_accounts = [
+        # Added 'no_of_months' and 'address' for initial dummy accounts
+        {"name": "Dheekshith B G", "balance": 1000.50, "status": "Active", "no_of_months": 12, "address": "123 Main St, Anytown"}, 
+        {"name": "Ninad Agarwal", "balance": 500.00, "status": "Active", "no_of_months": 6, "address": "456 Oak Ave, Othercity"},
+        {"name": "Mouneesh", "balance": 200.00, "status": "Active", "no_of_months": 24, "address": "789 Pine Ln, Somewhere"},
+        {"name": "Mahith", "balance": 500.00, "status": "Active", "no_of_months": 25, "address": "789 Pine Ln, Somewhere"}
+    ]
+    
+    # Fetch the current sequence value and initialize if not exists
+    sequence_doc = db.sequences.find_one_and_update(
+        {'_id': "account_id"}, 
+        {'$inc': {'sequence_value': len(initial_accounts)}},
+        upsert=True, 
+        return_document=True
+    )
+    start_id = sequence_doc['sequence_value'] - len(initial_accounts)
+    
+    # Assign IDs and insert
+    for i, account in enumerate(initial_accounts):
+        account['id'] = start_id + i + 1
+        account['opening_balance'] = account['balance']
+    db.accounts.insert_many(initial_accounts)
+        
+    print(f"Inserted {len(initial_accounts)} initial accounts.")
 
-def get_next_sequence(name):
-    """Generates the next sequential ID for accounts."""
+def init_db():
+    """
+    One-off setup (indexes and seed data). Runs from `manage.py init-db` (before gunicorn
+    starts) or the development server, never from a request.
+    """
     db = get_mongo_db()
-    # Atomically increment the sequence value
-    sequence_document = db.sequences.find_one_and_update(
-        {'_id': name},
-        {'$inc': {'sequence_value': 1}},
-        return_document=True,
-        upsert=True
-    )
-    return sequence_document['sequence_value']
+    ensure_indexes(db)
+    seed_accounts(db)
+    print(f"Initialized MongoDB database: {DATABASE_NAME}")
 
-def format_account(account):
-    """Formats a MongoDB account document for API response, ensuring new fields are present."""
-    # Remove MongoDB's internal ID
+
+def get_next_sequence(name):
+    """Generates the next ID for accounts from this worker's reserved block (no per-call sequence write)."""
+    if name != "account_id":
+        raise ValueError(f"No ID generator for sequence: {name}")
+    return account_ids.next_id()
+
+def format_account(account, fields=None):
+    """
+    Formats a MongoDB account document for API response, ensuring new fields are present.
+    When `fields` is given (a projected read), only those fields are defaulted.
+    """
+    # Remove MongoDB's internal ID and the transient batch markers
     account.pop('_id', None) 
+    account.pop('pending_batches', None)
     # Ensure all required fields exist, defaulting if missing
-    account['no_of_months'] = account.get('no_of_months', 0)
-    account['address'] = account.get('address', 'N/A')
+    if fields is None or 'no_of_months' in fields:
+        account['no_of_months'] = account.get('no_of_months', 0)
+    if fields is None or 'address' in fields:
+        account['address'] = account.get('address', 'N/A')
     
     return account
 
@@ -170,6 +439,7 @@ class CreateAccountResource(Resource):
             "id": account_id,
             "name": data['name'],
             "balance": balance,
+            "opening_balance": balance, # Baseline for ledger reconciliation
             "status": "Active", # Default status
             "no_of_months": no_of_months, # New field
             "address": address, # New field
@@ -182,19 +452,105 @@ class CreateAccountResource(Resource):
         return format_account(initial_data), 201
 
 # 2. READ (All)
+ACCOUNT_FIELDS = {"id", "name", "balance", "status", "no_of_months", "address", "created_at"}
+ACCOUNTS_PAGE_DEFAULT = 100
+ACCOUNTS_PAGE_MAX = 1000
+# Streamed formats (NDJSON/MessagePack/Arrow) never hold a page in memory, so pages can be larger
+BULK_PAGE_MAX = int(os.environ.get("BULK_PAGE_MAX", 100000))
+ACCOUNT_ARROW_FIELDS = [
+    ("id", "int64"), ("name", "string"), ("balance", "float64"), ("opening_balance", "float64"),
+    ("status", "string"), ("no_of_months", "int64"), ("address", "string"), ("created_at", "string")
+]
+
+def _page_limit(default, page_max, bulk):
+    """Parses `limit`; streamed formats may ask for up to BULK_PAGE_MAX rows."""
+    limit = int(request.args.get('limit', default))
+    if limit <= 0:
+        raise ValueError
+    return min(limit, BULK_PAGE_MAX if bulk else page_max)
+
+def _last_row_of_full_page(cursor, limit):
+    """
+    For a sorted cursor over a page query: the page's last row when another page follows,
+    else None. Lets streamed responses set X-Next-Cursor before sending the body.
+    """
+    rows = list(cursor.skip(limit - 1).limit(2))
+    return rows[0] if len(rows) == 2 else None
+
+def _streamed_response(rows, mimetype, headers, schema=None, header=None):
+    return Response(
+        stream_with_context(encode_rows(rows, mimetype, schema, header)),
+        mimetype=mimetype,
+        headers=headers
+    )
+
 class GetAccountsResource(Resource):
-    """GET /accounts"""
+    """
+    GET /accounts?after=<id>&limit=<n>&fields=<a,b>&status=<status>&name=<prefix>
+    Keyset-paginated on the unique `id` index. Filters and the projection are pushed down
+    to Mongo; the cursor for the next page is returned in the X-Next-Cursor header.
+    Send `Accept: application/x-ndjson`, `application/msgpack` or
+    `application/vnd.apache.arrow.stream` to stream the page straight from the cursor.
+    """
     def get(self):
         db = get_mongo_db()
-        accounts = list(db.accounts.find())
-        return [format_account(account) for account in accounts], 200
+
+        mimetype = negotiate_format()
+        if mimetype is None:
+            return not_acceptable()
+
+        try:
+            after = request.args.get('after')
+            after = int(after) if after is not None else None
+            limit = _page_limit(ACCOUNTS_PAGE_DEFAULT, ACCOUNTS_PAGE_MAX, bulk=mimetype != JSON_MIMETYPE)
+        except ValueError:
+            return {'message': "'after' must be an integer and 'limit' a positive integer"}, 400
+
+        fields = None
+        projection = None
+        if request.args.get('fields'):
+            fields = {f.strip() for f in request.args['fields'].split(',') if f.strip()}
+            unknown = fields - ACCOUNT_FIELDS
+            if unknown:
+                return {'message': f"Unknown fields: {', '.join(sorted(unknown))}"}, 400
+            # `id` is always returned since it is the pagination cursor
+            projection = {"_id": 0, "id": 1, **{f: 1 for f in fields}}
+
+        query = {}
+        if after is not None:
+            query["id"] = {"$gt": after}
+        if request.args.get('status'):
+            query["status"] = request.args['status']
+        if request.args.get('name'):
+            query["name"] = {"$regex": f"^{re.escape(request.args['name'])}"}
+
+        if mimetype != JSON_MIMETYPE:
+            headers = {}
+            last = _last_row_of_full_page(db.accounts.find(query, {"_id": 0, "id": 1}).sort("id", 1), limit)
+            if last is not None:
+                headers['X-Next-Cursor'] = str(last["id"])
+            cursor = db.accounts.find(query, projection).sort("id", 1).limit(limit).batch_size(FORMAT_BATCH_ROWS)
+            schema = None
+            if mimetype == ARROW_MIMETYPE:
+                schema = arrow_schema(ACCOUNT_ARROW_FIELDS, None if fields is None else fields | {"id"})
+            return _streamed_response((format_account(a, fields) for a in cursor), mimetype, headers, schema)
+
+        # Fetch one extra document to know whether another page exists
+        cursor = db.accounts.find(query, projection).sort("id", 1).limit(limit + 1)
+        accounts = [format_account(account, fields) for account in cursor]
+
+        headers = {}
+        if len(accounts) > limit:
+            accounts = accounts[:limit]
+            headers['X-Next-Cursor'] = str(accounts[-1]["id"])
+        return accounts, 200, headers
 
 # 3. READ (Single)
 class GetSingleAccountResource(Resource):
     """GET /accounts/<id>"""
     def get(self, id):
         db = get_mongo_db()
-        account = db.accounts.find_one({"id": id})
+        account = get_cached_account(db, id)
         if account:
             return format_account(account), 200
         return {'message': f'Account with id {id} not found'}, 404
@@ -236,6 +592,7 @@ class UpdateAccountResource(Resource):
             {"$set": update_fields},
             return_document=True
         )
+        account_cache.invalidate(id)
         
         if result:
             return format_account(result), 200
@@ -257,30 +614,439 @@ class DeleteAccountResource(Resource):
             return {"message": "Account must have a zero balance before deletion.", 
                     "current_balance": account["balance"]}, 400
         
-        # Delete account and associated transactions
+        # Delete the account; its transactions are retained in the archive tier
         db.accounts.delete_one({"id": id})
-        db.transactions.delete_many({"account_id": id})
+        _move_to_archive(db, {"account_id": id})
+        db.balance_snapshots.delete_many({"account_id": id})
+        account_cache.invalidate(id)
         
-        return {'message': f'Account with id {id} and all related transactions deleted'}, 200
+        return {'message': f'Account with id {id} deleted and its transactions archived'}, 200
 
 # ============================================
 # Transaction Resources (Deposit/Withdraw/History)
 # ============================================
 
 # Utility function for transaction logging
-def log_transaction(db, account_id, type, amount):
-    """Logs a transaction in the transactions collection."""
+def log_transaction(db, account_id, type, amount, balance_after, session=None):
+    """
+    Logs a transaction in the transactions collection and adds it to the month's balance snapshot.
+    `balance_after` is the balance returned by the atomic `$inc` that applied the transaction.
+    """
+    now = datetime.now(UTC)
     transaction_data = {
         "account_id": account_id,
         "type": type,
         "amount": amount,
-        "timestamp": datetime.now(UTC).isoformat()
+        "balance_after": round(balance_after, 2),
+        "timestamp": now
     }
-    db.transactions.insert_one(transaction_data)
+    db.transactions.insert_one(transaction_data, session=session)
+
+    # $inc is commutative, so concurrent transactions never overwrite each other's movement
+    db.balance_snapshots.update_one(
+        {"account_id": account_id, "period": _period_key(now)},
+        {"$inc": {"net": amount if _is_credit(type) else -amount, "transaction_count": 1}},
+        upsert=True,
+        session=session
+    )
+
+def post_transaction(db, account_filter, account_id, type, amount):
+    """
+    Applies a deposit/withdrawal as one conditional `find_one_and_update` and logs it.
+    `account_filter` carries the business rules (status, sufficient balance), so the check
+    and the update are a single atomic round trip. Returns the updated account, or None
+    when the filter did not match. With USE_MONGO_TRANSACTIONS the balance update and the
+    log entry commit together.
+    """
+    delta = amount if _is_credit(type) else -amount
+
+    def apply(session=None):
+        result = db.accounts.find_one_and_update(
+            account_filter,
+            {"$inc": {"balance": delta}},
+            return_document=ReturnDocument.AFTER,
+            session=session
+        )
+        if result:
+            log_transaction(db, account_id, type, amount, result["balance"], session=session)
+        return result
+
+    result = _run_in_transaction(apply)
+    if result:
+        account_cache.invalidate(account_id)
+    return result
+
+def _run_in_transaction(apply):
+    """Calls `apply(session)` inside a multi-document transaction when USE_MONGO_TRANSACTIONS is set."""
+    if not USE_MONGO_TRANSACTIONS:
+        return apply()
+
+    with mongo.get_client().start_session() as session:
+        return session.with_transaction(apply)
+
+def compact_balance_snapshots(account_id=None, rebuild=False):
+    """
+    Background compaction for `balance_snapshots`: stores the closing balance of every
+    completed month so statements can start from a single snapshot document.
+
+    Closing balances are chained forward from the latest stored closing balance, or derived
+    from the current balance minus all later movements when the account has none yet.
+    With `rebuild=True` the per-month movements are first recomputed from the transactions
+    themselves (needed once for transactions logged before snapshots existed; run
+    `migrate_transactions` first so their timestamps are dates).
+    Returns the number of snapshot documents written.
+    """
+    db = get_mongo_db()
+    current_period = _period_key(datetime.now(UTC))
+    account_filter = {} if account_id is None else {"id": account_id}
+    written = 0
+
+    if rebuild:
+        match = {} if account_id is None else {"account_id": account_id}
+        # Per (account, month) movements summed over both tiers
+        movements = {}
+        for collection in _transaction_tiers(db):
+            for m in collection.aggregate([
+                {"$match": match},
+                {"$group": {
+                    "_id": {"account_id": "$account_id", "period": {"$dateToString": {"format": SNAPSHOT_PERIOD_FORMAT, "date": "$timestamp"}}},
+                    "net": {"$sum": _signed_amount_expression()},
+                    "transaction_count": {"$sum": 1}
+                }}
+            ], allowDiskUse=True):
+                key = (m["_id"]["account_id"], m["_id"]["period"])
+                net, count = movements.get(key, (0.0, 0))
+                movements[key] = (net + m["net"], count + m["transaction_count"])
+        operations = [
+            UpdateOne(
+                {"account_id": account, "period": period},
+                {"$set": {"net": net, "transaction_count": count},
+                 "$unset": {"closing_balance": ""}},
+                upsert=True
+            )
+            for (account, period), (net, count) in movements.items()
+        ]
+        if operations:
+            db.balance_snapshots.bulk_write(operations, ordered=False)
+
+    for account in db.accounts.find(account_filter, {"_id": 0, "id": 1, "balance": 1}):
+        snapshots = list(db.balance_snapshots.find(
+            {"account_id": account["id"]}, {"_id": 0}
+        ).sort("period", 1))
+
+        pending = [snap for snap in snapshots if "closing_balance" not in snap and snap["period"] < current_period]
+        if not pending:
+            continue
+
+        closed = [snap for snap in snapshots if "closing_balance" in snap and snap["period"] < pending[0]["period"]]
+        if closed:
+            balance = closed[-1]["closing_balance"]
+            movements = [snap for snap in snapshots if snap["period"] > closed[-1]["period"]]
+        else:
+            balance = account.get("balance", 0.0) - sum(snap.get("net", 0.0) for snap in snapshots)
+            movements = snapshots
+
+        operations = []
+        for snap in movements:
+            if snap["period"] >= current_period:
+                break
+            balance += snap.get("net", 0.0)
+            if "closing_balance" not in snap:
+                operations.append(UpdateOne(
+                    {"account_id": account["id"], "period": snap["period"]},
+                    {"$set": {"closing_balance": round(balance, 2)}}
+                ))
+        if operations:
+            db.balance_snapshots.bulk_write(operations, ordered=False)
+            written += len(operations)
+
+    return written
+
+MIGRATION_BATCH_SIZE = int(os.environ.get("MIGRATION_BATCH_SIZE", 1000))
+
+def migrate_transactions(account_id=None, batch_size=MIGRATION_BATCH_SIZE):
+    """
+    One-off backfill for transactions logged before `balance_after` existed: converts string
+    timestamps to BSON dates and stores each transaction's `balance_after`, chained from the
+    account's current balance minus all of its movements. Writes go out in `bulk_write`
+    batches of `batch_size`. Rows that already have `balance_after` are kept and resync the
+    running balance, so the command can be re-run safely. Accounts created before
+    `opening_balance` existed get it set to the same derived starting balance, which
+    baselines them for `reconcile_ledger`. Run it while the account is idle
+    (e.g. in a maintenance window) and before `compact-snapshots --rebuild`.
+    Returns the number of transactions updated.
+    """
+    db = get_mongo_db()
+    account_filter = {} if account_id is None else {"id": account_id}
+    updated = 0
+
+    for account in db.accounts.find(account_filter, {"_id": 0, "id": 1, "balance": 1, "opening_balance": 1}):
+        needs_backfill = db.transactions.find_one(
+            {"account_id": account["id"], "balance_after": {"$exists": False}}, {"_id": 1}
+        ) is not None
+        if not needs_backfill and "opening_balance" in account:
+            continue
+
+        balance = account.get("balance", 0.0) - _net_transaction_amount(db, {"account_id": account["id"]})
+        if "opening_balance" not in account:
+            db.accounts.update_one({"id": account["id"]}, {"$set": {"opening_balance": round(balance, 2)}})
+        if not needs_backfill:
+            continue
+
+        cursor = db.transactions.find(
+            {"account_id": account["id"]}, {"type": 1, "amount": 1, "timestamp": 1, "balance_after": 1}
+        ).sort([("timestamp", 1), ("_id", 1)]).batch_size(batch_size)
+
+        operations = []
+        for t in cursor:
+            if "balance_after" in t:
+                balance = t["balance_after"]
+                continue
+            balance += _signed_amount(t)
+            timestamp = t["timestamp"]
+            if isinstance(timestamp, str):
+                timestamp = _timestamp_bound(datetime.fromisoformat(timestamp))
+            operations.append(UpdateOne(
+                {"_id": t["_id"]}, {"$set": {"timestamp": timestamp, "balance_after": round(balance, 2)}}
+            ))
+            if len(operations) >= batch_size:
+                db.transactions.bulk_write(operations, ordered=False)
+                updated += len(operations)
+                operations = []
+        if operations:
+            db.transactions.bulk_write(operations, ordered=False)
+            updated += len(operations)
+
+    # Statement and history sorts now break timestamp ties on _id
+    if "account_id_1_timestamp_1" in db.transactions.index_information():
+        db.transactions.drop_index("account_id_1_timestamp_1")
+    ensure_indexes(db)
+    return updated
+
+# ============================================
+# Ledger Reconciliation (accounts.balance vs transactions)
+# ============================================
+RECONCILE_CHUNK_SIZE = int(os.environ.get("RECONCILE_CHUNK_SIZE", 10000))
+RECONCILE_WORKERS = int(os.environ.get("RECONCILE_WORKERS", 4))
+RECONCILE_TOLERANCE = float(os.environ.get("RECONCILE_TOLERANCE", 0.005))
+KNOWN_TRANSACTION_TYPES = ["deposit", "withdrawal", "interest"]
+
+def _ledger_totals(collection, low, high):
+    """
+    Per-account transaction totals for account ids in [low, high), computed by one
+    aggregation over one tier. The $match and $sort follow the (account_id, timestamp, _id)
+    index, so `$last` picks each account's latest `balance_after` without a blocking sort.
+    """
+    return collection.aggregate([
+        {"$match": {"account_id": {"$gte": low, "$lt": high}}},
+        {"$sort": {"account_id": 1, "timestamp": 1, "_id": 1}},
+        {"$group": {
+            "_id": "$account_id",
+            "net": {"$sum": _signed_amount_expression()},
+            "transaction_count": {"$sum": 1},
+            "unknown_types": {"$sum": {
+                "$cond": [{"$in": [{"$toLower": "$type"}, KNOWN_TRANSACTION_TYPES]}, 0, 1]
+            }},
+            "last_balance_after": {"$last": "$balance_after"}
+        }}
+    ], allowDiskUse=True)
+
+def _reconcile_chunk(db, low, high, tolerance):
+    """Reconciles the accounts with ids in [low, high) over both tiers. Returns (summary, issues)."""
+    totals = {}
+    # Oldest tier first, so the hot tier's latest balance_after wins
+    for collection in _transaction_tiers(db):
+        hot = collection.name == db.transactions.name and collection.database.name == db.name
+        for row in _ledger_totals(collection, low, high):
+            row["hot"] = hot
+            merged = totals.setdefault(row["_id"], row)
+            if merged is not row:
+                merged["net"] += row["net"]
+                merged["transaction_count"] += row["transaction_count"]
+                merged["unknown_types"] += row["unknown_types"]
+                merged["hot"] = merged["hot"] or hot
+                if row.get("last_balance_after") is not None:
+                    merged["last_balance_after"] = row["last_balance_after"]
+    summary = {"accounts_checked": 0, "transactions_checked": 0, "unbaselined_accounts": 0, "unknown_type_transactions": 0}
+    issues = []
+
+    accounts = db.accounts.find(
+        {"id": {"$gte": low, "$lt": high}}, {"_id": 0, "id": 1, "balance": 1, "opening_balance": 1, "status": 1}
+    )
+    for account in accounts:
+        summary["accounts_checked"] += 1
+        row = totals.pop(account["id"], {"net": 0.0, "transaction_count": 0, "unknown_types": 0, "last_balance_after": None})
+        summary["transactions_checked"] += row["transaction_count"]
+        summary["unknown_type_transactions"] += row["unknown_types"]
+
+        balance = round(account.get("balance", 0.0), 2)
+        entry = {
+            "account_id": account["id"],
+            "status": account.get("status"),
+            "balance": balance,
+            "opening_balance": account.get("opening_balance"),
+            "transaction_net": round(row["net"], 2),
+            "transaction_count": row["transaction_count"],
+            "expected_balance": None,
+            "drift": None,
+            "last_balance_after": row.get("last_balance_after"),
+            "issues": []
+        }
+        if entry["opening_balance"] is None:
+            summary["unbaselined_accounts"] += 1
+        else:
+            entry["expected_balance"] = round(entry["opening_balance"] + row["net"], 2)
+            entry["drift"] = round(balance - entry["expected_balance"], 2)
+            if abs(entry["drift"]) > tolerance:
+                entry["issues"].append("balance_mismatch")
+        if entry["last_balance_after"] is not None and abs(balance - entry["last_balance_after"]) > tolerance:
+            entry["issues"].append("balance_after_mismatch")
+        if row["unknown_types"]:
+            entry["issues"].append("unknown_transaction_type")
+        if entry["issues"]:
+            issues.append(entry)
+
+    # Whatever is left has transactions but no account document. Archive-only history is
+    # what DeleteAccountResource retains, so only hot transactions count as orphans
+    for account_id, row in totals.items():
+        if not row["hot"]:
+            continue
+        summary["transactions_checked"] += row["transaction_count"]
+        summary["unknown_type_transactions"] += row["unknown_types"]
+        issues.append({
+            "account_id": account_id,
+            "transaction_net": round(row["net"], 2),
+            "transaction_count": row["transaction_count"],
+            "issues": ["orphan_transactions"]
+        })
+    return summary, issues
+
+def _id_bounds(collection, field):
+    first = collection.find_one({}, {"_id": 0, field: 1}, sort=[(field, 1)])
+    last = collection.find_one({}, {"_id": 0, field: 1}, sort=[(field, -1)])
+    if first is None:
+        return None
+    return first[field], last[field]
+
+def _reconcile_ranges(db, chunk_size):
+    """
+    Contiguous [low, high) account id ranges of about `chunk_size` accounts each, cut at the
+    actual account ids (one pass over the id index), so sparse time-ordered ids cost no more
+    chunks than dense sequential ones. The outer ranges stretch to the transactions' lowest
+    and highest account ids, so orphaned transactions are still covered.
+    """
+    bounds = [b for b in (_id_bounds(db.accounts, "id"), _id_bounds(db.transactions, "account_id")) if b]
+    if not bounds:
+        return []
+    starts = [min(b[0] for b in bounds)]
+    high = max(b[1] for b in bounds) + 1
+    for index, account in enumerate(db.accounts.find({}, {"_id": 0, "id": 1}).sort("id", 1)):
+        if index and index % chunk_size == 0:
+            starts.append(account["id"])
+    return list(zip(starts, starts[1:] + [high]))
+
+def reconcile_ledger(account_id=None, chunk_size=RECONCILE_CHUNK_SIZE, workers=RECONCILE_WORKERS, tolerance=RECONCILE_TOLERANCE):
+    """
+    Checks every account's stored balance against its ledger: `opening_balance` plus the
+    signed sum of its transactions (types compared case-insensitively), and the latest
+    `balance_after`. Accounts are split into id ranges of `chunk_size` accounts, each reconciled by
+    its own aggregation on a pool of `workers` threads, so transactions are only ever
+    summed server-side and memory is bounded by one chunk of accounts.
+    Returns a JSON-serialisable report listing only the accounts with issues.
+    """
+    db = get_mongo_db()
+    if account_id is not None:
+        ranges = [(account_id, account_id + 1)]
+    else:
+        ranges = _reconcile_ranges(db, chunk_size)
+
+    report = {
+        "generated_at": datetime.now(UTC).isoformat(),
+        "tolerance": tolerance,
+        "chunks": len(ranges),
+        "accounts_checked": 0,
+        "transactions_checked": 0,
+        "unbaselined_accounts": 0,
+        "unknown_type_transactions": 0,
+        "accounts_with_issues": 0,
+        "total_drift": 0.0,
+        "issues": []
+    }
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for summary, issues in pool.map(lambda r: _reconcile_chunk(db, r[0], r[1], tolerance), ranges):
+            for key, value in summary.items():
+                report[key] += value
+            report["issues"].extend(issues)
+
+    report["accounts_with_issues"] = len(report["issues"])
+    report["total_drift"] = round(sum(entry.get("drift") or 0.0 for entry in report["issues"]), 2)
+    return report
+
+# ============================================
+# Transaction Archiving (hot tier -> archive tier)
+# ============================================
+ARCHIVE_AFTER_MONTHS = int(os.environ.get("ARCHIVE_AFTER_MONTHS", 12))
+ARCHIVE_BATCH_SIZE = int(os.environ.get("ARCHIVE_BATCH_SIZE", 1000))
+
+def _archive_cutoff(months, now=None):
+    """Start of the calendar month `months` months before `now`; older transactions get archived."""
+    start = _period_start(_period_key(now or datetime.now(UTC)))
+    year, month = divmod(start.year * 12 + start.month - 1 - months, 12)
+    return start.replace(year=year, month=month + 1)
+
+def _move_to_archive(db, query, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Moves matching hot transactions to the archive tier in batches, oldest first: each batch
+    is copied with one insert_many (keeping `_id`) and then removed with one delete_many.
+    Safe to re-run after an interruption. Returns the number of transactions moved.
+    """
+    archive = get_archive_collection(db)
+    moved = 0
+    while True:
+        batch = list(db.transactions.find(query).sort([("timestamp", 1), ("_id", 1)]).limit(batch_size))
+        if not batch:
+            return moved
+        try:
+            archive.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            # Rows already copied by an interrupted run are duplicates; anything else is an error
+            if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                raise
+        db.transactions.delete_many({"_id": {"$in": [t["_id"] for t in batch]}})
+        moved += len(batch)
+
+def archive_transactions(older_than_months=ARCHIVE_AFTER_MONTHS, include_closed=True, account_id=None,
+                         before=None, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Moves transactions out of the hot `transactions` collection into the archive tier:
+    those older than `older_than_months` whole calendar months (or than `before`), and every
+    transaction of Closed accounts. Each account is one index range on (account_id,
+    timestamp), moved in batches. Statements, history, reconciliation and PDF caching read
+    both tiers, so nothing else changes for clients. Run `migrate-transactions` first:
+    rows with string timestamps are not matched by the date cutoff.
+    Returns a summary dict.
+    """
+    db = get_mongo_db()
+    cutoff = before or _archive_cutoff(older_than_months)
+    account_filter = {} if account_id is None else {"id": account_id}
+    summary = {"cutoff": cutoff.isoformat(), "accounts": 0, "old_transactions": 0, "closed_account_transactions": 0}
+
+    for account in db.accounts.find(account_filter, {"_id": 0, "id": 1, "status": 1}).sort("id", 1):
+        if include_closed and account.get("status") == "Closed":
+            moved = _move_to_archive(db, {"account_id": account["id"]}, batch_size)
+            summary["closed_account_transactions"] += moved
+        else:
+            query = {"account_id": account["id"], "timestamp": {"$lt": _timestamp_bound(cutoff)}}
+            moved = _move_to_archive(db, query, batch_size)
+            summary["old_transactions"] += moved
+        if moved:
+            summary["accounts"] += 1
+    return summary
 
 # Deposit
 class DepositMoneyResource(Resource):
-    """POST /accounts/deposit"""
+    """POST /accounts/deposit (send an Idempotency-Key header to make retries safe)"""
+    @idempotency.idempotent("deposit")
     def post(self):
         db = get_mongo_db()
         data = request.json
@@ -296,15 +1062,10 @@ class DepositMoneyResource(Resource):
         except ValueError:
             return {'message': 'Invalid id or amount format'}, 400
             
-        # Atomically update the balance and check account status
-        result = db.accounts.find_one_and_update(
-            {"id": account_id, "status": "Active"}, # Only update Active accounts
-            {"$inc": {"balance": amount}},
-            return_document=True
-        )
+        # Atomically update the balance and check account status (only Active accounts)
+        result = post_transaction(db, {"id": account_id, "status": "Active"}, account_id, "Deposit", amount)
         
         if result:
-            log_transaction(db, account_id, "Deposit", amount)
             return format_account(result), 200
         
         # Check why update failed (not found or not active)
@@ -317,7 +1078,8 @@ class DepositMoneyResource(Resource):
 
 # Withdraw
 class WithdrawMoneyResource(Resource):
-    """POST /accounts/withdraw"""
+    """POST /accounts/withdraw (send an Idempotency-Key header to make retries safe)"""
+    @idempotency.idempotent("withdraw")
     def post(self):
         db = get_mongo_db()
         data = request.json
@@ -333,34 +1095,316 @@ class WithdrawMoneyResource(Resource):
         except ValueError:
             return {'message': 'Invalid id or amount format'}, 400
             
-        # 1. Find the account and check status/balance
-        account = db.accounts.find_one({"id": account_id})
-        if not account:
-            return {'message': f'Account with id {account_id} not found'}, 404
-        
-        if account.get("status") != "Active":
-            return {'message': f"Cannot withdraw from account status: {account['status']}"}, 400
-            
-        if account.get("balance", 0) < amount:
-            return {'message': 'Insufficient balance'}, 400
-            
-        # 2. Atomically update the balance
-        result = db.accounts.find_one_and_update(
-            {"id": account_id},
-            {"$inc": {"balance": -amount}}, # Subtract amount
-            return_document=True
+        # Check status/balance and subtract in one atomic update, so concurrent
+        # withdrawals can never both pass the balance check
+        result = post_transaction(
+            db,
+            {"id": account_id, "status": "Active", "balance": {"$gte": amount}},
+            account_id, "Withdrawal", amount
         )
         
         if result:
-            log_transaction(db, account_id, "Withdrawal", amount)
             return format_account(result), 200
         
-        # Should ideally not be reached if checks above passed, but good for safety
-        return {'message': 'Withdrawal failed due to an unknown error'}, 500
+        # Check why update failed (not found, not active or insufficient balance)
+        account_check = db.accounts.find_one({"id": account_id})
+        if not account_check:
+            return {'message': f'Account with id {account_id} not found'}, 404
+        
+        if account_check.get("status") != "Active":
+            return {'message': f"Cannot withdraw from account status: {account_check['status']}"}, 400
+            
+        return {'message': 'Insufficient balance'}, 400
+
+# Batch Deposit/Withdraw
+BATCH_MAX_ITEMS = 50000
+BATCH_TRANSACTION_TYPES = ("Deposit", "Withdrawal")
+
+def _read_batch_items():
+    """
+    Reads the batch body: a JSON array (or {"transactions": [...]}) or, with
+    Content-Type application/x-ndjson, one JSON object per line streamed from the request.
+    """
+    if request.mimetype == 'application/x-ndjson':
+        items = []
+        for line in request.stream:
+            line = line.strip()
+            if line:
+                try:
+                    items.append(json.loads(line))
+                except ValueError:
+                    items.append(None)
+        return items
+
+    body = request.get_json(force=True, silent=True)
+    if isinstance(body, dict):
+        body = body.get('transactions')
+    if not isinstance(body, list):
+        raise ValueError("Request body must be a JSON array of transactions or NDJSON")
+    return body
+
+def _validate_batch_item(item):
+    """Returns (account_id, type, amount) for a batch item or raises ValueError with the reason."""
+    if not isinstance(item, dict):
+        raise ValueError('Item must be a JSON object')
+    if 'id' not in item or 'amount' not in item or 'type' not in item:
+        raise ValueError('Missing required fields: id, type and amount')
+    transaction_type = TRANSACTION_TYPES.get(str(item['type']).lower())
+    if transaction_type not in BATCH_TRANSACTION_TYPES:
+        raise ValueError("Invalid type (expected one of: deposit, withdrawal)")
+    try:
+        account_id = int(item['id'])
+        amount = float(item['amount'])
+    except (TypeError, ValueError):
+        raise ValueError('Invalid id or amount format')
+    if amount <= 0:
+        raise ValueError('Amount must be positive')
+    return account_id, transaction_type, amount
+
+def apply_transaction_batch(db, items):
+    """
+    Applies a batch of deposits/withdrawals with one accounts read, one `bulk_write` of
+    per-account `$inc` updates and one `insert_many` for the transaction log.
+
+    Items are checked in order against each account's balance, so a withdrawal only
+    succeeds if the balance covers it at that point of the batch. Each account's update is
+    guarded by the balance the batch was simulated against, so every logged transaction
+    carries an exact `balance_after` and a concurrent withdrawal can never drive it negative;
+    if the guard fails, that account's items are reported as conflicts. Returns one result
+    dict per item, in order.
+    """
+    results = [None] * len(items)
+    parsed = {}
+    for index, item in enumerate(items):
+        try:
+            parsed[index] = _validate_batch_item(item)
+        except ValueError as e:
+            results[index] = {"index": index, "status": 400, "message": str(e)}
+
+    account_ids = {account_id for account_id, _, _ in parsed.values()}
+    accounts = {
+        account["id"]: account
+        for account in db.accounts.find({"id": {"$in": list(account_ids)}}, {"_id": 0, "id": 1, "status": 1, "balance": 1})
+    }
+
+    # Simulate each account's items in order: net movement and the balance after each item
+    accepted = {}
+    for index, (account_id, transaction_type, amount) in parsed.items():
+        account = accounts.get(account_id)
+        if account is None:
+            results[index] = {"index": index, "status": 404, "message": f'Account with id {account_id} not found'}
+            continue
+        if account.get("status") != "Active":
+            results[index] = {"index": index, "status": 400, "message": f"Cannot post to account status: {account['status']}"}
+            continue
+
+        state = accepted.setdefault(account_id, {"net": 0.0, "indexes": [], "balances_after": []})
+        delta = amount if _is_credit(transaction_type) else -amount
+        balance_after = account.get("balance", 0) + state["net"] + delta
+        if balance_after < 0:
+            results[index] = {"index": index, "status": 400, "message": 'Insufficient balance'}
+            continue
+        state["net"] += delta
+        state["indexes"].append(index)
+        state["balances_after"].append(round(balance_after, 2))
+
+    if not accepted:
+        return results
+
+    # Each update tags the account with the batch id, so the accounts whose guard matched
+    # can be told apart from the ones that changed concurrently
+    batch_id = str(ObjectId())
+    account_updates = []
+    update_order = []
+    for account_id, state in accepted.items():
+        account_updates.append(UpdateOne(
+            {"id": account_id, "status": "Active", "balance": accounts[account_id].get("balance", 0)},
+            {"$inc": {"balance": state["net"]}, "$addToSet": {"pending_batches": batch_id}}
+        ))
+        update_order.append(account_id)
+
+    def apply(session=None):
+        outcome = db.accounts.bulk_write(account_updates, ordered=False, session=session)
+        applied = set(update_order)
+        if outcome.matched_count != len(update_order):
+            applied = {
+                account["id"]
+                for account in db.accounts.find(
+                    {"id": {"$in": update_order}, "pending_batches": batch_id}, {"_id": 0, "id": 1}, session=session
+                )
+            }
+
+        now = datetime.now(UTC)
+        period = _period_key(now)
+        transaction_logs = []
+        snapshot_updates = []
+        for account_id in update_order:
+            if account_id not in applied:
+                continue
+            state = accepted[account_id]
+            for index, balance_after in zip(state["indexes"], state["balances_after"]):
+                _, transaction_type, amount = parsed[index]
+                transaction_logs.append({
+                    "account_id": account_id,
+                    "type": transaction_type,
+                    "amount": amount,
+                    "balance_after": balance_after,
+                    "timestamp": now
+                })
+            snapshot_updates.append(UpdateOne(
+                {"account_id": account_id, "period": period},
+                {"$inc": {"net": state["net"], "transaction_count": len(state["indexes"])}},
+                upsert=True
+            ))
+
+        if transaction_logs:
+            db.transactions.insert_many(transaction_logs, ordered=False, session=session)
+            db.balance_snapshots.bulk_write(snapshot_updates, ordered=False, session=session)
+            db.accounts.update_many(
+                {"id": {"$in": list(applied)}}, {"$pull": {"pending_batches": batch_id}}, session=session
+            )
+        return applied
+
+    applied = _run_in_transaction(apply)
+    account_cache.invalidate(*applied)
+
+    for account_id in update_order:
+        for index in accepted[account_id]["indexes"]:
+            if account_id in applied:
+                results[index] = {"index": index, "status": 200, "id": account_id}
+            else:
+                results[index] = {"index": index, "status": 409, "message": 'Balance changed concurrently, retry this item'}
+    return results
+
+class BatchTransactionsResource(Resource):
+    """POST /accounts/transactions/batch"""
+    def post(self):
+        db = get_mongo_db()
+
+        try:
+            items = _read_batch_items()
+        except ValueError as e:
+            return {'message': str(e)}, 400
+
+        if not items:
+            return {'message': 'Batch contains no transactions'}, 400
+        if len(items) > BATCH_MAX_ITEMS:
+            return {'message': f'Batch exceeds the maximum of {BATCH_MAX_ITEMS} transactions'}, 413
+
+        results = apply_transaction_batch(db, items)
+        applied = sum(1 for result in results if result["status"] == 200)
+        return {
+            "applied": applied,
+            "failed": len(results) - applied,
+            "results": results
+        }, 200
 
 # Transaction History
+HISTORY_PAGE_DEFAULT = 50
+HISTORY_PAGE_MAX = 1000
+TRANSACTION_TYPES = {"deposit": "Deposit", "withdrawal": "Withdrawal", "interest": "Interest"}
+
+TRANSACTION_ARROW_FIELDS = [
+    ("account_id", "int64"), ("type", "string"), ("amount", "float64"),
+    ("balance_after", "float64"), ("timestamp", "timestamp")
+]
+
+HISTORY_ORDER = [("timestamp", -1), ("_id", -1)]
+
+def _find_history(db, query, projection, limit):
+    """
+    Up to `limit` matching transactions, newest first: the hot tier, then the archive only
+    when the page is not yet full (so recent pages never touch the archive).
+    """
+    for collection in _transaction_tiers(db, oldest_first=False):
+        if limit <= 0:
+            return
+        for t in collection.find(query, projection).sort(HISTORY_ORDER).limit(limit).batch_size(FORMAT_BATCH_ROWS):
+            limit -= 1
+            yield t
+
+def _last_history_row_of_full_page(db, query, limit):
+    """`_last_row_of_full_page` across the hot and archive tiers, newest first."""
+    tiers = _transaction_tiers(db, oldest_first=False)
+    for index, collection in enumerate(tiers):
+        rows = list(collection.find(query, {"timestamp": 1}).sort(HISTORY_ORDER).skip(limit - 1).limit(2))
+        if len(rows) == 2:
+            return rows[0]
+        if rows:
+            # The page ends on this tier's last row: another page follows only from an older tier
+            return rows[0] if any(older.find_one(query, {"_id": 1}) for older in tiers[index + 1:]) else None
+        limit -= collection.count_documents(query, limit=limit)
+    return None
+
+def _history_cursor_token(transaction):
+    """
+    URL-safe keyset cursor for the oldest transaction on a page: its UTC timestamp ('Z' suffix)
+    and `_id`, so transactions logged in the same millisecond are never skipped.
+    """
+    timestamp = transaction["timestamp"]
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=UTC)
+    return f"{timestamp.astimezone(UTC).strftime('%Y-%m-%dT%H:%M:%S.%fZ')}_{transaction['_id']}"
+
+def _parse_history_filters(account_id):
+    """Builds the Mongo query for the history endpoint from the request's query parameters."""
+    query = {"account_id": account_id}
+
+    transaction_type = request.args.get('type')
+    if transaction_type:
+        if transaction_type.lower() not in TRANSACTION_TYPES:
+            raise ValueError(f"Invalid type (expected one of: {', '.join(TRANSACTION_TYPES)})")
+        query["type"] = TRANSACTION_TYPES[transaction_type.lower()]
+
+    amount_range = {}
+    try:
+        if request.args.get('min_amount'):
+            amount_range["$gte"] = float(request.args['min_amount'])
+        if request.args.get('max_amount'):
+            amount_range["$lte"] = float(request.args['max_amount'])
+    except ValueError:
+        raise ValueError("'min_amount' and 'max_amount' must be numbers")
+    if amount_range:
+        query["amount"] = amount_range
+
+    try:
+        start = request.args.get('from')
+        end = request.args.get('to')
+        before = request.args.get('before')
+        before_id = None
+        if before and '_' in before:
+            # Cursors from X-Next-Cursor carry the `_id` tiebreak; a bare timestamp is still accepted
+            before, before_id = before.rsplit('_', 1)
+            before_id = ObjectId(before_id) if ObjectId.is_valid(before_id) else None
+            if before_id is None:
+                raise ValueError
+        start = _parse_statement_date(start) if start else None
+        end = _parse_statement_date(end, end_of_range=True) if end else None
+        before = _parse_statement_date(before) if before else None
+    except ValueError:
+        raise ValueError("Invalid date format for 'from'/'to'/'before' (expected YYYY-MM-DD or ISO 8601)")
+
+    # `before` is the keyset cursor: it simply tightens the upper bound of the window
+    if before is not None and (end is None or before < end):
+        end = before
+        if before_id is not None:
+            bound = _timestamp_bound(before)
+            query["$or"] = [{"timestamp": {"$lt": bound}}, {"timestamp": bound, "_id": {"$lt": before_id}}]
+            end = None
+    if start is not None or end is not None:
+        query["timestamp"] = _timestamp_range(start, end)
+
+    return query
+
 class TransactionHistoryResource(Resource):
-    """GET /accounts/<id>/transactions"""
+    """
+    GET /accounts/<id>/transactions?limit=<n>&before=<cursor>&type=&min_amount=&max_amount=&from=&to=
+    Most recent first, served by one range scan on the (account_id, timestamp, _id) index.
+    Each row carries the `balance_after` recorded when it was posted.
+    The cursor for the next (older) page is returned in the X-Next-Cursor header.
+    """
     def get(self, id):
         db = get_mongo_db()
         
@@ -368,17 +1412,46 @@ class TransactionHistoryResource(Resource):
             account_id = int(id)
         except ValueError:
             return {'message': 'Invalid account ID format'}, 400
+
+        mimetype = negotiate_format()
+        if mimetype is None:
+            return not_acceptable()
+
+        try:
+            limit = _page_limit(HISTORY_PAGE_DEFAULT, HISTORY_PAGE_MAX, bulk=mimetype != JSON_MIMETYPE)
+        except ValueError:
+            return {'message': "'limit' must be a positive integer"}, 400
+
+        try:
+            query = _parse_history_filters(account_id)
+        except ValueError as e:
+            return {'message': str(e)}, 400
             
         # Check if account exists
-        if not db.accounts.find_one({"id": account_id}):
+        if not db.accounts.find_one({"id": account_id}, {"_id": 1}):
             return {'message': f'Account with id {account_id} not found'}, 404
-            
-        transactions = list(db.transactions.find({"account_id": account_id}, {'_id': 0}))
-        
-        # Sort by timestamp (most recent first)
-        transactions.sort(key=lambda x: x['timestamp'], reverse=True)
-        
-        return transactions, 200
+
+        if mimetype != JSON_MIMETYPE:
+            headers = {}
+            last = _last_history_row_of_full_page(db, query, limit)
+            if last is not None:
+                headers['X-Next-Cursor'] = _history_cursor_token(last)
+            cursor = _find_history(db, query, {"_id": 0}, limit)
+            rows = (dict(t, timestamp=_timestamp_value(t["timestamp"])) for t in cursor)
+            schema = arrow_schema(TRANSACTION_ARROW_FIELDS) if mimetype == ARROW_MIMETYPE else None
+            return _streamed_response(rows, mimetype, headers, schema)
+
+        # Most recent first, fetching one extra row to detect another page
+        transactions = list(_find_history(db, query, None, limit + 1))
+
+        headers = {}
+        if len(transactions) > limit:
+            transactions = transactions[:limit]
+            headers['X-Next-Cursor'] = _history_cursor_token(transactions[-1])
+        for t in transactions:
+            t.pop("_id")
+            t["timestamp"] = _format_timestamp(t["timestamp"])
+        return transactions, 200, headers
 
 # Block/Close Resources
 class BlockAccountResource(Resource):
@@ -394,6 +1467,7 @@ class BlockAccountResource(Resource):
         )
         
         if result:
+            account_cache.invalidate(id)
             return format_account(result), 200
         
         # Check if it's not found or already blocked/closed
@@ -410,27 +1484,29 @@ class CloseAccountResource(Resource):
     def put(self, id):
         db = get_mongo_db()
         
+        # Business Requirement: Balance must be zero to close.
+        # The rule is part of the update filter, so the happy path is a single round trip.
+        result = db.accounts.find_one_and_update(
+            {"id": id, "status": {"$ne": "Closed"}, "balance": 0}, # Only close if not already closed
+            {"$set": {"status": "Closed"}},
+            return_document=True
+        )
+
+        if result:
+            account_cache.invalidate(id)
+            return format_account(result), 200
+        
+        # Check why update failed (not found, non-zero balance or already Closed)
         account = db.accounts.find_one({"id": id})
         if not account:
             return {"message": f"Account with id {id} not found"}, 404
         
-        # Business Requirement: Balance must be zero to close
         # Use .get with a default value of 0.0 to prevent KeyError if balance is somehow missing
         if account.get("balance", 0.0) != 0.0:
             return {"message": "Account must have a zero balance before closing.", 
                     "current_balance": account["balance"]}, 400
         
-        # Atomically set the status to Closed
-        result = db.accounts.find_one_and_update(
-            {"id": id, "status": {"$ne": "Closed"}}, # Only close if not already closed
-            {"$set": {"status": "Closed"}},
-            return_document=True
-        )
-
-        if result:
-            return format_account(result), 200
-        
-        # If update failed, it means the account was already Closed
+        # If it reached here, the account was already Closed
         return {"message": f"Account with id {id} is already Closed"}, 200 
 
 # NEW: Resource to calculate monthly interest
@@ -446,7 +1522,7 @@ class MonthlyInterestResource(Resource):
         except ValueError:
             return {'message': 'Invalid account ID format'}, 400
 
-        account = db.accounts.find_one({"id": account_id})
+        account = get_cached_account(db, account_id)
         
         if not account:
             return {'message': f'Account with id {account_id} not found'}, 404
@@ -486,109 +1562,353 @@ class MonthlyInterestResource(Resource):
             'calculated_interest_amount': total_interest
         }, 200
 
+# Batch interest for all active accounts
+INTEREST_CHUNK_SIZE = 10000 # Accounts per cursor batch / NumPy vector
+
+def _interest_chunks(db, chunk_size, exclude_period=None):
+    """Streams eligible accounts as (ids, balances, months) NumPy arrays of up to `chunk_size` rows."""
+    query = {"status": "Active", "no_of_months": {"$gt": 0}}
+    if exclude_period is not None:
+        query["interest_posted_period"] = {"$ne": exclude_period}
+    cursor = db.accounts.find(
+        query, {"_id": 0, "id": 1, "balance": 1, "no_of_months": 1}
+    ).sort("id", 1).batch_size(chunk_size)
+
+    ids, balances, months = [], [], []
+    for account in cursor:
+        ids.append(account["id"])
+        balances.append(account.get("balance", 0.0))
+        months.append(account["no_of_months"])
+        if len(ids) >= chunk_size:
+            yield np.array(ids, dtype=np.int64), np.array(balances, dtype=np.float64), np.array(months, dtype=np.float64)
+            ids, balances, months = [], [], []
+    if ids:
+        yield np.array(ids, dtype=np.int64), np.array(balances, dtype=np.float64), np.array(months, dtype=np.float64)
+
+def _post_interest_chunk(db, ids, interest, balances, period):
+    """
+    Credits one chunk of interest with a single bulk_write and logs it with one insert_many.
+    Accounts are stamped with the period, so re-running the month-end job never pays twice.
+    Each update is guarded by the balance the interest was computed from, so the logged
+    `balance_after` is exact; accounts that moved meanwhile are picked up by the next run.
+    Returns the ids that were credited.
+    """
+    # Each update tags the account with this chunk's run id (as apply_transaction_batch does),
+    # so accounts credited here can be told apart from ones a concurrent run credited
+    run_id = str(ObjectId())
+    updates = [
+        UpdateOne(
+            {"id": account_id, "status": "Active", "balance": balance, "interest_posted_period": {"$ne": period}},
+            {"$inc": {"balance": amount}, "$set": {"interest_posted_period": period}, "$addToSet": {"pending_batches": run_id}}
+        )
+        for account_id, amount, balance in zip(ids, interest, balances)
+    ]
+    if not updates:
+        return []
+
+    outcome = db.accounts.bulk_write(updates, ordered=False)
+    credited = dict(zip(ids, interest))
+    balances_after = {account_id: round(balance + amount, 2) for account_id, amount, balance in zip(ids, interest, balances)}
+    if outcome.matched_count != len(updates):
+        # Only happens if accounts changed status or balance, or were credited by a concurrent run
+        matched = {
+            account["id"]
+            for account in db.accounts.find({"id": {"$in": list(credited)}, "pending_batches": run_id}, {"_id": 0, "id": 1})
+        }
+        credited = {account_id: amount for account_id, amount in credited.items() if account_id in matched}
+    if not credited:
+        return []
+
+    now = datetime.now(UTC)
+    db.transactions.insert_many([
+        {
+            "account_id": account_id,
+            "type": "Interest",
+            "amount": amount,
+            "balance_after": balances_after[account_id],
+            "timestamp": now
+        }
+        for account_id, amount in credited.items()
+    ], ordered=False)
+    db.balance_snapshots.bulk_write([
+        UpdateOne(
+            {"account_id": account_id, "period": _period_key(now)},
+            {"$inc": {"net": amount, "transaction_count": 1}},
+            upsert=True
+        )
+        for account_id, amount in credited.items()
+    ], ordered=False)
+    db.accounts.update_many({"id": {"$in": list(credited)}}, {"$pull": {"pending_batches": run_id}})
+    account_cache.invalidate(*credited)
+    return list(credited)
+
+def run_interest_batch(db, post=False, chunk_size=INTEREST_CHUNK_SIZE, annual_rate=None):
+    """
+    Computes simple interest (balance * ANNUAL_RATE / 12 * no_of_months, as in
+    MonthlyInterestResource) for every Active account, vectorised per chunk with NumPy.
+    With `post=True` each non-zero amount is credited and logged as an "Interest"
+    transaction, at most once per account per month. Returns a summary dict.
+    """
+    if annual_rate is None:
+        annual_rate = MonthlyInterestResource.ANNUAL_RATE
+    monthly_rate = annual_rate / 12.0
+    period = _period_key(datetime.now(UTC))
+
+    summary = {
+        "accounts": 0,
+        "total_interest": 0.0,
+        "posted_accounts": 0,
+        "annual_interest_rate": f"{annual_rate * 100}%",
+        "posted": post
+    }
+    for ids, balances, months in _interest_chunks(db, chunk_size, exclude_period=period if post else None):
+        interest = np.round(balances * (monthly_rate * months), 2)
+        summary["accounts"] += len(ids)
+        summary["total_interest"] += float(interest.sum())
+
+        if post:
+            payable = interest > 0
+            credited = _post_interest_chunk(
+                db, ids[payable].tolist(), interest[payable].tolist(), balances[payable].tolist(), period
+            )
+            summary["posted_accounts"] += len(credited)
+
+    summary["total_interest"] = round(summary["total_interest"], 2)
+    return summary
+
+class BatchInterestResource(Resource):
+    """
+    GET  /accounts/interest/batch - interest due for every Active account (no changes made)
+    POST /accounts/interest/batch - compute and credit it as Interest transactions
+    """
+    def get(self):
+        return run_interest_batch(get_mongo_db()), 200
+
+    def post(self):
+        return run_interest_batch(get_mongo_db(), post=True), 200
+
+STATEMENT_ARROW_FIELDS = [("timestamp", "timestamp"), ("type", "string"), ("amount", "float64"), ("running_balance", "float64")]
+
 class AccountStatementJsonResource(Resource):
+    """
+    GET /accounts/statement/<id>?from=&to= - streamed JSON statement. With a bulk Accept
+    type the summary comes first (NDJSON/MessagePack) or in the Arrow schema metadata
+    ("header"), followed by the transactions.
+    """
     def get(self, id):
-        data, status = _get_statement_data(id)
+        mimetype = negotiate_format()
+        if mimetype is None:
+            return not_acceptable()
+
+        data, status = _get_statement_request_data(id)
         if status != 200:
             return data, status
 
         account_data = data["account"]
-        transactions = data["transactions"]
-        opening_balance = data["opening_balance"]
         
         statement = {
             "account_id": account_data["id"],
             "account_holder": account_data["name"],
-            "opening_balance": opening_balance,
-            "closing_balance": account_data["balance"],
-            "statement_date": datetime.now(UTC).strftime('%Y-%m-%dT%H:%M:%S%z'),
-            "transactions": transactions
+            "opening_balance": data["opening_balance"],
+            "closing_balance": data["closing_balance"],
+            "statement_date": datetime.now(UTC).strftime('%Y-%m-%dT%H:%M:%S%z')
         }
-        return statement, 200
+        if mimetype == ARROW_MIMETYPE:
+            rows = (dict(t, timestamp=_timestamp_value(t["timestamp"])) for t in data["transactions"])
+            return _streamed_response(rows, mimetype, {}, arrow_schema(STATEMENT_ARROW_FIELDS), header=statement)
+        if mimetype != JSON_MIMETYPE:
+            return _streamed_response(data["transactions"], mimetype, {}, header=statement)
+        return Response(
+            stream_with_context(_stream_statement_json(statement, data["transactions"])),
+            mimetype='application/json'
+        )
     
+def _statement_pdf_cache_key(db, account, start, end):
+    """Cache key covering everything a rendered statement depends on."""
+    for collection in _transaction_tiers(db, oldest_first=False):
+        last_transaction = collection.find_one(
+            {"account_id": account["id"]}, {"_id": 0, "timestamp": 1}, sort=[("timestamp", -1), ("_id", -1)]
+        )
+        if last_transaction is not None:
+            break
+    return pdf_cache.make_key(
+        account["id"], last_transaction["timestamp"] if last_transaction else None,
+        start, end, account.get("name"), account.get("balance")
+    )
+
+def _render_statement_data(output, data):
+    render_statement_pdf(
+        output, data["account"], data["opening_balance"], data["closing_balance"],
+        data["transactions"], _is_credit
+    )
+
+def render_statement_pdf_job(account_id, start, end, cache_key):
+    """Background job (runs in the job pool): renders a statement into the job results under `cache_key`."""
+    data, status = _get_statement_data(account_id, start, end)
+    if status != 200:
+        raise ValueError(data["message"])
+    job_results.store(cache_key, lambda output: _render_statement_data(output, data)).close()
+
+def open_job_result(cache_key):
+    """The rendered PDF of a finished job (from the job results or the statement cache), or None."""
+    return job_results.open(cache_key) or pdf_cache.open(cache_key)
+
+# ============================================
+# Background Jobs (async statement generation)
+# ============================================
+
+JOB_DEFAULT_PRIORITY = 10 # Lower runs first
+JOB_TTL_SECONDS = 24 * 60 * 60 # Finished job records are removed by a TTL index
+# A queue that has not sent a heartbeat for this long is gone, and so are its unfinished jobs
+JOB_OWNER_TIMEOUT_SECONDS = int(os.environ.get("JOB_OWNER_TIMEOUT_SECONDS", 60))
+JOB_ORPHANED_ERROR = "The worker running this job stopped before it finished, please submit it again"
+
+def _job_owner():
+    """Identifies this worker process's queue in `jobs.owner` and `job_workers`."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def _mark_job_running(job_id):
+    get_mongo_db().jobs.update_one(
+        {"_id": job_id}, {"$set": {"status": "running", "started_at": datetime.now(UTC)}}
+    )
+
+def _mark_job_finished(job_id, error):
+    update = {"status": "done" if error is None else "failed", "finished_at": datetime.now(UTC)}
+    if error is not None:
+        update["error"] = error
+    get_mongo_db().jobs.update_one({"_id": job_id}, {"$set": update})
+
+def reap_orphaned_jobs(db):
+    """
+    Fails queued/running jobs whose owning queue stopped sending heartbeats (its gunicorn
+    worker was recycled or crashed), so clients stop polling them. Returns how many were failed.
+    """
+    now = datetime.now(UTC)
+    stale = now - timedelta(seconds=JOB_OWNER_TIMEOUT_SECONDS)
+    live_owners = [worker["_id"] for worker in db.job_workers.find({"heartbeat_at": {"$gte": stale}}, {"_id": 1})]
+    result = db.jobs.update_many(
+        {"status": {"$in": ["queued", "running"]}, "owner": {"$nin": live_owners}, "created_at": {"$lt": stale}},
+        {"$set": {"status": "failed", "finished_at": now, "error": JOB_ORPHANED_ERROR}}
+    )
+    return result.modified_count
+
+def _job_queue_heartbeat():
+    db = get_mongo_db()
+    db.job_workers.update_one({"_id": _job_owner()}, {"$set": {"heartbeat_at": datetime.now(UTC)}}, upsert=True)
+    reap_orphaned_jobs(db)
+
+# Render queue of this worker process; job state lives in Mongo so any worker can report it
+job_queue = JobQueue(on_start=_mark_job_running, on_finish=_mark_job_finished, heartbeat=_job_queue_heartbeat)
+
+def format_job(job):
+    """Formats a job document for API responses."""
+    formatted = {
+        "job_id": job["_id"],
+        "type": job["type"],
+        "status": job["status"],
+        "account_id": job["account_id"],
+        "priority": job["priority"]
+    }
+    for field in ("created_at", "started_at", "finished_at"):
+        if job.get(field):
+            formatted[field] = job[field].isoformat()
+    if job.get("error"):
+        formatted["error"] = job["error"]
+    if job["status"] == "done":
+        formatted["download_url"] = f"/jobs/{job['_id']}?download=1"
+    return formatted
+
 class AccountStatementPdfResource(Resource):
+    def post(self, id):
+        """
+        POST /accounts/statement/pdf/<id>?async=1[&priority=n] - queues the render and returns a job id.
+        POST only renders asynchronously, so `async=1` is required; GET downloads synchronously.
+        """
+        if request.args.get('async') not in ('1', 'true'):
+            return {'message': "POST renders the statement asynchronously: add ?async=1, or use GET to download it directly"}, 400
+
+        window, status = _get_statement_window()
+        if status != 200:
+            return window, status
+        start, end = window
+
+        try:
+            priority = int(request.args.get('priority', JOB_DEFAULT_PRIORITY))
+        except ValueError:
+            return {'message': "'priority' must be an integer"}, 400
+
+        db = get_mongo_db()
+        account = db.accounts.find_one({"id": id})
+        if not account:
+            return {"message": f"Account with id {id} not found"}, 404
+
+        cache_key = _statement_pdf_cache_key(db, account, start, end)
+        job = {
+            "_id": uuid.uuid4().hex,
+            "type": "statement_pdf",
+            "account_id": id,
+            "priority": priority,
+            "cache_key": cache_key,
+            "owner": _job_owner(),
+            "created_at": datetime.now(UTC)
+        }
+
+        # Already rendered: the job is born finished
+        cached = open_job_result(cache_key)
+        if cached is not None:
+            cached.close()
+            job.update(status="done", finished_at=job["created_at"])
+            db.jobs.insert_one(job)
+            return format_job(job), 202
+
+        job["status"] = "queued"
+        db.jobs.insert_one(job)
+        try:
+            job_queue.submit(job["_id"], priority, render_statement_pdf_job, id, start, end, cache_key)
+        except QueueFullError as e:
+            db.jobs.delete_one({"_id": job["_id"]})
+            return {'message': str(e)}, 503
+        return format_job(job), 202
+
     def get(self, id):
-        data, status = _get_statement_data(id)
+        window, status = _get_statement_window()
         if status != 200:
-            return data, status
-        
-        account = data["account"]
-        transactions = data["transactions"]
-        
-        # --- Start ReportLab PDF Generation ---
-        
-        buffer = BytesIO()
-        c = canvas.Canvas(buffer, pagesize=letter)
-        
-        # Define coordinates and step for drawing
-        X_START = 50
-        Y_START = 750
-        Y_STEP = 14
-        
-        # Title and Summary
-        c.setFont("Helvetica-Bold", 16)
-        c.drawString(X_START, Y_START, "Group 1 Bank")
+            return window, status
+        start, end = window
 
-        c.setFont("Helvetica-Bold", 16)
-        c.drawString(X_START, Y_START - Y_STEP * 2, "Account Statement")
-        
-        c.setFont("Helvetica", 10)
-        c.drawString(X_START, Y_START - Y_STEP * 3, f"Account Holder: {account['name']} (ID: {account['id']})")
-        c.drawString(X_START, Y_START - Y_STEP * 4, f"Statement Date: {datetime.now(UTC).strftime('%Y-%m-%d %H:%M:%S UTC')}")
-        c.drawString(X_START, Y_START - Y_STEP * 5, f"Opening Balance: ${data['opening_balance']:.2f}")
-        c.drawString(X_START, Y_START - Y_STEP * 6, f"Closing Balance: ${account['balance']:.2f}")
+        db = get_mongo_db()
+        account = db.accounts.find_one({"id": id})
+        if not account:
+            return {"message": f"Account with id {id} not found"}, 404
 
-        # Transactions Header
-        Y_HEADER = Y_START - Y_STEP * 8
-        c.setFont("Helvetica-Bold", 10)
-        c.drawString(X_START, Y_HEADER, "Date/Time")
-        c.drawString(X_START + 150, Y_HEADER, "Type")
-        c.drawString(X_START + 250, Y_HEADER, "Amount ($)")
-        c.drawString(X_START + 400, Y_HEADER, "Running Balance ($)")
-        
-        # Draw Separator Line
-        c.line(X_START, Y_HEADER - 2, X_START + 500, Y_HEADER - 2)
+        # An unchanged statement (same account details, last transaction and window) is served from the cache
+        cache_key = _statement_pdf_cache_key(db, account, start, end)
+        etag = f'"{cache_key}"'
+        if request.headers.get('If-None-Match') == etag:
+            return Response(status=304, headers={'ETag': etag})
 
-        # Transactions Data
-        y_position = Y_HEADER - Y_STEP * 2
-        c.setFont("Helvetica", 9)
-        
-        for t in transactions:
-            # Check for page break
-            if y_position < 50:
-                c.showPage()
-                y_position = 750
-                # Redraw header on new page
-                c.setFont("Helvetica-Bold", 10)
-                c.drawString(X_START, y_position, "Date/Time")
-                c.drawString(X_START + 150, y_position, "Type")
-                c.drawString(X_START + 250, y_position, "Amount ($)")
-                c.drawString(X_START + 400, y_position, "Running Balance ($)")
-                c.line(X_START, y_position - 2, X_START + 500, y_position - 2)
-                y_position -= Y_STEP * 2
-                c.setFont("Helvetica", 9)
-
-            amount_sign = "" if t['type'] == 'deposit' else "-"
-            
-            c.drawString(X_START, y_position, t['timestamp'])
-            c.drawString(X_START + 150, y_position, t['type'].capitalize())
-            c.drawString(X_START + 250, y_position, f"{amount_sign}{t['amount']:.2f}")
-            c.drawString(X_START + 400, y_position, f"{t['running_balance']:.2f}")
-            
-            y_position -= Y_STEP
+        pdf_file = pdf_cache.open(cache_key)
+        if pdf_file is None:
+            data, status = _get_statement_data(id, start, end, account=account)
+            if status != 200:
+                return data, status
 
-        c.save()
+            def render(output):
+                _render_statement_data(output, data)
 
-        buffer.seek(0)
-        pdf_content = buffer.getvalue()
-        
-        # --- End ReportLab PDF Generation ---
+            if pdf_cache.enabled:
+                pdf_file = pdf_cache.store(cache_key, render)
+            else:
+                # Spills to disk for big statements instead of holding the whole PDF in memory
+                pdf_file = SpooledTemporaryFile(max_size=PDF_STREAM_CHUNK_SIZE * 16)
+                render(pdf_file)
 
         return Response(
-            pdf_content,
+            iter_file_chunks(pdf_file),
             mimetype='application/pdf',
             headers={
                 'Content-Disposition': f'attachment;filename=statement_{account["id"]}_{datetime.now(UTC).strftime("%Y%m%d")}.pdf',
-                'Content-Transfer-Encoding': 'binary'
+                'Content-Transfer-Encoding': 'binary',
+                'ETag': etag
             }
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,61 @@
+from flask_restful import Resource
+from flask import Response
+from resources.accountsResource import get_mongo_db, format_account
+from util.activityFeed import ActivityFeed
+import json
+import os
+
+# Comment line sent when nothing happened, so proxies keep idle streams open
+FEED_HEARTBEAT_SECONDS = float(os.environ.get("FEED_HEARTBEAT_SECONDS", 15))
+
+# One upstream watcher per worker process, shared by every open stream
+feed = ActivityFeed(get_mongo_db, format_account)
+
+def _sse(event, data, event_id=None):
+    """Formats one Server-Sent Events message."""
+    lines = [f"id: {event_id}"] if event_id else []
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+class AccountEventsResource(Resource):
+    """
+    GET /accounts/<id>/events - Server-Sent Events stream of the account's activity.
+    Starts with a `snapshot` of the account, then pushes `transaction` (and, with change
+    streams, `account`) events; `resync` means events were dropped for a slow reader and the
+    client should refetch the account. Each open stream holds a server thread, so it is served
+    by gthread workers (see gunicorn.conf.py, GUNICORN_THREADS per worker).
+    """
+    def get(self, id):
+        if not get_mongo_db().accounts.find_one({"id": id}, {"_id": 1}):
+            return {'message': f'Account with id {id} not found'}, 404
+
+        def stream():
+            # Subscribed inside the generator, so a client that leaves before the first chunk
+            # (the generator never starts) leaves no subscription behind. Subscribe before
+            # reading the snapshot, so nothing falls between the two
+            subscription = feed.subscribe(id)
+            try:
+                account = get_mongo_db().accounts.find_one({"id": id}, {"_id": 0})
+                if not account:
+                    return
+                yield _sse("snapshot", format_account(account))
+                dropped = 0
+                while True:
+                    event = subscription.get(FEED_HEARTBEAT_SECONDS)
+                    if subscription.dropped != dropped:
+                        dropped = subscription.dropped
+                        yield _sse("resync", {"account_id": id, "dropped": dropped})
+                    if event is None:
+                        yield ": keep-alive\n\n"
+                        continue
+                    yield _sse(event["event"], event, event.get("id"))
+            finally:
+                # Runs when the client disconnects and the server closes the generator
+                feed.unsubscribe(subscription)
+
+        return Response(
+            stream(),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
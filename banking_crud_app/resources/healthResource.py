@@ -0,0 +1,16 @@
+from flask_restful import Resource
+from resources.accountsResource import mongo, account_cache, job_queue, idempotency, account_ids
+from resources.activityResource import feed
+
+class HealthResource(Resource):
+    """GET /health - liveness plus this worker's MongoDB pool utilisation and account cache counters"""
+    def get(self):
+        return {
+            "status": "ok",
+            "mongo_pool": mongo.pool_stats(),
+            "account_cache": account_cache.stats(),
+            "job_queue": job_queue.stats(),
+            "idempotency": idempotency.stats(),
+            "account_ids": account_ids.stats(),
+            "activity_feed": feed.stats()
+        }, 200
@@ -0,0 +1,35 @@
+from flask_restful import Resource
+from flask import request, Response
+from resources.accountsResource import get_mongo_db, format_job, open_job_result, reap_orphaned_jobs
+from util.statementPdf import iter_file_chunks
+
+class JobResource(Resource):
+    """GET /jobs/<job_id> - job status; add ?download=1 to fetch the finished PDF"""
+    def get(self, job_id):
+        db = get_mongo_db()
+        job = db.jobs.find_one({"_id": job_id})
+        if not job:
+            return {'message': f'Job with id {job_id} not found'}, 404
+
+        # The queue owning an unfinished job may have died with its worker
+        if job["status"] in ("queued", "running") and reap_orphaned_jobs(db):
+            job = db.jobs.find_one({"_id": job_id}) or job
+
+        if request.args.get('download') not in ('1', 'true'):
+            return format_job(job), 200
+
+        if job["status"] != "done":
+            return {'message': f"Job {job_id} is {job['status']}, the result is not ready yet"}, 409
+
+        pdf_file = open_job_result(job["cache_key"])
+        if pdf_file is None:
+            return {'message': f'The result of job {job_id} has expired, please submit it again'}, 410
+
+        return Response(
+            iter_file_chunks(pdf_file),
+            mimetype='application/pdf',
+            headers={
+                'Content-Disposition': f'attachment;filename=statement_{job["account_id"]}_{job["_id"]}.pdf',
+                'Content-Transfer-Encoding': 'binary'
+            }
+        )
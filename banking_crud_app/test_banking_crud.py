@@ -1,10 +1,21 @@
 import unittest
+import io
 import json
 import time
 from app import app 
+from util.idGenerator import BlockIdAllocator, TimeOrderedIdGenerator, WorkerIdLease, WorkerIdsExhaustedError
+from resources import activityResource
+from resources.accountsResource import init_db, get_mongo_db, migrate_transactions, reconcile_ledger, idempotency
+from resources.accountsResource import archive_transactions, get_archive_collection
+from datetime import datetime, timedelta, UTC
 
 class TestBankingAPI(unittest.TestCase):
 
+    @classmethod
+    def setUpClass(cls):
+        """Creates indexes and seeds the database once, as the gunicorn master does."""
+        init_db()
+
     # Set up the test client before each test
     def setUp(self):
         """Initializes the test client and sets testing mode."""
@@ -273,6 +284,27 @@ class TestBankingAPI(unittest.TestCase):
         self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 110.00})
         self.app.delete(f'/accounts/{temp_id}')
 
+    def test_withdraw_from_blocked_account(self):
+        """Tests POST /accounts/withdraw fails on a non-Active account without changing the balance."""
+        response = self.app.post('/accounts', json={'name': "Test Blocked Withdraw", 'balance': 0.00})
+        temp_id = json.loads(response.data)['id']
+        self.app.put(f'/accounts/block/{temp_id}')
+
+        response = self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 10.00})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Cannot withdraw from account status: Blocked', json.loads(response.data)['message'])
+
+        verify_data = json.loads(self.app.get(f'/accounts/{temp_id}').data)
+        self.assertAlmostEqual(verify_data['balance'], 0.00)
+
+        # Cleanup
+        self.app.delete(f'/accounts/{temp_id}')
+
+    def test_withdraw_account_not_found(self):
+        """Tests POST /accounts/withdraw for a non-existent account."""
+        response = self.app.post('/accounts/withdraw', json={'id': 9999999, 'amount': 10.00})
+        self.assertEqual(response.status_code, 404)
+
     # =================================================================
     # 6. STATUS (BLOCK/CLOSE) TESTS
     # =================================================================
@@ -361,4 +393,881 @@ class TestBankingAPI(unittest.TestCase):
 
         # Cleanup
         self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 200.00})
-        self.app.delete(f'/accounts/{temp_id}')
\ No newline at end of file
+        self.app.delete(f'/accounts/{temp_id}')
+
+    # =================================================================
+    # 8. STATEMENT TESTS
+    # =================================================================
+
+    def test_statement_json_running_balance(self):
+        """Tests GET /accounts/statement/<id> streams rows with running balances from the opening balance."""
+        temp_id = self.create_test_account_with_transaction("Statement Account", 50.00) # 50 + 100 deposit = 150
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 30.00}) # 120
+
+        response = self.app.get(f'/accounts/statement/{temp_id}')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+
+        self.assertAlmostEqual(data['opening_balance'], 50.00)
+        self.assertAlmostEqual(data['closing_balance'], 120.00)
+        self.assertEqual(len(data['transactions']), 2)
+        self.assertAlmostEqual(data['transactions'][0]['running_balance'], 150.00)
+        self.assertAlmostEqual(data['transactions'][1]['running_balance'], 120.00)
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 120.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    def test_statement_pdf_success(self):
+        """Tests GET /accounts/statement/pdf/<id> returns a PDF document."""
+        temp_id = self.create_test_account_with_transaction("PDF Account", 10.00)
+
+        response = self.app.get(f'/accounts/statement/pdf/{temp_id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/pdf')
+        self.assertTrue(response.data.startswith(b'%PDF'))
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 110.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    def test_statement_account_not_found(self):
+        """Tests GET /accounts/statement/<id> for a non-existent account."""
+        response = self.app.get('/accounts/statement/9999999')
+        self.assertEqual(response.status_code, 404)
+
+    def test_statement_date_range(self):
+        """Tests GET /accounts/statement/<id>?from=&to= only covers transactions inside the window."""
+        temp_id = self.create_test_account_with_transaction("Range Account", 25.00) # Balance is 125.00
+
+        response = self.app.get(f'/accounts/statement/{temp_id}?from=2999-01-01')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['transactions'], [])
+        self.assertAlmostEqual(data['opening_balance'], 125.00)
+        self.assertAlmostEqual(data['closing_balance'], 125.00)
+
+        response = self.app.get(f'/accounts/statement/{temp_id}?from=2000-01-01&to=2999-12-31')
+        data = json.loads(response.data)
+        self.assertEqual(len(data['transactions']), 1)
+        self.assertAlmostEqual(data['opening_balance'], 25.00)
+        self.assertAlmostEqual(data['closing_balance'], 125.00)
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 125.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    def test_statement_invalid_date_range(self):
+        """Tests GET /accounts/statement/<id> rejects malformed or inverted date ranges."""
+        response = self.app.get('/accounts/statement/1?from=not-a-date')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.app.get('/accounts/statement/1?from=2025-02-01&to=2025-01-01')
+        self.assertEqual(response.status_code, 400)
+
+    # =================================================================
+    # 9. ACCOUNT LISTING (PAGINATION/PROJECTION/FILTER) TESTS
+    # =================================================================
+
+    def test_get_accounts_keyset_pagination(self):
+        """Tests GET /accounts?limit=&after= walks the accounts in id order using X-Next-Cursor."""
+        first_page = self.app.get('/accounts?limit=2')
+        self.assertEqual(first_page.status_code, 200)
+        first_data = json.loads(first_page.data)
+        self.assertEqual(len(first_data), 2)
+        self.assertLess(first_data[0]['id'], first_data[1]['id'])
+
+        cursor = first_page.headers.get('X-Next-Cursor')
+        self.assertEqual(cursor, str(first_data[1]['id']))
+
+        second_page = self.app.get(f'/accounts?limit=2&after={cursor}')
+        second_data = json.loads(second_page.data)
+        self.assertTrue(all(account['id'] > first_data[1]['id'] for account in second_data))
+
+    def test_get_accounts_projection_and_filters(self):
+        """Tests GET /accounts?fields=&status=&name= projects and filters server-side."""
+        temp_id = self.create_test_account_with_transaction("Zeta Projection", 10.00)
+
+        response = self.app.get('/accounts?fields=name,balance&status=Active&name=Zeta%20Proj')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual([account['id'] for account in data], [temp_id])
+        self.assertEqual(set(data[0].keys()), {'id', 'name', 'balance'})
+
+        response = self.app.get('/accounts?fields=password')
+        self.assertEqual(response.status_code, 400)
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 110.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    # =================================================================
+    # 10. TRANSACTION HISTORY (PAGINATION/FILTER) TESTS
+    # =================================================================
+
+    def test_transaction_history_pagination(self):
+        """Tests GET /accounts/<id>/transactions?limit=&before= pages from newest to oldest."""
+        temp_id = self.create_test_account_with_transaction("History Account", 0.00) # Deposit 100
+        for amount in (10.00, 20.00, 30.00):
+            self.app.post('/accounts/deposit', json={'id': temp_id, 'amount': amount})
+
+        first_page = self.app.get(f'/accounts/{temp_id}/transactions?limit=2')
+        self.assertEqual(first_page.status_code, 200)
+        first_data = json.loads(first_page.data)
+        self.assertEqual([t['amount'] for t in first_data], [30.00, 20.00])
+
+        cursor = first_page.headers.get('X-Next-Cursor')
+        self.assertIsNotNone(cursor)
+        second_page = self.app.get(f'/accounts/{temp_id}/transactions?limit=2&before={cursor}')
+        second_data = json.loads(second_page.data)
+        self.assertEqual([t['amount'] for t in second_data], [10.00, 100.00])
+        self.assertIsNone(second_page.headers.get('X-Next-Cursor'))
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 160.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    def test_transaction_history_filters(self):
+        """Tests GET /accounts/<id>/transactions filters by type and amount range."""
+        temp_id = self.create_test_account_with_transaction("Filter Account", 100.00) # 200 after deposit
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 40.00})
+
+        response = self.app.get(f'/accounts/{temp_id}/transactions?type=withdrawal')
+        data = json.loads(response.data)
+        self.assertEqual([t['type'] for t in data], ['Withdrawal'])
+
+        response = self.app.get(f'/accounts/{temp_id}/transactions?min_amount=50&max_amount=150')
+        data = json.loads(response.data)
+        self.assertEqual([t['amount'] for t in data], [100.00])
+
+        response = self.app.get(f'/accounts/{temp_id}/transactions?type=refund')
+        self.assertEqual(response.status_code, 400)
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 160.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    # =================================================================
+    # 11. BATCH TRANSACTION TESTS
+    # =================================================================
+
+    def test_batch_transactions_json(self):
+        """Tests POST /accounts/transactions/batch applies valid items and reports per-item failures."""
+        temp_id = self.create_test_account_with_transaction("Batch Account", 0.00) # Balance is 100.00
+
+        response = self.app.post('/accounts/transactions/batch', json=[
+            {'id': temp_id, 'type': 'deposit', 'amount': 50.00},
+            {'id': temp_id, 'type': 'withdrawal', 'amount': 120.00},
+            {'id': temp_id, 'type': 'withdrawal', 'amount': 100.00}, # Overdraws after the previous item
+            {'id': 9999999, 'type': 'deposit', 'amount': 1.00},
+            {'id': temp_id, 'amount': 1.00}
+        ])
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['applied'], 2)
+        self.assertEqual([r['status'] for r in data['results']], [200, 200, 400, 404, 400])
+
+        verify_data = json.loads(self.app.get(f'/accounts/{temp_id}').data)
+        self.assertAlmostEqual(verify_data['balance'], 30.00)
+        self.assertNotIn('pending_batches', verify_data)
+
+        history_data = json.loads(self.app.get(f'/accounts/{temp_id}/transactions').data)
+        self.assertEqual(len(history_data), 3)
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 30.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    def test_batch_transactions_ndjson(self):
+        """Tests POST /accounts/transactions/batch accepts an NDJSON body."""
+        temp_id = self.create_test_account_with_transaction("NDJSON Account", 0.00) # Balance is 100.00
+
+        body = "\n".join(json.dumps({'id': temp_id, 'type': 'Deposit', 'amount': 5.00}) for _ in range(3))
+        response = self.app.post('/accounts/transactions/batch', data=body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data)['applied'], 3)
+
+        verify_data = json.loads(self.app.get(f'/accounts/{temp_id}').data)
+        self.assertAlmostEqual(verify_data['balance'], 115.00)
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 115.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    # =================================================================
+    # 12. OPERATIONS TESTS
+    # =================================================================
+
+    def test_health_reports_pool_stats(self):
+        """Tests GET /health reports the MongoDB pool configuration and utilisation."""
+        response = self.app.get('/health')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual(data['status'], 'ok')
+        self.assertIn('max_pool_size', data['mongo_pool'])
+        self.assertIn('checked_out', data['mongo_pool'])
+
+    def test_account_cache_hits_and_invalidation(self):
+        """Tests repeated GET /accounts/<id> is served from the cache and deposits invalidate it."""
+        temp_id = self.create_test_account_with_transaction("Cached Account", 0.00) # Balance is 100.00
+
+        self.app.get(f'/accounts/{temp_id}')
+        hits_before = json.loads(self.app.get('/health').data)['account_cache']['hits']
+        self.app.get(f'/accounts/{temp_id}')
+        hits_after = json.loads(self.app.get('/health').data)['account_cache']['hits']
+        self.assertEqual(hits_after, hits_before + 1)
+
+        self.app.post('/accounts/deposit', json={'id': temp_id, 'amount': 5.00})
+        data = json.loads(self.app.get(f'/accounts/{temp_id}').data)
+        self.assertAlmostEqual(data['balance'], 105.00)
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 105.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    def test_batch_interest_calculate_and_post_once(self):
+        """Tests GET/POST /accounts/interest/batch computes interest for all accounts and credits it once per month."""
+        temp_id = self.create_test_account_with_transaction("Batch Interest Account", 900.00, no_of_months=6) # 1000.00
+
+        response = self.app.get('/accounts/interest/batch')
+        self.assertEqual(response.status_code, 200)
+        summary = json.loads(response.data)
+        self.assertGreaterEqual(summary['accounts'], 1)
+        self.assertFalse(summary['posted'])
+        self.assertAlmostEqual(json.loads(self.app.get(f'/accounts/{temp_id}').data)['balance'], 1000.00)
+
+        response = self.app.post('/accounts/interest/batch')
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(json.loads(response.data)['posted_accounts'], 1)
+        self.assertAlmostEqual(json.loads(self.app.get(f'/accounts/{temp_id}').data)['balance'], 1025.00)
+
+        # A second month-end run in the same month must not pay again
+        self.app.post('/accounts/interest/batch')
+        self.assertAlmostEqual(json.loads(self.app.get(f'/accounts/{temp_id}').data)['balance'], 1025.00)
+
+        history_data = json.loads(self.app.get(f'/accounts/{temp_id}/transactions?type=interest').data)
+        self.assertEqual([t['amount'] for t in history_data], [25.00])
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 1025.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    def test_overlapping_interest_runs_log_once(self):
+        """Tests two runs that computed the same interest credit and log it exactly once."""
+        from resources.accountsResource import _post_interest_chunk, _period_key
+        temp_id = self.create_test_account_with_transaction("Overlap Interest Account", 900.00) # 1000.00
+        period = "test-" + _period_key(datetime.now(UTC))
+
+        # Both runs read the balance before either posted
+        first = _post_interest_chunk(get_mongo_db(), [temp_id], [50.00], [1000.00], period)
+        second = _post_interest_chunk(get_mongo_db(), [temp_id], [50.00], [1000.00], period)
+        self.assertEqual((first, second), ([temp_id], []))
+
+        history_data = json.loads(self.app.get(f'/accounts/{temp_id}/transactions?type=interest').data)
+        self.assertEqual([t['amount'] for t in history_data], [50.00])
+        self.assertEqual(reconcile_ledger(account_id=temp_id)['issues'], [])
+        self.assertEqual(get_mongo_db().accounts.find_one({'id': temp_id}).get('pending_batches'), [])
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 1050.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    def test_statement_pdf_cached_until_next_transaction(self):
+        """Tests GET /accounts/statement/pdf/<id> revalidates via ETag and changes after a new transaction."""
+        temp_id = self.create_test_account_with_transaction("Cached PDF Account", 10.00) # Balance is 110.00
+
+        first = self.app.get(f'/accounts/statement/pdf/{temp_id}')
+        etag = first.headers.get('ETag')
+        self.assertIsNotNone(etag)
+
+        repeat = self.app.get(f'/accounts/statement/pdf/{temp_id}')
+        self.assertEqual(repeat.headers.get('ETag'), etag)
+        self.assertEqual(repeat.data, first.data)
+
+        not_modified = self.app.get(f'/accounts/statement/pdf/{temp_id}', headers={'If-None-Match': etag})
+        self.assertEqual(not_modified.status_code, 304)
+
+        self.app.post('/accounts/deposit', json={'id': temp_id, 'amount': 1.00})
+        changed = self.app.get(f'/accounts/statement/pdf/{temp_id}')
+        self.assertNotEqual(changed.headers.get('ETag'), etag)
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 111.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    # =================================================================
+    # 13. ASYNC STATEMENT JOB TESTS
+    # =================================================================
+
+    def test_async_statement_pdf_job(self):
+        """Tests POST /accounts/statement/pdf/<id>?async=1 queues a job that GET /jobs/<id> reports and serves."""
+        temp_id = self.create_test_account_with_transaction("Async PDF Account", 10.00) # Balance is 110.00
+
+        response = self.app.post(f'/accounts/statement/pdf/{temp_id}?async=1&priority=1')
+        self.assertEqual(response.status_code, 202)
+        job = json.loads(response.data)
+        self.assertIn(job['status'], ('queued', 'done'))
+
+        # Poll until the render pool has finished
+        deadline = time.time() + 30
+        while job['status'] in ('queued', 'running') and time.time() < deadline:
+            time.sleep(0.1)
+            job = json.loads(self.app.get(f"/jobs/{job['job_id']}").data)
+        self.assertEqual(job['status'], 'done')
+
+        download = self.app.get(job['download_url'])
+        self.assertEqual(download.status_code, 200)
+        self.assertTrue(download.data.startswith(b'%PDF'))
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 110.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    def test_job_queue_survives_dead_render_process(self):
+        """Tests a render process that dies fails only its own job and the pool is replaced for the next ones."""
+        import os, threading
+        from util.jobQueue import JobQueue
+        finished, done = {}, threading.Event()
+
+        def on_start(job_id):
+            if job_id == 'bad-start':
+                raise RuntimeError('jobs collection unavailable')
+
+        def on_finish(job_id, error):
+            finished[job_id] = error
+            if len(finished) == 4:
+                done.set()
+
+        queue = JobQueue(on_start, on_finish, max_workers=1, mode="process")
+        queue.submit('crash', 0, os._exit, 1)
+        queue.submit('after-crash', 1, pow, 2, 10)
+        queue.submit('bad-start', 2, pow, 2, 10)
+        queue.submit('last', 3, pow, 2, 10)
+        self.assertTrue(done.wait(60), finished)
+        self.assertIsNotNone(finished['crash'])
+        self.assertIsNone(finished['after-crash'])
+        self.assertEqual(finished['bad-start'], 'jobs collection unavailable')
+        self.assertIsNone(finished['last'])
+        self.assertEqual(queue.stats()['running'], 0)
+
+    def test_async_statement_pdf_job_with_cache_disabled(self):
+        """Tests async jobs still deliver their PDF when the statement cache is off (PDF_CACHE_MAX_ENTRIES=0)."""
+        from resources import accountsResource
+        from util.statementPdf import StatementPdfCache
+        temp_id = self.create_test_account_with_transaction("Async No Cache Account", 10.00) # 110.00
+        original = accountsResource.pdf_cache
+        accountsResource.pdf_cache = StatementPdfCache(max_entries=0)
+        try:
+            job = json.loads(self.app.post(f'/accounts/statement/pdf/{temp_id}?async=1').data)
+            deadline = time.time() + 30
+            while job['status'] in ('queued', 'running') and time.time() < deadline:
+                time.sleep(0.1)
+                job = json.loads(self.app.get(f"/jobs/{job['job_id']}").data)
+            self.assertEqual(job['status'], 'done', job)
+            download = self.app.get(job['download_url'])
+            self.assertEqual(download.status_code, 200)
+            self.assertTrue(download.data.startswith(b'%PDF'))
+        finally:
+            accountsResource.pdf_cache = original
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 110.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    def test_statement_pdf_post_requires_async(self):
+        """Tests POST /accounts/statement/pdf/<id> without ?async=1 is rejected instead of queueing a job."""
+        response = self.app.post('/accounts/statement/pdf/1')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('async=1', json.loads(response.data)['message'])
+
+    def test_orphaned_job_is_failed(self):
+        """Tests a job left queued by a worker that stopped sending heartbeats is reported as failed."""
+        from datetime import datetime, timedelta, UTC
+        from resources.accountsResource import get_mongo_db
+        db = get_mongo_db()
+        created = datetime.now(UTC) - timedelta(hours=1)
+        db.job_workers.insert_one({"_id": "gone-host:1", "heartbeat_at": created})
+        db.jobs.insert_many([
+            {"_id": "orphaned-job", "type": "statement_pdf", "account_id": 1, "priority": 10,
+             "cache_key": "x", "owner": "gone-host:1", "status": "queued", "created_at": created},
+            {"_id": "live-job", "type": "statement_pdf", "account_id": 1, "priority": 10,
+             "cache_key": "y", "owner": "gone-host:1", "status": "queued", "created_at": datetime.now(UTC)}
+        ])
+        try:
+            job = json.loads(self.app.get('/jobs/orphaned-job').data)
+            self.assertEqual(job['status'], 'failed')
+            self.assertIn('submit it again', job['error'])
+            # Too recent to judge: its queue may simply not have reported in yet
+            self.assertEqual(json.loads(self.app.get('/jobs/live-job').data)['status'], 'queued')
+        finally:
+            db.jobs.delete_many({"_id": {"$in": ["orphaned-job", "live-job"]}})
+            db.job_workers.delete_one({"_id": "gone-host:1"})
+
+    def test_job_not_found(self):
+        """Tests GET /jobs/<id> for an unknown job."""
+        response = self.app.get('/jobs/unknown-job')
+        self.assertEqual(response.status_code, 404)
+
+    # =================================================================
+    # 14. BALANCE_AFTER / TRANSACTION MIGRATION TESTS
+    # =================================================================
+
+    def test_transactions_record_balance_after(self):
+        """Tests every posted transaction stores the balance it left, including same-timestamp batch items."""
+        temp_id = self.create_test_account_with_transaction("Balance After Account", 50.00) # 150.00
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 30.00}) # 120.00
+        self.app.post('/accounts/transactions/batch', json={'transactions': [
+            {'id': temp_id, 'type': 'Deposit', 'amount': 5.00},
+            {'id': temp_id, 'type': 'Deposit', 'amount': 6.00},
+            {'id': temp_id, 'type': 'Withdrawal', 'amount': 1.00}
+        ]}) # 125.00, 131.00, 130.00
+
+        # Batch items share a timestamp: the cursor's _id tiebreak must still page through all of them
+        balances = []
+        cursor = None
+        while True:
+            query = f'?limit=2&before={cursor}' if cursor else '?limit=2'
+            page = self.app.get(f'/accounts/{temp_id}/transactions{query}')
+            balances.extend(t['balance_after'] for t in json.loads(page.data))
+            cursor = page.headers.get('X-Next-Cursor')
+            if cursor is None:
+                break
+        self.assertEqual(balances, [130.00, 131.00, 125.00, 120.00, 150.00])
+
+        statement = json.loads(self.app.get(f'/accounts/statement/{temp_id}').data)
+        self.assertEqual(statement['opening_balance'], 50.00)
+        self.assertEqual([t['running_balance'] for t in statement['transactions']], [150.00, 120.00, 125.00, 131.00, 130.00])
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 130.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    def test_migrate_transactions_backfills_legacy_rows(self):
+        """Tests migrate_transactions converts string timestamps and chains balance_after from the current balance."""
+        temp_id = json.loads(self.app.post('/accounts', json={'name': 'Legacy Account', 'balance': 70.00}).data)['id']
+        db = get_mongo_db()
+        db.transactions.insert_many([
+            {'account_id': temp_id, 'type': 'Deposit', 'amount': 100.00, 'timestamp': '2024-01-05T10:00:00+00:00'},
+            {'account_id': temp_id, 'type': 'Withdrawal', 'amount': 30.00, 'timestamp': '2024-02-05T10:00:00+00:00'}
+        ])
+
+        self.assertEqual(migrate_transactions(account_id=temp_id), 2)
+        self.assertEqual(migrate_transactions(account_id=temp_id), 0)
+
+        history = json.loads(self.app.get(f'/accounts/{temp_id}/transactions').data)
+        self.assertEqual([t['balance_after'] for t in history], [70.00, 100.00])
+        self.assertEqual(history[0]['timestamp'], '2024-02-05T10:00:00+00:00')
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 70.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    # =================================================================
+    # 15. LEDGER RECONCILIATION TESTS
+    # =================================================================
+
+    def test_reconcile_ledger_reports_drift(self):
+        """Tests reconcile_ledger matches balances against the ledger and reports a tampered balance."""
+        temp_id = self.create_test_account_with_transaction("Reconcile Account", 20.00) # 120.00
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 5.00}) # 115.00
+
+        report = reconcile_ledger(account_id=temp_id)
+        self.assertEqual(report['accounts_checked'], 1)
+        self.assertEqual(report['transactions_checked'], 2)
+        self.assertEqual(report['issues'], [])
+
+        # Change the balance behind the ledger's back
+        get_mongo_db().accounts.update_one({'id': temp_id}, {'$inc': {'balance': 7.50}})
+        report = reconcile_ledger(account_id=temp_id)
+        self.assertEqual(report['accounts_with_issues'], 1)
+        entry = report['issues'][0]
+        self.assertEqual(entry['expected_balance'], 115.00)
+        self.assertEqual(entry['drift'], 7.50)
+        self.assertEqual(entry['issues'], ['balance_mismatch', 'balance_after_mismatch'])
+        json.dumps(report) # Machine-readable as-is
+
+        # Cleanup
+        get_mongo_db().accounts.update_one({'id': temp_id}, {'$inc': {'balance': -7.50}})
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 115.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    def test_reconcile_ledger_all_accounts_in_chunks(self):
+        """Tests a full run split into small parallel chunks checks every account."""
+        report = reconcile_ledger(chunk_size=2, workers=3)
+        self.assertEqual(report['accounts_checked'], get_mongo_db().accounts.count_documents({}))
+        self.assertGreaterEqual(report['chunks'], 1)
+
+    def test_reconcile_ledger_with_time_ordered_ids(self):
+        """Tests chunks follow the actual account ids, so a sparse 63-bit id does not explode the range count."""
+        from resources import accountsResource
+        sequences = get_mongo_db().sequences
+        original = accountsResource.account_ids
+        accountsResource.account_ids = TimeOrderedIdGenerator(WorkerIdLease(lambda: sequences, "test_reconcile_worker"))
+        try:
+            temp_id = self.create_test_account_with_transaction("Sparse Id Account", 10.00) # 110.00
+        finally:
+            accountsResource.account_ids = original
+            sequences.delete_many({'_id': {'$regex': '^test_reconcile_worker:'}})
+        self.assertGreater(temp_id, 2 ** 40)
+
+        accounts = get_mongo_db().accounts.count_documents({})
+        report = reconcile_ledger(chunk_size=2)
+        self.assertEqual(report['accounts_checked'], accounts)
+        self.assertEqual(report['chunks'], (accounts + 1) // 2)
+        self.assertEqual([entry for entry in report['issues'] if entry['account_id'] == temp_id], [])
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 110.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    # =================================================================
+    # 16. METRICS TESTS
+    # =================================================================
+
+    def test_metrics_endpoint_reports_routes(self):
+        """Tests GET /metrics exposes per-route latency histograms and request counts."""
+        self.app.get('/accounts/999999')
+        response = self.app.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        body = response.get_data(as_text=True)
+        self.assertIn('http_requests_total{method="GET",route="/accounts/<int:id>",status="404"', body)
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",route="/accounts/<int:id>"', body)
+        self.assertIn('db_calls_per_request_count{method="GET",route="/accounts/<int:id>"', body)
+
+    def test_metrics_are_summed_across_worker_processes(self):
+        """Tests /metrics in multiprocess mode reports every worker's counts, including exited workers."""
+        import os, tempfile
+        from util.requestMetrics import RequestMetrics, _state_path, _write_state, mark_process_dead
+        with tempfile.TemporaryDirectory() as directory:
+            other_worker = RequestMetrics()
+            other_worker.record("GET", "/accounts", 200, 0.02, 100, 1, 0.001)
+            other_worker.record("GET", "/accounts", 200, 0.03, 100, 1, 0.001)
+            _write_state(_state_path(directory, 4242), other_worker.snapshot())
+
+            this_worker = RequestMetrics(directory)
+            this_worker.record("GET", "/accounts", 200, 0.01, 100, 1, 0.001)
+            expected = 'http_requests_total{method="GET",route="/accounts",status="200"} 3'
+            self.assertIn(expected, this_worker.render())
+            self.assertIn('http_request_duration_seconds_count{method="GET",route="/accounts"} 3', this_worker.render())
+
+            # A recycled worker's counts stay in the totals
+            mark_process_dead(4242, directory)
+            self.assertFalse(os.path.exists(_state_path(directory, 4242)))
+            self.assertIn(expected, this_worker.render())
+
+    # =================================================================
+    # 17. IDEMPOTENCY TESTS
+    # =================================================================
+
+    def test_deposit_with_idempotency_key_is_applied_once(self):
+        """Tests a retried deposit with the same Idempotency-Key replays the stored response."""
+        temp_id = self.create_test_account_with_transaction("Idempotent Account", 0.00) # 100.00
+        headers = {'Idempotency-Key': f'deposit-{temp_id}'}
+
+        first = self.app.post('/accounts/deposit', json={'id': temp_id, 'amount': 25.00}, headers=headers)
+        self.assertEqual(first.status_code, 200)
+        retry = self.app.post('/accounts/deposit', json={'id': temp_id, 'amount': 25.00}, headers=headers)
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.headers.get('Idempotent-Replayed'), 'true')
+        self.assertEqual(json.loads(retry.data), json.loads(first.data))
+
+        account = json.loads(self.app.get(f'/accounts/{temp_id}').data)
+        self.assertEqual(account['balance'], 125.00)
+
+        # Same key, different body
+        mismatch = self.app.post('/accounts/deposit', json={'id': temp_id, 'amount': 30.00}, headers=headers)
+        self.assertEqual(mismatch.status_code, 422)
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 125.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    def test_withdraw_idempotency_replays_from_store(self):
+        """Tests a replay served from Mongo (another worker's LRU) does not touch the account."""
+        temp_id = self.create_test_account_with_transaction("Idempotent Withdraw Account", 0.00) # 100.00
+        headers = {'Idempotency-Key': f'withdraw-{temp_id}'}
+
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 40.00}, headers=headers)
+        idempotency.local.clear()
+        retry = self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 40.00}, headers=headers)
+        self.assertEqual(retry.headers.get('Idempotent-Replayed'), 'true')
+        self.assertEqual(json.loads(retry.data)['balance'], 60.00)
+        self.assertEqual(json.loads(self.app.get(f'/accounts/{temp_id}').data)['balance'], 60.00)
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 60.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    def test_idempotency_claim_of_dead_worker_is_taken_over(self):
+        """Tests a key left `processing` by a worker that died is reclaimed by a retry after its lease."""
+        import hashlib
+        from datetime import datetime, timedelta, UTC
+        temp_id = self.create_test_account_with_transaction("Idempotent Reclaim Account", 0.00) # 100.00
+        body = json.dumps({'id': temp_id, 'amount': 15.00})
+        key = f'reclaim-{temp_id}'
+        claims = get_mongo_db().idempotency_keys
+        claim = {
+            "_id": f"deposit:{key}",
+            "fingerprint": hashlib.sha256(body.encode()).hexdigest(),
+            "state": "processing",
+            "claim": "dead-worker",
+            "claimed_at": datetime.now(UTC),
+            "created_at": datetime.now(UTC)
+        }
+        claims.insert_one(claim)
+        post = lambda: self.app.post('/accounts/deposit', data=body, content_type='application/json',
+                                     headers={'Idempotency-Key': key})
+
+        # Within the lease the original request may still be running
+        self.assertEqual(post().status_code, 409)
+
+        claims.update_one({"_id": claim["_id"]}, {"$set": {"claimed_at": datetime.now(UTC) - timedelta(seconds=idempotency.lease + 1)}})
+        retry = post()
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(json.loads(retry.data)['balance'], 115.00)
+        self.assertEqual(claims.find_one({"_id": claim["_id"]})['state'], 'completed')
+        self.assertEqual(post().headers.get('Idempotent-Replayed'), 'true')
+        self.assertEqual(json.loads(self.app.get(f'/accounts/{temp_id}').data)['balance'], 115.00)
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 115.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    # =================================================================
+    # 18. ID ALLOCATION TESTS
+    # =================================================================
+
+    def test_block_id_allocator_reserves_ranges(self):
+        """Tests IDs come from reserved blocks: one sequence write per block, no duplicates."""
+        sequences = get_mongo_db().sequences
+        first = BlockIdAllocator(lambda: sequences, "test_block_ids", block_size=3)
+        second = BlockIdAllocator(lambda: sequences, "test_block_ids", block_size=3)
+
+        ids = [first.next_id() for _ in range(4)] + [second.next_id() for _ in range(2)]
+        self.assertEqual(ids[:3], [1, 2, 3])
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual(first.blocks_reserved, 2)
+        self.assertEqual(sequences.find_one({'_id': 'test_block_ids'})['sequence_value'], 9)
+        sequences.delete_one({'_id': 'test_block_ids'})
+
+    def test_time_ordered_ids_increase(self):
+        """Tests time-ordered IDs are positive 63-bit integers that increase and work in <int:id> routes."""
+        sequences = get_mongo_db().sequences
+        generator = TimeOrderedIdGenerator(WorkerIdLease(lambda: sequences, "test_time_worker"))
+        ids = [generator.next_id() for _ in range(5000)]
+        self.assertEqual(ids, sorted(set(ids)))
+        self.assertTrue(0 < ids[-1] < 2 ** 63)
+        self.assertEqual(self.app.get(f'/accounts/{ids[-1]}').status_code, 404)
+        sequences.delete_many({'_id': {'$regex': '^test_time_worker:'}})
+
+    def test_worker_id_leases_never_share_a_number(self):
+        """Tests live processes hold distinct worker numbers, a lapsed lease is reclaimed and its old holder moves off it."""
+        from datetime import datetime, timedelta, UTC
+        sequences = get_mongo_db().sequences
+        first = WorkerIdLease(lambda: sequences, "test_lease_worker", slots=2)
+        second = WorkerIdLease(lambda: sequences, "test_lease_worker", slots=2)
+        third = WorkerIdLease(lambda: sequences, "test_lease_worker", slots=2)
+        self.assertEqual({first.current(), second.current()}, {0, 1})
+        # No wraparound onto a live process's number
+        self.assertRaises(WorkerIdsExhaustedError, third.current)
+
+        # The first process stalls past its lease and the third takes its number
+        sequences.update_one({'_id': f'test_lease_worker:{first.current()}'},
+                             {'$set': {'expires_at': datetime.now(UTC) - timedelta(seconds=1)}})
+        self.assertEqual(third.current(), first.current())
+        first._renew_at = 0 # Renewal due: it finds its lease gone and cannot keep the number
+        self.assertRaises(WorkerIdsExhaustedError, first.current)
+        sequences.delete_many({'_id': {'$regex': '^test_lease_worker:'}})
+
+    # =================================================================
+    # 19. ACTIVITY FEED (SSE) TESTS
+    # =================================================================
+
+    def test_account_events_stream_pushes_transactions(self):
+        """Tests GET /accounts/<id>/events sends a snapshot, then pushes new transactions from the shared watcher."""
+        temp_id = self.create_test_account_with_transaction("Feed Account", 0.00) # 100.00
+        activityResource.feed.poll_interval = 0.05
+        activityResource.FEED_HEARTBEAT_SECONDS = 0.2
+
+        response = self.app.get(f'/accounts/{temp_id}/events', buffered=False)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        chunks = iter(response.response)
+        snapshot = next(chunks).decode()
+        self.assertIn('event: snapshot', snapshot)
+        self.assertIn('"balance": 100.0', snapshot)
+
+        self.app.post('/accounts/deposit', json={'id': temp_id, 'amount': 15.00})
+        events = []
+        deadline = time.time() + 10
+        while time.time() < deadline and not any('"amount": 15.0' in e for e in events):
+            events.append(next(chunks).decode())
+        pushed = [e for e in events if '"amount": 15.0' in e]
+        self.assertTrue(pushed, events)
+        self.assertIn('event: transaction', pushed[0])
+        self.assertIn('"balance": 115.0', pushed[0])
+
+        # Closing the stream unsubscribes it
+        response.close()
+        self.assertEqual(activityResource.feed.stats()['subscriptions'], 0)
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 115.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    def test_account_events_closed_before_first_chunk(self):
+        """Tests a stream closed before it is read leaves no subscription behind."""
+        temp_id = self.create_test_account_with_transaction("Feed Leave Account", 0.00) # 100.00
+        # The test client always reads the first chunk, so call the resource directly
+        with app.test_request_context(f'/accounts/{temp_id}/events'):
+            response = activityResource.AccountEventsResource().get(temp_id)
+        response.close()
+        self.assertEqual(activityResource.feed.stats()['subscriptions'], 0)
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 100.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    def test_activity_feed_parks_without_subscribers(self):
+        """Tests the watcher stops polling once the last subscriber leaves and resumes on the next subscribe."""
+        from util.activityFeed import ActivityFeed
+        from resources.accountsResource import format_account
+        temp_id = self.create_test_account_with_transaction("Feed Park Account", 0.00) # 100.00
+        feed = ActivityFeed(get_mongo_db, format_account, mode="poll", poll_interval=0.05)
+
+        def wait_until(condition):
+            deadline = time.time() + 10
+            while not condition() and time.time() < deadline:
+                time.sleep(0.02)
+            return condition()
+
+        feed.unsubscribe(feed.subscribe(temp_id))
+        self.assertTrue(wait_until(lambda: feed.stats()['parked']))
+
+        subscription = feed.subscribe(temp_id)
+        self.assertTrue(wait_until(lambda: not feed.stats()['parked']))
+        self.app.post('/accounts/deposit', json={'id': temp_id, 'amount': 5.00})
+        event = subscription.get(timeout=10)
+        while event is not None and event['amount'] != 5.00:
+            event = subscription.get(timeout=10)
+        self.assertIsNotNone(event)
+        self.assertEqual(event['balance'], 105.00)
+        feed.unsubscribe(subscription)
+        self.assertTrue(wait_until(lambda: feed.stats()['parked']))
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 105.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    def test_account_events_not_found(self):
+        """Tests GET /accounts/<id>/events for an unknown account."""
+        response = self.app.get('/accounts/999999/events')
+        self.assertEqual(response.status_code, 404)
+
+    # =================================================================
+    # 20. BULK RESPONSE FORMAT TESTS
+    # =================================================================
+
+    def test_get_accounts_ndjson(self):
+        """Tests GET /accounts with Accept: application/x-ndjson streams one account per line with the page cursor."""
+        response = self.app.get('/accounts?limit=2', headers={'Accept': 'application/x-ndjson'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(response.headers.get('X-Next-Cursor'), str(rows[-1]['id']))
+
+        # Same page as the JSON representation
+        plain = json.loads(self.app.get('/accounts?limit=2').data)
+        self.assertEqual(rows, plain)
+
+    def test_transaction_history_msgpack(self):
+        """Tests GET /accounts/<id>/transactions with Accept: application/msgpack."""
+        import msgpack
+        temp_id = self.create_test_account_with_transaction("Msgpack Account", 0.00) # 100.00
+        self.app.post('/accounts/deposit', json={'id': temp_id, 'amount': 5.00})
+
+        response = self.app.get(f'/accounts/{temp_id}/transactions', headers={'Accept': 'application/msgpack'})
+        self.assertEqual(response.mimetype, 'application/msgpack')
+        rows = list(msgpack.Unpacker(io.BytesIO(response.data)))
+        self.assertEqual([(t['amount'], t['balance_after']) for t in rows], [(5.00, 105.00), (100.00, 100.00)])
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 105.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    def test_statement_arrow_stream(self):
+        """Tests GET /accounts/statement/<id> as an Arrow IPC stream with the summary in the schema metadata."""
+        import pyarrow as pa
+        temp_id = self.create_test_account_with_transaction("Arrow Account", 50.00) # 150.00
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 20.00})
+
+        response = self.app.get(f'/accounts/statement/{temp_id}', headers={'Accept': 'application/vnd.apache.arrow.stream'})
+        self.assertEqual(response.mimetype, 'application/vnd.apache.arrow.stream')
+        table = pa.ipc.open_stream(response.data).read_all()
+        self.assertEqual(table.column('running_balance').to_pylist(), [150.00, 130.00])
+        self.assertEqual(str(table.schema.field('timestamp').type), 'timestamp[ms, tz=UTC]')
+        header = json.loads(table.schema.metadata[b'header'])
+        self.assertEqual(header['opening_balance'], 50.00)
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 130.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    def test_unsupported_accept_is_406(self):
+        """Tests an Accept header naming no available format."""
+        response = self.app.get('/accounts', headers={'Accept': 'text/csv'})
+        self.assertEqual(response.status_code, 406)
+
+    # =================================================================
+    # 21. TRANSACTION ARCHIVE TESTS
+    # =================================================================
+
+    def test_archived_transactions_stay_readable(self):
+        """Tests history, statement and reconciliation read the archive and hot tiers as one ledger."""
+        temp_id = self.create_test_account_with_transaction("Archive Account", 0.00) # Deposit 100
+        for amount in (10.00, 20.00):
+            self.app.post('/accounts/deposit', json={'id': temp_id, 'amount': amount})
+
+        summary = archive_transactions(account_id=temp_id, before=datetime.now(UTC) + timedelta(seconds=1))
+        self.assertEqual(summary['old_transactions'], 3)
+        db = get_mongo_db()
+        self.assertEqual(db.transactions.count_documents({'account_id': temp_id}), 0)
+        self.assertEqual(get_archive_collection(db).count_documents({'account_id': temp_id}), 3)
+        self.app.post('/accounts/deposit', json={'id': temp_id, 'amount': 30.00}) # Hot tier
+
+        # Pages run from the hot tier into the archive
+        first_page = self.app.get(f'/accounts/{temp_id}/transactions?limit=2')
+        self.assertEqual([t['amount'] for t in json.loads(first_page.data)], [30.00, 20.00])
+        cursor = first_page.headers.get('X-Next-Cursor')
+        second_page = self.app.get(f'/accounts/{temp_id}/transactions?limit=2&before={cursor}')
+        self.assertEqual([t['amount'] for t in json.loads(second_page.data)], [10.00, 100.00])
+        self.assertIsNone(second_page.headers.get('X-Next-Cursor'))
+
+        statement = json.loads(self.app.get(f'/accounts/statement/{temp_id}?from=2000-01-01').data)
+        self.assertEqual([t['running_balance'] for t in statement['transactions']], [100.00, 110.00, 130.00, 160.00])
+        self.assertAlmostEqual(statement['closing_balance'], 160.00)
+
+        report = reconcile_ledger(account_id=temp_id)
+        self.assertEqual(report['transactions_checked'], 4)
+        self.assertEqual(report['issues'], [])
+
+        # Cleanup
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 160.00})
+        self.app.delete(f'/accounts/{temp_id}')
+
+    def test_closed_and_deleted_accounts_are_archived(self):
+        """Tests Closed accounts are archived whatever their age and deletion keeps the history."""
+        temp_id = self.create_test_account_with_transaction("Closing Account", 0.00) # Deposit 100
+        self.app.post('/accounts/withdraw', json={'id': temp_id, 'amount': 100.00})
+        self.app.put(f'/accounts/close/{temp_id}')
+
+        summary = archive_transactions(account_id=temp_id)
+        self.assertEqual(summary['closed_account_transactions'], 2)
+        statement = json.loads(self.app.get(f'/accounts/statement/{temp_id}').data)
+        self.assertEqual([t['running_balance'] for t in statement['transactions']], [100.00, 0.00])
+
+        response = self.app.delete(f'/accounts/{temp_id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(get_archive_collection(get_mongo_db()).count_documents({'account_id': temp_id}), 2)
+        # Retained history of a deleted account is not an orphan
+        self.assertEqual(reconcile_ledger(account_id=temp_id)['issues'], [])
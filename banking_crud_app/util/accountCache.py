@@ -0,0 +1,161 @@
+from collections import OrderedDict
+import copy
+import os
+import threading
+import time
+
+# ============================================
+# Cache Configuration
+# ============================================
+ACCOUNT_CACHE_MAX_ENTRIES = int(os.environ.get("ACCOUNT_CACHE_MAX_ENTRIES", 10000))
+# Writes in other workers are only seen after this many seconds, so keep it short
+ACCOUNT_CACHE_TTL_SECONDS = float(os.environ.get("ACCOUNT_CACHE_TTL_SECONDS", 5))
+# "local" (per-process LRU only) or "shared" (LRU in front of a shared backend)
+ACCOUNT_CACHE_BACKEND = os.environ.get("ACCOUNT_CACHE_BACKEND", "local")
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class InMemorySharedBackend:
+    """
+    Local stand-in for a shared cache server (Redis/memcached style get/set/delete with TTL).
+    Swap in a client with the same three methods to share entries between workers.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                self._entries.pop(key, None)
+                return None
+            return entry[0]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class AccountCache:
+    """
+    Read-through cache for account documents keyed by account id.
+
+    Lookups go to the local LRU, then the optional shared backend, then the loader.
+    Mutating code paths call `invalidate` so the next read reloads from Mongo.
+    Cached documents are copied on the way in and out, so callers may mutate them freely.
+    """
+
+    def __init__(self, max_entries=ACCOUNT_CACHE_MAX_ENTRIES, ttl=ACCOUNT_CACHE_TTL_SECONDS, shared=None):
+        self.local = LRUCache(max_entries, ttl)
+        self.shared = shared
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(self, account_id, loader):
+        account = self.local.get(account_id)
+        if account is not None:
+            self._count("hits")
+            return copy.deepcopy(account)
+
+        if self.shared is not None:
+            account = self.shared.get(account_id)
+            if account is not None:
+                self._count("shared_hits")
+                self.local.set(account_id, account)
+                return copy.deepcopy(account)
+
+        self._count("misses")
+        account = loader()
+        if account is not None:
+            account = copy.deepcopy(account)
+            self.local.set(account_id, account)
+            if self.shared is not None:
+                self.shared.set(account_id, account, self.ttl)
+            account = copy.deepcopy(account)
+        return account
+
+    def invalidate(self, *account_ids):
+        for account_id in account_ids:
+            self.local.delete(account_id)
+            if self.shared is not None:
+                self.shared.delete(account_id)
+            self._count("invalidations")
+
+    def clear(self):
+        self.local.clear()
+
+    def stats(self):
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "backend": "shared" if self.shared is not None else "local",
+            "entries": len(self.local),
+            "max_entries": self.local.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "evictions": self.local.evictions,
+        }
+
+
+def build_account_cache():
+    """Creates the account cache for the configured backend."""
+    shared = InMemorySharedBackend() if ACCOUNT_CACHE_BACKEND == "shared" else None
+    return AccountCache(shared=shared)
@@ -0,0 +1,229 @@
+from bson.objectid import ObjectId
+from collections import deque
+from datetime import datetime, timedelta, UTC
+import os
+import queue
+import threading
+import time
+
+# ============================================
+# Activity Feed Configuration
+# ============================================
+# "auto" (change streams, falling back to polling on a standalone mongod), "changestream" or "poll"
+FEED_MODE = os.environ.get("FEED_MODE", "auto")
+FEED_POLL_INTERVAL_SECONDS = float(os.environ.get("FEED_POLL_INTERVAL_SECONDS", 1.0))
+# ObjectIds from different workers are only roughly ordered, so each poll re-reads this window
+FEED_POLL_OVERLAP_SECONDS = float(os.environ.get("FEED_POLL_OVERLAP_SECONDS", 5.0))
+FEED_SUBSCRIBER_QUEUE_SIZE = int(os.environ.get("FEED_SUBSCRIBER_QUEUE_SIZE", 100))
+
+
+class Subscription:
+    """One subscriber's bounded queue. A slow reader drops its oldest events and is told to resync."""
+
+    def __init__(self, account_id, max_size=FEED_SUBSCRIBER_QUEUE_SIZE):
+        self.account_id = account_id
+        self.events = queue.Queue(maxsize=max_size)
+        self.dropped = 0
+
+    def put(self, event):
+        while True:
+            try:
+                self.events.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.events.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout):
+        """Next event, or None after `timeout` seconds (time for a keep-alive)."""
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class ActivityFeed:
+    """
+    Fans account activity out to any number of subscribers from a single upstream watcher
+    per process, started with the first subscription. While nobody is subscribed the watcher
+    is parked (no polling, no open change stream) until the next subscription wakes it.
+
+    The watcher follows a database change stream on `accounts` and `transactions` when the
+    deployment supports it (replica set / sharded cluster). Otherwise it tails
+    `transactions`, which is append-only, by `_id`, so balance changes are still pushed;
+    account updates (block/close/rename) are only seen with change streams.
+    Events are dicts: {"event": "transaction" | "account", "id": ..., "account_id": ..., ...}.
+    """
+
+    def __init__(self, get_db, format_account, mode=FEED_MODE, poll_interval=FEED_POLL_INTERVAL_SECONDS):
+        self.get_db = get_db
+        self.format_account = format_account
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.active_mode = None
+        self.events_published = 0
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._subscribed = threading.Condition(self._lock)
+        self.parked = False
+        self._thread = None
+        self._pid = None
+        self._resume_token = None
+
+    # --- Subscribers ---
+
+    def subscribe(self, account_id):
+        subscription = Subscription(account_id)
+        with self._lock:
+            self._subscribers.setdefault(account_id, set()).add(subscription)
+            self._ensure_watcher()
+            self._subscribed.notify_all()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.account_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.account_id]
+
+    def publish(self, account_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(account_id, ()))
+        for subscription in subscribers:
+            subscription.put(event)
+        if subscribers:
+            self.events_published += 1
+
+    def _has_subscribers(self, account_id):
+        return account_id in self._subscribers
+
+    # --- Upstream watcher ---
+
+    def _ensure_watcher(self):
+        # Called with the lock held; a forked worker starts its own watcher
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._watch, name="activity-feed", daemon=True)
+        self._thread.start()
+
+    def _wait_for_subscribers(self):
+        """Blocks the watcher while nobody is subscribed."""
+        with self._lock:
+            if self._subscribers:
+                return
+            self.parked = True
+            while not self._subscribers:
+                self._subscribed.wait()
+            self.parked = False
+        # Whatever happened while parked had no audience, and an old token may have left the oplog
+        self._resume_token = None
+
+    def _watch(self):
+        while True:
+            self._wait_for_subscribers()
+            try:
+                if self.mode in ("auto", "changestream"):
+                    try:
+                        stream = self._open_change_stream()
+                    except Exception:
+                        if self.mode == "changestream":
+                            raise
+                        self.mode = "poll"
+                        continue
+                    self.active_mode = "changestream"
+                    self._follow_change_stream(stream)
+                else:
+                    self.active_mode = "poll"
+                    self._poll_transactions()
+            except Exception as e:
+                print(f"Activity feed watcher error ({self.active_mode}): {e}; restarting")
+                time.sleep(self.poll_interval)
+
+    def _open_change_stream(self):
+        return self.get_db().watch(
+            [{"$match": {"ns.coll": {"$in": ["accounts", "transactions"]}}}],
+            full_document="updateLookup",
+            resume_after=self._resume_token
+        )
+
+    def _follow_change_stream(self, stream):
+        with stream:
+            while stream.alive:
+                # try_next() returns None after each empty await, so an idle feed can park
+                change = stream.try_next()
+                if change is None:
+                    if not self._subscribers:
+                        return
+                    continue
+                self._resume_token = change["_id"]
+                collection = change["ns"]["coll"]
+                document = change.get("fullDocument")
+                if collection == "transactions" and change["operationType"] == "insert":
+                    self._publish_transaction(document)
+                elif collection == "accounts" and document is not None:
+                    if self._has_subscribers(document.get("id")):
+                        document.pop("_id", None)
+                        self.publish(document["id"], {
+                            "event": "account",
+                            "id": str(change["_id"].get("_data", "")),
+                            "account_id": document["id"],
+                            "account": self.format_account(document)
+                        })
+
+    def _poll_transactions(self):
+        # The first poll also replays the last overlap window: events carry absolute balances,
+        # so a replayed one is harmless, while skipping it could lose a just-posted transaction
+        seen = set()
+        recent = deque()
+        since = datetime.now(UTC)
+        while self._subscribers:
+            cutoff = ObjectId.from_datetime(since - timedelta(seconds=FEED_POLL_OVERLAP_SECONDS))
+            started = datetime.now(UTC)
+            cursor = self.get_db().transactions.find({"_id": {"$gt": cutoff}}).sort("_id", 1)
+            for transaction in cursor:
+                if transaction["_id"] in seen:
+                    continue
+                seen.add(transaction["_id"])
+                recent.append(transaction["_id"])
+                self._publish_transaction(transaction)
+            # Forget ids that have left the overlap window
+            while recent and recent[0].generation_time < started - timedelta(seconds=2 * FEED_POLL_OVERLAP_SECONDS):
+                seen.discard(recent.popleft())
+            since = started
+            time.sleep(self.poll_interval)
+
+    def _publish_transaction(self, transaction):
+        account_id = transaction.get("account_id")
+        if not self._has_subscribers(account_id):
+            return
+        timestamp = transaction.get("timestamp")
+        if isinstance(timestamp, datetime):
+            timestamp = (timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=UTC)).isoformat()
+        self.publish(account_id, {
+            "event": "transaction",
+            "id": str(transaction["_id"]),
+            "account_id": account_id,
+            "type": transaction.get("type"),
+            "amount": transaction.get("amount"),
+            "balance": transaction.get("balance_after"),
+            "timestamp": timestamp
+        })
+
+    def stats(self):
+        with self._lock:
+            subscriptions = sum(len(subscribers) for subscribers in self._subscribers.values())
+            accounts = len(self._subscribers)
+        return {
+            "mode": self.active_mode,
+            "watching": self._thread is not None and self._thread.is_alive() and self._pid == os.getpid(),
+            "parked": self.parked,
+            "subscribed_accounts": accounts,
+            "subscriptions": subscriptions,
+            "events_published": self.events_published
+        }
@@ -0,0 +1,192 @@
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime, timedelta, UTC
+import os
+import random
+import threading
+import time
+import uuid
+
+# ============================================
+# ID Allocation Configuration
+# ============================================
+# "block" (integers from reserved ranges of the shared sequence) or "time" (time-ordered 63-bit)
+ACCOUNT_ID_SCHEME = os.environ.get("ACCOUNT_ID_SCHEME", "block")
+ACCOUNT_ID_BLOCK_SIZE = int(os.environ.get("ACCOUNT_ID_BLOCK_SIZE", 1000))
+
+# Time-ordered layout: 41 bits of milliseconds since ID_EPOCH_MS | 10 bits worker | 12 bits sequence
+ID_EPOCH_MS = 1704067200000 # 2024-01-01T00:00:00Z
+WORKER_ID_BITS = 10
+SEQUENCE_BITS = 12
+# A worker number is held by a lease, renewed while the process generates IDs; once a lease
+# runs out (its process died) the number can be claimed again. Hosts' clocks must agree to
+# well within this
+WORKER_ID_LEASE_SECONDS = int(os.environ.get("WORKER_ID_LEASE_SECONDS", 300))
+
+
+class WorkerIdsExhaustedError(RuntimeError):
+    """Every worker number of the time-ordered layout is leased by a live process."""
+
+
+class BlockIdAllocator:
+    """
+    Hands out integer IDs from ranges reserved on a shared sequence document, so the
+    document is written once per `block_size` IDs instead of once per ID.
+
+    Each process reserves its own blocks (a forked worker never reuses its parent's), so IDs
+    are unique but only roughly increasing across workers, and an unfinished block leaves a
+    gap when the process exits.
+    """
+
+    def __init__(self, get_collection, name, block_size=ACCOUNT_ID_BLOCK_SIZE):
+        self.get_collection = get_collection
+        self.name = name
+        self.block_size = block_size
+        self._next = 0
+        self._end = 0 # Exclusive
+        self._pid = None
+        self._lock = threading.Lock()
+        self.blocks_reserved = 0
+
+    def _reserve_block(self):
+        sequence = self.get_collection().find_one_and_update(
+            {'_id': self.name},
+            {'$inc': {'sequence_value': self.block_size}},
+            return_document=True,
+            upsert=True
+        )
+        self._end = sequence['sequence_value'] + 1
+        self._next = self._end - self.block_size
+        self._pid = os.getpid()
+        self.blocks_reserved += 1
+
+    def next_id(self):
+        with self._lock:
+            if self._next >= self._end or self._pid != os.getpid():
+                self._reserve_block()
+            value = self._next
+            self._next += 1
+            return value
+
+    def stats(self):
+        return {
+            "scheme": "block",
+            "block_size": self.block_size,
+            "remaining_in_block": max(0, self._end - self._next) if self._pid == os.getpid() else 0,
+            "blocks_reserved": self.blocks_reserved
+        }
+
+
+class WorkerIdLease:
+    """
+    Leases one of the `slots` worker numbers of the time-ordered layout to this process,
+    through one claim document per number (`{_id: "<name>:<n>", holder, expires_at}`), so no
+    two live processes ever share a number. `current()` renews the lease at half its length
+    and claims a new number if the old one was lost (e.g. the process was idle past expiry
+    and another process took it). Each forked process claims its own.
+    """
+
+    def __init__(self, get_collection, name, lease_seconds=WORKER_ID_LEASE_SECONDS, slots=1 << WORKER_ID_BITS):
+        self.get_collection = get_collection
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self.slots = slots
+        self._slot = None
+        self._holder = None
+        self._renew_at = 0.0
+        self._pid = None
+        self._lock = threading.Lock()
+        self.leases_claimed = 0
+
+    def _expiry(self):
+        return datetime.now(UTC) + timedelta(seconds=self.lease_seconds)
+
+    def _claim(self):
+        holder = uuid.uuid4().hex
+        # Random starting point: processes starting together rarely contend for the same number
+        start = random.randrange(self.slots)
+        for offset in range(self.slots):
+            slot = (start + offset) % self.slots
+            try:
+                # Matches a free (expired) number; for a held one the upsert collides on _id
+                self.get_collection().find_one_and_update(
+                    {'_id': f"{self.name}:{slot}", 'expires_at': {'$lt': datetime.now(UTC)}},
+                    {'$set': {'holder': holder, 'expires_at': self._expiry()}},
+                    upsert=True
+                )
+            except DuplicateKeyError:
+                continue
+            self._slot, self._holder, self._pid = slot, holder, os.getpid()
+            self.leases_claimed += 1
+            return
+        raise WorkerIdsExhaustedError(f"All {self.slots} worker numbers for {self.name} are leased")
+
+    def _renew(self):
+        result = self.get_collection().update_one(
+            {'_id': f"{self.name}:{self._slot}", 'holder': self._holder},
+            {'$set': {'expires_at': self._expiry()}}
+        )
+        return result.matched_count == 1
+
+    def current(self):
+        """This process's worker number, claimed or renewed first when due."""
+        with self._lock:
+            if self._pid == os.getpid() and time.monotonic() < self._renew_at:
+                return self._slot
+            renew_at = time.monotonic() + self.lease_seconds / 2
+            if self._pid != os.getpid() or not self._renew():
+                self._claim()
+            self._renew_at = renew_at
+            return self._slot
+
+
+class TimeOrderedIdGenerator:
+    """
+    Snowflake-style 63-bit IDs (always positive, so they still match `<int:id>` routes):
+    milliseconds since ID_EPOCH_MS, a worker number and a per-millisecond sequence.
+    IDs sort by creation time and need no shared write apart from renewing the worker
+    number leased from `worker_ids` (a WorkerIdLease), every few minutes per process.
+    Note that they exceed 2**53, so JavaScript clients should treat them as strings.
+    """
+
+    def __init__(self, worker_ids):
+        self.worker_ids = worker_ids
+        self._worker = None
+        self._pid = None
+        self._last_ms = -1
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def next_id(self):
+        with self._lock:
+            worker = self.worker_ids.current()
+            if self._pid != os.getpid() or worker != self._worker:
+                self._worker = worker
+                self._pid = os.getpid()
+                self._last_ms = -1
+
+            now_ms = int(time.time() * 1000) - ID_EPOCH_MS
+            if now_ms < self._last_ms:
+                # Clock stepped backwards: keep issuing from the last timestamp
+                now_ms = self._last_ms
+            if now_ms == self._last_ms:
+                self._sequence = (self._sequence + 1) & ((1 << SEQUENCE_BITS) - 1)
+                if self._sequence == 0:
+                    # 4096 IDs in this millisecond: wait for the next one
+                    while now_ms <= self._last_ms:
+                        now_ms = int(time.time() * 1000) - ID_EPOCH_MS
+            else:
+                self._sequence = 0
+            self._last_ms = now_ms
+            return (now_ms << (WORKER_ID_BITS + SEQUENCE_BITS)) | (self._worker << SEQUENCE_BITS) | self._sequence
+
+    def stats(self):
+        return {"scheme": "time", "worker": self._worker if self._pid == os.getpid() else None}
+
+
+def build_id_generator(get_collection, name, scheme=ACCOUNT_ID_SCHEME, block_size=ACCOUNT_ID_BLOCK_SIZE):
+    """ID generator for `name` using the configured scheme; both draw on the `get_collection()` sequences."""
+    if scheme == "time":
+        return TimeOrderedIdGenerator(WorkerIdLease(get_collection, f"{name}_worker"))
+    if scheme != "block":
+        raise ValueError(f"Unknown ACCOUNT_ID_SCHEME: {scheme} (expected 'block' or 'time')")
+    return BlockIdAllocator(get_collection, name, block_size)
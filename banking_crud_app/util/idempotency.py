@@ -0,0 +1,158 @@
+from flask import request
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime, timedelta, UTC
+from util.accountCache import LRUCache
+import functools
+import hashlib
+import os
+import threading
+import uuid
+
+# ============================================
+# Idempotency Configuration
+# ============================================
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", 86400))
+IDEMPOTENCY_LRU_ENTRIES = int(os.environ.get("IDEMPOTENCY_LRU_ENTRIES", 10000))
+# A claim still `processing` after this long belongs to a worker that died mid-request, and a
+# retry may take it over. Keep it above gunicorn's --timeout (120s), which kills stuck workers
+IDEMPOTENCY_LEASE_SECONDS = int(os.environ.get("IDEMPOTENCY_LEASE_SECONDS", 180))
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+class IdempotencyStore:
+    """
+    Remembers the response of every request sent with an `Idempotency-Key` header, so a
+    client retrying after a timeout gets the original response back instead of posting twice.
+
+    Keys live in a Mongo collection whose TTL index (on `created_at`) expires them after
+    IDEMPOTENCY_TTL_SECONDS, so every worker sees them; completed responses are also kept in
+    a per-process LRU so hot retries never reach Mongo. A key is claimed with an insert
+    before the request runs: a concurrent duplicate gets 409 instead of running twice, and
+    reusing a key with a different body gets 422. The claim is a lease: once it is older than
+    `lease` seconds a retry takes it over and runs the request.
+    """
+
+    def __init__(self, get_collection, ttl=IDEMPOTENCY_TTL_SECONDS, max_entries=IDEMPOTENCY_LRU_ENTRIES, lease=IDEMPOTENCY_LEASE_SECONDS):
+        self.get_collection = get_collection
+        self.ttl = ttl
+        self.lease = lease
+        self.local = LRUCache(max_entries, ttl)
+        self._lock = threading.Lock()
+        self.replays = 0
+        self.takeovers = 0
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def ensure_indexes(self, collection):
+        collection.create_index("created_at", expireAfterSeconds=self.ttl)
+
+    @staticmethod
+    def _fingerprint():
+        return hashlib.sha256(request.get_data()).hexdigest()
+
+    def _replay(self, record, fingerprint):
+        if record["fingerprint"] != fingerprint:
+            return {'message': f'{IDEMPOTENCY_HEADER} was already used with a different request body'}, 422
+        if record.get("state") != "completed":
+            return {'message': f'A request with this {IDEMPOTENCY_HEADER} is still being processed'}, 409
+        self._count("replays")
+        return record["body"], record["status"], {"Idempotent-Replayed": "true"}
+
+    def _claim(self, collection, record_id, fingerprint):
+        """
+        Claims the key for this request. Returns (claim token, None) when the request should
+        run, or (None, response) when the stored record answers it instead.
+        """
+        claim = uuid.uuid4().hex
+        now = datetime.now(UTC)
+        try:
+            collection.insert_one({
+                "_id": record_id,
+                "fingerprint": fingerprint,
+                "state": "processing",
+                "claim": claim,
+                "claimed_at": now,
+                "created_at": now
+            })
+            return claim, None
+        except DuplicateKeyError:
+            pass
+
+        # Abandoned claim: the first retry to move its lease forward runs the request
+        taken = collection.update_one(
+            {
+                "_id": record_id,
+                "state": "processing",
+                "fingerprint": fingerprint,
+                "claimed_at": {"$lt": now - timedelta(seconds=self.lease)}
+            },
+            {"$set": {"claim": claim, "claimed_at": now}}
+        )
+        if taken.modified_count:
+            self._count("takeovers")
+            return claim, None
+
+        record = collection.find_one({"_id": record_id})
+        if record is None:
+            # Expired between the insert and the read: treat it as a new key
+            return self._claim(collection, record_id, fingerprint)
+        if record.get("state") == "completed":
+            self.local.set(record_id, record)
+        return None, self._replay(record, fingerprint)
+
+    def idempotent(self, scope):
+        """Decorator for a Resource method whose response should be replayed for a repeated key."""
+        def decorator(method):
+            @functools.wraps(method)
+            def wrapper(*args, **kwargs):
+                key = request.headers.get(IDEMPOTENCY_HEADER)
+                if not key:
+                    return method(*args, **kwargs)
+                if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+                    return {'message': f'{IDEMPOTENCY_HEADER} must be at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters'}, 400
+
+                record_id = f"{scope}:{key}"
+                fingerprint = self._fingerprint()
+                cached = self.local.get(record_id)
+                if cached is not None:
+                    return self._replay(cached, fingerprint)
+
+                collection = self.get_collection()
+                claim, replayed = self._claim(collection, record_id, fingerprint)
+                if claim is None:
+                    return replayed
+
+                # Only the current holder of the claim may release or complete it
+                claimed = {"_id": record_id, "state": "processing", "claim": claim}
+                try:
+                    response = method(*args, **kwargs)
+                except Exception:
+                    collection.delete_one(claimed)
+                    raise
+
+                body, status = (response[0], response[1]) if isinstance(response, tuple) else (response, 200)
+                if status >= 500:
+                    # Not a final answer: let the client retry with the same key
+                    collection.delete_one(claimed)
+                    return response
+                record = {"_id": record_id, "fingerprint": fingerprint, "state": "completed", "body": body, "status": status}
+                collection.update_one(
+                    claimed,
+                    {"$set": {"state": "completed", "body": body, "status": status}}
+                )
+                self.local.set(record_id, record)
+                return response
+            return wrapper
+        return decorator
+
+    def stats(self):
+        return {
+            "local_entries": len(self.local),
+            "replays": self.replays,
+            "takeovers": self.takeovers,
+            "ttl_seconds": self.ttl,
+            "lease_seconds": self.lease
+        }
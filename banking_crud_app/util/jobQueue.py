@@ -0,0 +1,158 @@
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+import heapq
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+
+# ============================================
+# Job Queue Configuration
+# ============================================
+JOB_MAX_WORKERS = int(os.environ.get("JOB_MAX_WORKERS", 1)) # Concurrent renders per gunicorn worker
+JOB_MAX_PENDING = int(os.environ.get("JOB_MAX_PENDING", 100)) # Queued jobs before new ones are refused
+JOB_WORKER_NICENESS = int(os.environ.get("JOB_WORKER_NICENESS", 10)) # Lower CPU priority than request handling
+# "process" renders in a separate process pool; "thread" keeps everything in-process (development/tests)
+JOB_WORKER_MODE = os.environ.get("JOB_WORKER_MODE", "process")
+JOB_HEARTBEAT_SECONDS = float(os.environ.get("JOB_HEARTBEAT_SECONDS", 15)) # How often a live queue reports in
+
+
+class QueueFullError(Exception):
+    pass
+
+
+def _lower_priority():
+    """Process pool initializer: background renders yield the CPU to the request-serving workers."""
+    try:
+        os.nice(JOB_WORKER_NICENESS)
+    except (AttributeError, OSError):
+        pass
+
+
+class JobQueue:
+    """
+    Bounded, prioritised queue in front of a local worker pool.
+
+    At most `max_workers` jobs run at once and at most `max_pending` wait; lower `priority`
+    values run first (FIFO within a priority). `on_start(job_id)` and
+    `on_finish(job_id, error)` are called from the dispatcher so callers can persist job state,
+    and `heartbeat()` every `heartbeat_interval` seconds while the queue is alive, so jobs
+    left behind by a worker that died can be told apart from ones still waiting.
+    The pool is created lazily in the process that first submits, so it is never inherited
+    across a fork, and is replaced if a render process dies (which breaks a process pool).
+    """
+
+    def __init__(self, on_start, on_finish, max_workers=JOB_MAX_WORKERS, max_pending=JOB_MAX_PENDING,
+                 mode=JOB_WORKER_MODE, heartbeat=None, heartbeat_interval=JOB_HEARTBEAT_SECONDS):
+        self.on_start = on_start
+        self.on_finish = on_finish
+        self.heartbeat = heartbeat
+        self.heartbeat_interval = heartbeat_interval
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.mode = mode
+        self._heap = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._running = 0
+        self._executor = None
+        self._dispatcher = None
+        self._pid = None
+
+    def _new_executor(self):
+        if self.mode == "thread":
+            return ThreadPoolExecutor(max_workers=self.max_workers)
+        # spawn: the render processes never inherit this worker's sockets or threads
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_lower_priority
+        )
+
+    def _replace_broken_executor(self, broken):
+        """Swaps in a fresh pool after a render process died; every later submit to `broken` would fail."""
+        with self._condition:
+            if self._executor is not broken:
+                return # Already replaced
+            self._executor = self._new_executor()
+        broken.shutdown(wait=False)
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        self._executor = self._new_executor()
+        self._heap = []
+        self._running = 0
+        self._dispatcher = threading.Thread(target=self._dispatch, name="job-dispatcher", daemon=True)
+        self._dispatcher.start()
+        self._pid = os.getpid()
+
+    def submit(self, job_id, priority, fn, *args):
+        """Queues `fn(*args)` to run in the pool. Raises QueueFullError when the queue is at capacity."""
+        with self._condition:
+            self._ensure_started()
+            if len(self._heap) >= self.max_pending:
+                raise QueueFullError(f"Job queue is full ({self.max_pending} pending jobs)")
+            heapq.heappush(self._heap, (priority, next(self._sequence), job_id, fn, args))
+            self._condition.notify()
+
+    def stats(self):
+        with self._condition:
+            return {"pending": len(self._heap), "running": self._running, "max_workers": self.max_workers}
+
+    def _beat(self):
+        try:
+            self.heartbeat()
+        except Exception as e:
+            print(f"Job queue heartbeat failed: {e}")
+
+    def _dispatch(self):
+        next_beat = time.monotonic()
+        while True:
+            if self.heartbeat is not None and time.monotonic() >= next_beat:
+                self._beat()
+                next_beat = time.monotonic() + self.heartbeat_interval
+            with self._condition:
+                if not self._heap or self._running >= self.max_workers:
+                    timeout = None if self.heartbeat is None else max(0.0, next_beat - time.monotonic())
+                    self._condition.wait(timeout)
+                    continue
+                _, _, job_id, fn, args = heapq.heappop(self._heap)
+                self._running += 1
+
+            # Nothing may escape this loop: a dead dispatcher strands every queued job
+            try:
+                self.on_start(job_id)
+                executor, future = self._submit(fn, args)
+            except Exception as e:
+                print(f"Job {job_id} could not be started: {e}")
+                self._complete(job_id, e)
+                continue
+            future.add_done_callback(lambda done, job_id=job_id, executor=executor: self._finished(job_id, executor, done))
+
+    def _submit(self, fn, args):
+        executor = self._executor
+        try:
+            return executor, executor.submit(fn, *args)
+        except BrokenExecutor:
+            # An earlier job killed its process; this one never ran, so retry it on a fresh pool
+            self._replace_broken_executor(executor)
+            executor = self._executor
+            return executor, executor.submit(fn, *args)
+
+    def _finished(self, job_id, executor, future):
+        error = future.exception()
+        if isinstance(error, BrokenExecutor):
+            self._replace_broken_executor(executor)
+        self._complete(job_id, error)
+
+    def _complete(self, job_id, error):
+        """Records the outcome and frees the job's slot, even if recording it fails."""
+        try:
+            self.on_finish(job_id, None if error is None else str(error) or type(error).__name__)
+        except Exception as e:
+            print(f"Could not record the outcome of job {job_id}: {e}")
+        finally:
+            with self._condition:
+                self._running -= 1
+                self._condition.notify()
@@ -0,0 +1,391 @@
+"""
+Per-route request metrics (Prometheus text format at /metrics) and the sampling profiler.
+
+Each worker process records the requests it serves. With PROMETHEUS_MULTIPROC_DIR set (the
+gunicorn config sets it), every worker also writes its metrics to that directory, and a scrape
+of /metrics, whichever worker answers it, reports the totals of all workers. The master's
+`child_exit` hook folds the metrics of a worker that exits into those totals, so counters keep
+growing when workers are recycled. Without the directory (e.g. the Flask dev server) each
+process reports its own metrics, labelled with its `pid`.
+"""
+from flask import Response, g, request
+import cProfile
+import glob
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+
+# ============================================
+# Metrics/Profiling Configuration
+# ============================================
+# Latency buckets in seconds, response size buckets in bytes, DB calls per request
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+DB_CALL_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Sampling profiler: a fraction of requests (0 = off), or any request carrying the header
+# when PROFILE_HEADER_ENABLED is set. Sampled requests are dumped only when slower than
+# PROFILE_SLOW_MS; header-requested ones always are. Open the .prof files with
+# `python -m pstats`, snakeviz or flameprof (flame graph).
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0.0))
+PROFILE_HEADER = "X-Profile"
+PROFILE_HEADER_ENABLED = os.environ.get("PROFILE_HEADER_ENABLED", "false").lower() == "true"
+PROFILE_SLOW_MS = float(os.environ.get("PROFILE_SLOW_MS", 500))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+
+# Shared by the gunicorn workers (same variable as prometheus_client's multiprocess mode);
+# each worker rewrites its file at most every METRICS_FLUSH_SECONDS
+METRICS_MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+METRICS_FLUSH_SECONDS = float(os.environ.get("METRICS_FLUSH_SECONDS", 1.0))
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus exposition layout."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class RequestMetrics:
+    """
+    Per-route request metrics: latency, response size and DB calls/time per request, plus
+    request counts by status. With a `directory`, this process's metrics are written there
+    in the background and `render()` reports the sum over every process writing to it.
+    """
+
+    HISTOGRAMS = {
+        "http_request_duration_seconds": ("Request latency by route", LATENCY_BUCKETS),
+        "http_response_size_bytes": ("Response body size by route (streamed bodies excluded)", SIZE_BUCKETS),
+        "db_calls_per_request": ("Database calls made while serving one request", DB_CALL_BUCKETS),
+        "db_time_per_request_seconds": ("Time spent in database calls while serving one request", LATENCY_BUCKETS),
+    }
+
+    def __init__(self, directory=None):
+        self._lock = threading.Lock()
+        self.histograms = {name: {} for name in self.HISTOGRAMS}
+        self.requests = {}
+        self.db_calls = {}
+        self.directory = directory
+        self._dirty = False
+        self._flusher_pid = None
+
+    def _histogram(self, name, labels):
+        series = self.histograms[name]
+        if labels not in series:
+            series[labels] = Histogram(self.HISTOGRAMS[name][1])
+        return series[labels]
+
+    def record(self, method, route, status, duration, size, db_calls, db_time):
+        labels = (method, route)
+        with self._lock:
+            self._histogram("http_request_duration_seconds", labels).observe(duration)
+            if size is not None:
+                self._histogram("http_response_size_bytes", labels).observe(size)
+            self._histogram("db_calls_per_request", labels).observe(db_calls)
+            self._histogram("db_time_per_request_seconds", labels).observe(db_time)
+            key = (method, route, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.db_calls[labels] = self.db_calls.get(labels, 0) + db_calls
+            self._dirty = True
+        if self.directory and self._flusher_pid != os.getpid():
+            self._start_flusher()
+
+    # ============================================
+    # Multiprocess (gunicorn) support
+    # ============================================
+
+    def snapshot(self):
+        """The raw counts as JSON-serialisable data, for `merge()` in another process."""
+        with self._lock:
+            return {
+                "requests": [[*key, value] for key, value in self.requests.items()],
+                "db_calls": [[*key, value] for key, value in self.db_calls.items()],
+                "histograms": {
+                    name: [[*labels, h.counts, h.count, h.sum] for labels, h in series.items()]
+                    for name, series in self.histograms.items()
+                }
+            }
+
+    def merge(self, state):
+        """Adds the counts of a `snapshot()` to these metrics."""
+        with self._lock:
+            for method, route, status, value in state["requests"]:
+                key = (method, route, status)
+                self.requests[key] = self.requests.get(key, 0) + value
+            for method, route, value in state["db_calls"]:
+                key = (method, route)
+                self.db_calls[key] = self.db_calls.get(key, 0) + value
+            for name, series in state["histograms"].items():
+                if name not in self.histograms:
+                    continue
+                for method, route, counts, count, total in series:
+                    histogram = self._histogram(name, (method, route))
+                    if len(counts) != len(histogram.counts):
+                        continue # Written with other buckets by an older deploy
+                    histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+                    histogram.count += count
+                    histogram.sum += total
+
+    def _start_flusher(self):
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_periodically, name="metrics-flusher", daemon=True).start()
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(METRICS_FLUSH_SECONDS)
+            if self._dirty:
+                self.flush()
+
+    def flush(self):
+        """Writes this process's metrics to the shared directory (gunicorn `worker_exit` calls it too)."""
+        if not self.directory:
+            return
+        self._dirty = False
+        try:
+            _write_state(_state_path(self.directory, os.getpid()), self.snapshot())
+        except OSError as e:
+            self._dirty = True
+            print(f"Could not write request metrics to {self.directory}: {e}")
+
+    def collect(self):
+        """This process's metrics plus those every other process left in the directory."""
+        total = RequestMetrics()
+        total.merge(self.snapshot())
+        own = _state_path(self.directory, os.getpid())
+        for path in glob.glob(_state_path(self.directory, "*")):
+            if path != own:
+                state = _read_state(path)
+                if state is not None:
+                    total.merge(state)
+        return total
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        if self.directory:
+            # Totals over all workers: a per-pid series would restart whenever a worker does
+            return self.collect()._render("")
+        return self._render(f',pid="{os.getpid()}"')
+
+    def _render(self, pid):
+        lines = []
+        with self._lock:
+            lines.append("# HELP http_requests_total Requests served by route and status")
+            lines.append("# TYPE http_requests_total counter")
+            for (method, route, status), value in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"{pid}}} {value}')
+
+            lines.append("# HELP db_calls_total Database calls by route")
+            lines.append("# TYPE db_calls_total counter")
+            for (method, route), value in sorted(self.db_calls.items()):
+                lines.append(f'db_calls_total{{method="{method}",route="{route}"{pid}}} {value}')
+
+            for name, (description, _) in self.HISTOGRAMS.items():
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} histogram")
+                for (method, route), histogram in sorted(self.histograms[name].items()):
+                    labels = f'method="{method}",route="{route}"{pid}'
+                    for bound, value in zip(histogram.buckets, histogram.counts):
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {value}')
+                    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                    lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _state_path(directory, name):
+    return os.path.join(directory, f"metrics_{name}.json")
+
+
+def _read_state(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None # Removed by child_exit since it was listed
+
+
+def _write_state(path, state):
+    # Atomic replace: readers never see a half-written file
+    temporary = f"{path}.{threading.get_ident()}.tmp"
+    with open(temporary, "w") as f:
+        json.dump(state, f)
+    os.replace(temporary, path)
+
+
+def reset_metrics_dir(directory=METRICS_MULTIPROC_DIR):
+    """Gunicorn `on_starting` hook: drops files left by a previous run (their pids may be reused)."""
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(_state_path(directory, "*")):
+        os.remove(path)
+
+
+def mark_process_dead(pid, directory=METRICS_MULTIPROC_DIR):
+    """
+    Gunicorn `child_exit` hook (runs in the master): folds an exited worker's metrics into
+    the `exited` totals, so the counters scraped from the remaining workers never go back.
+    """
+    if not directory:
+        return
+    path = _state_path(directory, pid)
+    state = _read_state(path)
+    if state is None:
+        return
+    exited_path = _state_path(directory, "exited")
+    exited = RequestMetrics()
+    previous = _read_state(exited_path)
+    if previous is not None:
+        exited.merge(previous)
+    exited.merge(state)
+    _write_state(exited_path, exited.snapshot())
+    os.remove(path)
+
+
+metrics = RequestMetrics(METRICS_MULTIPROC_DIR)
+
+# DB time of the request being served on this thread (None outside a request)
+_current = threading.local()
+
+
+def record_db_call(seconds):
+    """Adds one database call to the current request's totals (no-op outside a request)."""
+    stats = getattr(_current, "stats", None)
+    if stats is not None:
+        stats[0] += 1
+        stats[1] += seconds
+
+
+class TimedCursor(sqlite3.Cursor):
+    """sqlite3 cursor that reports each statement's time to the request metrics."""
+
+    def execute(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().execute(*args, **kwargs)
+        finally:
+            record_db_call(time.perf_counter() - started)
+
+    def executemany(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().executemany(*args, **kwargs)
+        finally:
+            record_db_call(time.perf_counter() - started)
+
+
+class TimedConnection(sqlite3.Connection):
+    """sqlite3 connection factory (`sqlite3.connect(..., factory=TimedConnection)`) with timed cursors and commits."""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, *args, **kwargs):
+        return self.cursor().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        return self.cursor().executemany(*args, **kwargs)
+
+    def commit(self):
+        started = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            record_db_call(time.perf_counter() - started)
+
+
+# cProfile can only run one profiler per process at a time (sys.monitoring on 3.12+)
+_profile_lock = threading.Lock()
+
+
+def _start_profile():
+    requested = PROFILE_HEADER_ENABLED and request.headers.get(PROFILE_HEADER) == "1"
+    sampled = PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+    if not (requested or sampled) or not _profile_lock.acquire(blocking=False):
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiling tool is active in this process
+        _profile_lock.release()
+        return
+    g._profile = (profiler, requested)
+
+
+def _finish_profile(response, route, duration):
+    profiler, requested = g.pop("_profile", (None, False))
+    if profiler is None:
+        return
+    profiler.disable()
+    _profile_lock.release()
+    if not requested and duration * 1000 < PROFILE_SLOW_MS:
+        return
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+    path = os.path.join(PROFILE_DIR, f"{int(time.time() * 1000)}-{request.method}-{slug}-{int(duration * 1000)}ms-{os.getpid()}.prof")
+    profiler.dump_stats(path)
+    response.headers["X-Profile-File"] = os.path.basename(path)
+
+
+def init_metrics(app, path="/metrics"):
+    """
+    Installs the request middleware on `app` and serves the metrics at `path`.
+    Latency covers the view and response building; for streamed responses the body is
+    produced after the measurement ends.
+    """
+
+    @app.before_request
+    def start_request_metrics():
+        if request.path == path:
+            return
+        g._metrics_started = time.perf_counter()
+        _current.stats = [0, 0.0]
+        _start_profile()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop("_metrics_started", None)
+        if started is None:
+            return response
+        duration = time.perf_counter() - started
+        db_calls, db_time = getattr(_current, "stats", None) or (0, 0.0)
+        _current.stats = None
+        # Only the matched rule, never the raw path, so label cardinality stays bounded
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        size = None if response.is_streamed else response.calculate_content_length()
+        metrics.record(request.method, route, response.status_code, duration, size, db_calls, db_time)
+        _finish_profile(response, route, duration)
+        return response
+
+    @app.teardown_request
+    def clear_request_metrics(exc):
+        _current.stats = None
+        profile = g.pop("_profile", None)
+        if profile is not None:
+            # The request failed before after_request ran
+            profile[0].disable()
+            _profile_lock.release()
+
+    def metrics_endpoint():
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+    app.add_url_rule(path, "metrics", metrics_endpoint)
+    return metrics
@@ -0,0 +1,121 @@
+from flask import request
+from bson.objectid import ObjectId
+from datetime import datetime, UTC
+from itertools import islice
+import io
+import json
+import os
+
+# MessagePack and Arrow are optional: without the package the format is simply not offered
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# ============================================
+# Response Format Configuration
+# ============================================
+JSON_MIMETYPE = "application/json"
+NDJSON_MIMETYPE = "application/x-ndjson"
+MSGPACK_MIMETYPE = "application/msgpack"
+ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+# Rows per NDJSON/MessagePack chunk and per Arrow record batch (also the cursor batch size)
+FORMAT_BATCH_ROWS = int(os.environ.get("FORMAT_BATCH_ROWS", 1000))
+
+
+def available_formats():
+    """Response mimetypes this process can produce, JSON first (the default for */*)."""
+    formats = [JSON_MIMETYPE, NDJSON_MIMETYPE]
+    if msgpack is not None:
+        formats.append(MSGPACK_MIMETYPE)
+    if pa is not None:
+        formats.append(ARROW_MIMETYPE)
+    return formats
+
+
+def negotiate_format():
+    """Best response mimetype for the request's Accept header; None when nothing acceptable is available."""
+    if not request.accept_mimetypes:
+        return JSON_MIMETYPE
+    return request.accept_mimetypes.best_match(available_formats())
+
+
+def not_acceptable():
+    return {'message': f"Not acceptable (available: {', '.join(available_formats())})"}, 406
+
+
+def _plain(value):
+    """Makes BSON values encodable as JSON/MessagePack: datetimes as UTC ISO 8601, ObjectIds as strings."""
+    if isinstance(value, datetime):
+        return (value if value.tzinfo else value.replace(tzinfo=UTC)).isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+
+def _pages(rows, size):
+    rows = iter(rows)
+    while True:
+        page = list(islice(rows, size))
+        if not page:
+            return
+        yield page
+
+
+def encode_rows(rows, mimetype, schema=None, header=None):
+    """
+    Streams `rows` (dicts, usually straight off a Mongo cursor) in `mimetype`, one page of
+    FORMAT_BATCH_ROWS at a time:
+      - NDJSON: one JSON object per line (`header`, when given, is the first line)
+      - MessagePack: a sequence of maps, read with `msgpack.Unpacker` (`header` first)
+      - Arrow: an IPC stream with one record batch per page, typed by `schema`
+        (`header` is stored as JSON in the schema metadata under "header")
+    """
+    if mimetype == NDJSON_MIMETYPE:
+        if header is not None:
+            yield json.dumps(header, default=_plain) + "\n"
+        for page in _pages(rows, FORMAT_BATCH_ROWS):
+            yield "".join(json.dumps(row, default=_plain) + "\n" for row in page)
+
+    elif mimetype == MSGPACK_MIMETYPE:
+        packer = msgpack.Packer(default=_plain)
+        if header is not None:
+            yield packer.pack(header)
+        for page in _pages(rows, FORMAT_BATCH_ROWS):
+            yield b"".join(packer.pack(row) for row in page)
+
+    elif mimetype == ARROW_MIMETYPE:
+        if header is not None:
+            schema = schema.with_metadata({"header": json.dumps(header, default=_plain)})
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, schema) as writer:
+            yield _drain(sink)
+            for page in _pages(rows, FORMAT_BATCH_ROWS):
+                writer.write_batch(pa.RecordBatch.from_pylist(page, schema=schema))
+                yield _drain(sink)
+        yield _drain(sink)
+
+    else:
+        raise ValueError(f"Unsupported response format: {mimetype}")
+
+
+def _drain(sink):
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
+def arrow_schema(fields, names=None):
+    """Arrow schema from `(name, type_name)` pairs, optionally restricted to `names` (in order)."""
+    types = {
+        "int64": pa.int64(),
+        "float64": pa.float64(),
+        "string": pa.string(),
+        "timestamp": pa.timestamp("ms", tz="UTC"),
+    }
+    return pa.schema([(name, types[type_name]) for name, type_name in fields if names is None or name in names])
@@ -0,0 +1,171 @@
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import letter
+from datetime import datetime, UTC
+import hashlib
+import os
+import tempfile
+
+# ============================================
+# Statement PDF Configuration
+# ============================================
+PDF_CACHE_DIR = os.environ.get("PDF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "banking-statements"))
+PDF_CACHE_MAX_ENTRIES = int(os.environ.get("PDF_CACHE_MAX_ENTRIES", 500)) # 0 disables the cache
+PDF_STREAM_CHUNK_SIZE = 64 * 1024
+# Results of async statement jobs: kept apart from the cache, so they exist even when it is off
+JOB_RESULTS_DIR = os.environ.get("JOB_RESULTS_DIR", os.path.join(tempfile.gettempdir(), "banking-statement-jobs"))
+JOB_RESULTS_MAX_ENTRIES = max(1, int(os.environ.get("JOB_RESULTS_MAX_ENTRIES", 1000)))
+
+# Statement layout (ReportLab coordinates)
+PDF_X_START = 50
+PDF_Y_START = 750
+PDF_Y_STEP = 14
+PDF_Y_BOTTOM = 50
+
+SUMMARY_FORM = "statement_summary"
+COLUMNS_FORM = "statement_columns"
+
+
+def _define_page_templates(c, account, opening_balance, closing_balance):
+    """
+    Records the static parts of the statement once per document as form XObjects.
+    Every page then references them with a single `doForm` instead of redrawing them.
+    """
+    c.beginForm(SUMMARY_FORM)
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(PDF_X_START, PDF_Y_START, "Group 1 Bank")
+    c.drawString(PDF_X_START, PDF_Y_START - PDF_Y_STEP * 2, "Account Statement")
+
+    c.setFont("Helvetica", 10)
+    c.drawString(PDF_X_START, PDF_Y_START - PDF_Y_STEP * 3, f"Account Holder: {account['name']} (ID: {account['id']})")
+    c.drawString(PDF_X_START, PDF_Y_START - PDF_Y_STEP * 4, f"Statement Date: {datetime.now(UTC).strftime('%Y-%m-%d %H:%M:%S UTC')}")
+    c.drawString(PDF_X_START, PDF_Y_START - PDF_Y_STEP * 5, f"Opening Balance: ${opening_balance:.2f}")
+    c.drawString(PDF_X_START, PDF_Y_START - PDF_Y_STEP * 6, f"Closing Balance: ${closing_balance:.2f}")
+    c.endForm()
+
+    # Column headers are recorded at the top of the page and shifted down where needed
+    c.beginForm(COLUMNS_FORM)
+    c.setFont("Helvetica-Bold", 10)
+    c.drawString(PDF_X_START, PDF_Y_START, "Date/Time")
+    c.drawString(PDF_X_START + 150, PDF_Y_START, "Type")
+    c.drawString(PDF_X_START + 250, PDF_Y_START, "Amount ($)")
+    c.drawString(PDF_X_START + 400, PDF_Y_START, "Running Balance ($)")
+    c.line(PDF_X_START, PDF_Y_START - 2, PDF_X_START + 500, PDF_Y_START - 2)
+    c.endForm()
+
+
+def _draw_column_headers(c, y_position):
+    """Places the column header template at `y_position` and returns the y position of the first row."""
+    c.saveState()
+    c.translate(0, y_position - PDF_Y_START)
+    c.doForm(COLUMNS_FORM)
+    c.restoreState()
+    c.setFont("Helvetica", 9)
+    return y_position - PDF_Y_STEP * 2
+
+
+def render_statement_pdf(output, account, opening_balance, closing_balance, transactions, is_credit):
+    """
+    Renders a statement into the binary file object `output`.
+    Rows are consumed lazily from `transactions` and each page is finished as soon as it is full.
+    """
+    c = canvas.Canvas(output, pagesize=letter)
+    _define_page_templates(c, account, opening_balance, closing_balance)
+
+    c.doForm(SUMMARY_FORM)
+    y_position = _draw_column_headers(c, PDF_Y_START - PDF_Y_STEP * 8)
+
+    for t in transactions:
+        # Check for page break
+        if y_position < PDF_Y_BOTTOM:
+            c.showPage()
+            y_position = _draw_column_headers(c, PDF_Y_START)
+
+        amount_sign = "" if is_credit(t['type']) else "-"
+
+        c.drawString(PDF_X_START, y_position, t['timestamp'])
+        c.drawString(PDF_X_START + 150, y_position, t['type'].capitalize())
+        c.drawString(PDF_X_START + 250, y_position, f"{amount_sign}{t['amount']:.2f}")
+        c.drawString(PDF_X_START + 400, y_position, f"{t['running_balance']:.2f}")
+
+        y_position -= PDF_Y_STEP
+
+    c.save()
+
+
+def iter_file_chunks(file_obj, chunk_size=PDF_STREAM_CHUNK_SIZE):
+    """Streams an open binary file from the start in fixed-size chunks, closing it at the end."""
+    try:
+        file_obj.seek(0)
+        while True:
+            chunk = file_obj.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        file_obj.close()
+
+
+class StatementPdfCache:
+    """
+    On-disk cache of rendered statements, shared by every worker on the host.
+    Keys describe everything the PDF depends on (account, last transaction, window), so an
+    unchanged statement is served straight from disk. The oldest files are pruned once
+    `max_entries` is exceeded.
+    """
+
+    def __init__(self, directory=PDF_CACHE_DIR, max_entries=PDF_CACHE_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        if self.enabled:
+            os.makedirs(self.directory, exist_ok=True)
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    @staticmethod
+    def make_key(*parts):
+        return hashlib.sha256("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def open(self, key):
+        """Returns the cached PDF opened for reading, or None on a miss."""
+        if not self.enabled:
+            return None
+        try:
+            cached = open(self._path(key), "rb")
+        except FileNotFoundError:
+            return None
+        # Refresh the modification time so pruning evicts the least recently used files
+        os.utime(cached.fileno())
+        return cached
+
+    def store(self, key, render):
+        """
+        Calls `render(file_obj)` into a temporary file, publishes it atomically under `key`
+        and returns it opened for reading.
+        """
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                render(temp_file)
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._prune()
+        return open(self._path(key), "rb")
+
+    def _prune(self):
+        entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".pdf")]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
@@ -2,8 +2,9 @@ from flask import Flask, jsonify, redirect
 from flask_restful import Api, MethodNotAllowed, NotFound
 from flask_cors import CORS
 from util.common import domain, port, prefix, build_swagger_config_json
+from util.requestMetrics import init_metrics
 from resources.swaggerConfig import SwaggerConfig
-from resources.bookResource import BooksGETResource, BookGETResource, BookPOSTResource, BookPUTResource, BookDELETEResource
+from resources.bookResource import BooksGETResource, BookGETResource, BookPOSTResource, BookPUTResource, BookDELETEResource, verify_db
 from flask_swagger_ui import get_swaggerui_blueprint
 
 # ============================================
@@ -14,6 +15,12 @@ app = application
 app.config['PROPAGATE_EXCEPTIONS'] = True
 CORS(app)
 api = Api(app, prefix=prefix, catch_all_404s=True)
+init_metrics(app) # GET /metrics (Prometheus text format)
+
+# ============================================
+# Schema Check (only verifies; run `python manage.py migrate` to apply changes)
+# ============================================
+verify_db()
 
 # ============================================
 # Swagger Configuration
@@ -0,0 +1,33 @@
+# ============================================
+# Gunicorn Server Hooks
+# ============================================
+# Picked up automatically by `gunicorn application:app` from the working directory.
+import os
+import tempfile
+
+# Workers share a metrics directory so whichever one answers /metrics reports the totals of all;
+# one per master unless set explicitly, and set before the app modules read it
+if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="books-metrics-")
+
+from resources.bookResource import mongo
+from util.requestMetrics import metrics, reset_metrics_dir, mark_process_dead
+
+
+def on_starting(server):
+    reset_metrics_dir()
+
+
+def post_fork(server, worker):
+    # Never reuse a client (and its sockets) created before the fork
+    mongo.reset()
+
+
+def worker_exit(server, worker):
+    # Metrics recorded since the last background flush
+    metrics.flush()
+
+
+def child_exit(server, worker):
+    # Keep an exited worker's counts in the totals
+    mark_process_dead(worker.pid)
@@ -187,8 +187,9 @@
 """
 from flask_restful import Resource
 from flask import request
-from pymongo import MongoClient
 from bson.objectid import ObjectId
+from util.mongoConnection import MongoConnectionManager
+from util.migrations import Migration, run_migrations, verify_schema
 
 # ================================
 
@@ -207,22 +208,22 @@ def check_credentials():
     return True
 
 # Configuration
-MONGO_URI = "mongodb://localhost:27017/"
 DATABASE_NAME = "emp"
 COLLECTION_NAME = "emp"
 
+# One pooled client per worker process, instead of a new MongoClient per request
+mongo = MongoConnectionManager(DATABASE_NAME)
+
 def get_mongo_collection():
     try:
-        client = MongoClient(MONGO_URI)
-        db = client[DATABASE_NAME]
-        collection = db[COLLECTION_NAME]
-        return collection
+        return mongo.get_db()[COLLECTION_NAME]
     except Exception as e:
         print(f"MongoDB connection failed: {str(e)}")
         raise
 
-def init_db():
-    collection = get_mongo_collection()
+# Schema migrations: applied by `python manage.py migrate`, never at import
+def _seed_books(db):
+    collection = db[COLLECTION_NAME]
     
     # Ensure collection exists and insert initial data if it's empty
     if collection.count_documents({}) == 0:
@@ -236,7 +237,18 @@ def init_db():
         ]
         collection.insert_many(initial_books)
 
-init_db()
+# Append new versions; never edit or renumber an applied one
+MIGRATIONS = [
+    Migration(1, "Seed the books collection", _seed_books),
+]
+
+def migrate(target=None):
+    """Applies pending migrations (up to `target`); returns the ones applied."""
+    return run_migrations(mongo.get_db(), MIGRATIONS, target)
+
+def verify_db():
+    """Startup check: raises SchemaVersionError if `manage.py migrate` has not been run."""
+    return verify_schema(mongo.get_db(), MIGRATIONS)
 
 # Helper function to convert MongoDB document (with ObjectId) to a serializable dictionary
 def serialize_book(book):
@@ -61,3 +61,16 @@ def test_delete_book(client):
 
     response = client.delete(f"/books/{book_id}")
     assert response.status_code == 204
+
+
+def test_metrics_endpoint(client):
+    client.get("/books", headers={"X-USERNAME": "admin", "X-PASSWORD": "admin123"})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert 'http_requests_total{method="GET",route="/books",status="200"' in response.get_data(as_text=True)
+
+
+def test_migrations_are_applied_once(client):
+    from resources.bookResource import migrate, verify_db
+    assert migrate() == []
+    assert verify_db() >= 1
@@ -0,0 +1,105 @@
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime, timezone
+
+# ============================================
+# Schema Migrations (MongoDB)
+# ============================================
+# One document per version ({_id: version, state: "running" | "applied"}) in this collection;
+# run pending migrations with `python manage.py migrate`
+MIGRATIONS_COLLECTION = "migrations"
+
+
+class Migration:
+    """One data/index change: `apply(db)` must be safe to re-run if it was interrupted."""
+
+    def __init__(self, version, description, apply, enabled=None):
+        self.version = version
+        self.description = description
+        self.apply = apply
+        # Optional features (e.g. behind an env flag) are only required while enabled
+        self.enabled = enabled
+
+    def is_enabled(self):
+        return self.enabled is None or self.enabled()
+
+
+class SchemaVersionError(RuntimeError):
+    """The database is missing migrations this code needs."""
+
+
+def applied_versions(db):
+    return {doc["_id"] for doc in db[MIGRATIONS_COLLECTION].find({"state": "applied"}, {"_id": 1})}
+
+
+def pending_migrations(db, migrations):
+    applied = applied_versions(db)
+    return [m for m in sorted(migrations, key=lambda m: m.version) if m.version not in applied and m.is_enabled()]
+
+
+def run_migrations(db, migrations, target=None):
+    """
+    Applies pending migrations in version order, up to `target` when given. A version is
+    claimed by inserting its document before it runs, so concurrent runners never apply it
+    twice; a failed migration releases its claim. Returns the migrations applied by this call.
+    """
+    collection = db[MIGRATIONS_COLLECTION]
+    applied = []
+    for migration in pending_migrations(db, migrations):
+        if target is not None and migration.version > target:
+            break
+        try:
+            collection.insert_one({
+                "_id": migration.version,
+                "description": migration.description,
+                "state": "running",
+                "started_at": datetime.now(timezone.utc)
+            })
+        except DuplicateKeyError:
+            record = collection.find_one({"_id": migration.version}) or {}
+            if record.get("state") == "applied":
+                continue
+            raise RuntimeError(
+                f"Migration {migration.version} is being applied by another runner "
+                f"(or was interrupted: delete its `{MIGRATIONS_COLLECTION}` document to retry)"
+            )
+        try:
+            migration.apply(db)
+        except Exception:
+            collection.delete_one({"_id": migration.version, "state": "running"})
+            raise
+        collection.update_one(
+            {"_id": migration.version},
+            {"$set": {"state": "applied", "applied_at": datetime.now(timezone.utc)}}
+        )
+        applied.append(migration)
+    return applied
+
+
+def verify_schema(db, migrations):
+    """
+    Startup check: raises SchemaVersionError unless every enabled migration is applied.
+    A database ahead of the code is accepted, so migrations can run before a rolling deploy.
+    Returns the highest applied version.
+    """
+    pending = pending_migrations(db, migrations)
+    if pending:
+        versions = ", ".join(str(m.version) for m in pending)
+        raise SchemaVersionError(f"Database is missing migrations {versions}; run `python manage.py migrate`")
+    return max(applied_versions(db), default=0)
+
+
+def migration_status(db, migrations):
+    """One row per known migration, for `manage.py status`."""
+    recorded = {doc["_id"]: doc for doc in db[MIGRATIONS_COLLECTION].find({})}
+    rows = []
+    for m in sorted(migrations, key=lambda m: m.version):
+        record = recorded.get(m.version, {})
+        applied_at = record.get("applied_at")
+        rows.append({
+            "version": m.version,
+            "description": m.description,
+            "enabled": m.is_enabled(),
+            "state": record.get("state"),
+            "applied_at": applied_at.isoformat() if applied_at else None
+        })
+    return rows
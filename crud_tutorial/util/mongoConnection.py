@@ -0,0 +1,151 @@
+from pymongo import MongoClient
+from pymongo.monitoring import CommandListener, ConnectionPoolListener
+from util.requestMetrics import record_db_call
+import os
+import threading
+
+# ============================================
+# Pool Configuration (tunable per deployment)
+# ============================================
+MONGO_URI = os.environ.get("MONGO_URI", "mongodb://localhost:27017/")
+MONGO_MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", 50))
+MONGO_MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", 0))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get("MONGO_WAIT_QUEUE_TIMEOUT_MS", 2000))
+
+
+class PoolMetricsListener(ConnectionPoolListener):
+    """Counts connection pool events so pool utilisation can be reported."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.open_connections = 0
+            self.checked_out = 0
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.checkout_timeouts = 0
+            self.pool_clears = 0
+
+    def _add(self, name, value=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + value)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._add("pool_clears")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._add("open_connections")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add("open_connections", -1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._add("checkout_failures")
+        if event.reason == "timeout":
+            self._add("checkout_timeouts")
+
+    def connection_checked_out(self, event):
+        self._add("checked_out")
+        self._add("checkouts")
+
+    def connection_checked_in(self, event):
+        self._add("checked_out", -1)
+
+
+class CommandTimingListener(CommandListener):
+    """Reports every command's duration to the metrics of the request that issued it."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        record_db_call(event.duration_micros / 1_000_000)
+
+    def failed(self, event):
+        record_db_call(event.duration_micros / 1_000_000)
+
+
+class MongoConnectionManager:
+    """
+    Owns the process-wide MongoClient.
+
+    The client is created lazily with the configured pool sizing and is tied to the process
+    that created it: after a fork (gunicorn workers) the child gets a fresh client instead
+    of sharing the parent's sockets. Call `reset()` from gunicorn's `post_fork` hook, and
+    `close()` in the master before forking.
+    """
+
+    def __init__(self, database_name, uri=MONGO_URI):
+        self.database_name = database_name
+        self.uri = uri
+        self.metrics = PoolMetricsListener()
+        self.command_timer = CommandTimingListener()
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def get_client(self):
+        if self._client is None or self._pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._pid != os.getpid():
+                    self.metrics.reset()
+                    self._client = MongoClient(
+                        self.uri,
+                        maxPoolSize=MONGO_MAX_POOL_SIZE,
+                        minPoolSize=MONGO_MIN_POOL_SIZE,
+                        waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+                        event_listeners=[self.metrics, self.command_timer],
+                    )
+                    self._pid = os.getpid()
+        return self._client
+
+    def get_db(self):
+        return self.get_client()[self.database_name]
+
+    def reset(self):
+        """Forgets an inherited client without touching its (parent-owned) sockets."""
+        with self._lock:
+            self._client = None
+            self._pid = None
+
+    def close(self):
+        with self._lock:
+            if self._client is not None and self._pid == os.getpid():
+                self._client.close()
+            self._client = None
+            self._pid = None
+
+    def pool_stats(self):
+        """Current pool utilisation for this process."""
+        metrics = self.metrics
+        return {
+            "max_pool_size": MONGO_MAX_POOL_SIZE,
+            "min_pool_size": MONGO_MIN_POOL_SIZE,
+            "wait_queue_timeout_ms": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            "open_connections": metrics.open_connections,
+            "checked_out": metrics.checked_out,
+            "utilisation": round(metrics.checked_out / MONGO_MAX_POOL_SIZE, 4) if MONGO_MAX_POOL_SIZE else 0.0,
+            "checkouts": metrics.checkouts,
+            "checkout_failures": metrics.checkout_failures,
+            "checkout_timeouts": metrics.checkout_timeouts,
+            "pool_clears": metrics.pool_clears,
+            "pid": os.getpid(),
+        }
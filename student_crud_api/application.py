@@ -2,8 +2,9 @@ from flask import Flask, jsonify, redirect
 from flask_restful import Api, MethodNotAllowed, NotFound
 from flask_cors import CORS
 from util.common import domain, port, prefix, build_swagger_config_json
+from util.requestMetrics import init_metrics
 from resources.swaggerConfig import SwaggerConfig
-from resources.studentResource import StudentsGETResource, StudentGETResource , StudentPOSTResource , StudentPUTResource , StudentDELETEResource
+from resources.studentResource import StudentsGETResource, StudentGETResource , StudentPOSTResource , StudentPUTResource , StudentDELETEResource , StudentsBulkResource , StudentsExportResource, verify_db
 
 from flask_swagger_ui import get_swaggerui_blueprint
 
@@ -15,6 +16,12 @@ app = application
 app.config['PROPAGATE_EXCEPTIONS'] = True
 CORS(app)
 api = Api(app, prefix=prefix, catch_all_404s=True)
+init_metrics(app) # GET /metrics (Prometheus text format)
+
+# ============================================
+# Schema Check (only verifies; run `python manage.py migrate` to apply changes)
+# ============================================
+verify_db()
 
 # ============================================
 # Swagger
@@ -63,9 +70,11 @@ def redirect_to_prefix():
 api.add_resource(SwaggerConfig, '/swagger-config')
 # GET books
 api.add_resource(StudentsGETResource, '/students')
+api.add_resource(StudentsExportResource, '/students/export')
 api.add_resource(StudentGETResource, '/students/<int:id>')
 # POST book
 api.add_resource(StudentPOSTResource, '/students')
+api.add_resource(StudentsBulkResource, '/students/bulk')
 # PUT book
 api.add_resource(StudentPUTResource, '/students/<int:id>')
 # DELETE book
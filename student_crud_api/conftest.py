@@ -1,4 +1,9 @@
 import pytest
+from resources.studentResource import migrate
+
+# The app only verifies the schema, so bring the test database up to date first
+migrate()
+
 from application import app
 
 @pytest.fixture
@@ -0,0 +1,27 @@
+# ============================================
+# Gunicorn Server Hooks
+# ============================================
+# Picked up automatically by `gunicorn application:app` from the working directory.
+import os
+import tempfile
+
+# Workers share a metrics directory so whichever one answers /metrics reports the totals of all;
+# one per master unless set explicitly, and set before the app modules read it
+if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="students-metrics-")
+
+from util.requestMetrics import metrics, reset_metrics_dir, mark_process_dead
+
+
+def on_starting(server):
+    reset_metrics_dir()
+
+
+def worker_exit(server, worker):
+    # Metrics recorded since the last background flush
+    metrics.flush()
+
+
+def child_exit(server, worker):
+    # Keep an exited worker's counts in the totals
+    mark_process_dead(worker.pid)
@@ -0,0 +1,44 @@
+import argparse
+import json
+import sys
+from resources.studentResource import migrate, get_db_connection, MIGRATIONS
+from util.migrations import migration_status
+
+# ============================================
+# Maintenance Commands (run outside the request path)
+# ============================================
+# Usage: python manage.py <command> [options]
+
+def apply_migrations(args):
+    applied = migrate(target=args.target)
+    for migration in applied:
+        print(f"Applied {migration.version}: {migration.description}")
+    if not applied:
+        print("Schema is up to date.")
+
+
+def status(args):
+    rows = migration_status(get_db_connection(), MIGRATIONS)
+    json.dump(rows, sys.stdout, indent=2)
+    print()
+    # Non-zero exit while enabled migrations are pending, so deploy scripts can gate on it
+    return 1 if any(row["enabled"] and row["applied_at"] is None for row in rows) else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Student API maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    upgrade = commands.add_parser("migrate", help="Apply pending schema migrations (run once per deploy, before the workers start)")
+    upgrade.add_argument("--target", type=int, default=None, help="Stop after this migration version")
+    upgrade.set_defaults(handler=apply_migrations)
+
+    show = commands.add_parser("status", help="List migrations and when they were applied")
+    show.set_defaults(handler=status)
+
+    return parser
+
+
+if __name__ == '__main__':
+    args = build_parser().parse_args()
+    sys.exit(args.handler(args))
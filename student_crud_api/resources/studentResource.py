@@ -1,6 +1,11 @@
 from flask_restful import Resource
-from flask import request
-import sqlite3
+from flask import request, Response, stream_with_context
+from util.sqlitePool import SQLiteConnectionPool
+from util.migrations import Migration, run_migrations, verify_schema
+import csv
+import io
+import json
+import os
 
 """
 BASIC SECURITY (Username + Password)
@@ -15,17 +20,27 @@ def check_credentials():
         return False
     return True
 
+# Per-thread connections to students.db (WAL mode), reused across requests
+db_pool = SQLiteConnectionPool()
+
+# Optional FTS5 index over names, queried with GET /students?q=
+STUDENTS_FTS = os.environ.get("STUDENTS_FTS", "false").lower() == "true"
+
 def get_db_connection():
+    """
+    This thread's pooled connection. Use it as `with get_db_connection() as conn:` to commit
+    (or roll back on error) at the end of the block; the connection stays open for reuse.
+    """
     try:
-        conn = sqlite3.connect("students.db")
-        conn.row_factory = sqlite3.Row
-        return conn
+        return db_pool.connection()
     except Exception as e:
         print(f"Database connection failed: {str(e)}")
         raise
 
-def init_db():
-    conn = get_db_connection()
+# ============================================
+# Schema Migrations (applied by `python manage.py migrate`, never at import)
+# ============================================
+def _create_students_table(conn):
     cursor = conn.cursor()
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS students (
@@ -46,31 +61,160 @@ def init_db():
         ]
         cursor.executemany("INSERT INTO students (name, age, course) VALUES (?, ?, ?)", initial_students)
 
-    
-    conn.commit()
-    conn.close()
+def _create_student_indexes(conn):
+    # idx_students_course also orders each course by id (the implicit rowid suffix), so it
+    # serves course + after_id pages; (course, age) serves age ranges and sort=age
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_students_course ON students (course)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_students_course_age ON students (course, age)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_students_name ON students (name)")
+
+def _create_students_fts(conn):
+    # External-content table kept in sync by triggers (needs SQLite built with FTS5)
+    conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5(name, content='students', content_rowid='id')")
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS students_fts_insert AFTER INSERT ON students BEGIN
+            INSERT INTO students_fts (rowid, name) VALUES (new.id, new.name);
+        END;
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS students_fts_delete AFTER DELETE ON students BEGIN
+            INSERT INTO students_fts (students_fts, rowid, name) VALUES ('delete', old.id, old.name);
+        END;
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS students_fts_update AFTER UPDATE OF name ON students BEGIN
+            INSERT INTO students_fts (students_fts, rowid, name) VALUES ('delete', old.id, old.name);
+            INSERT INTO students_fts (rowid, name) VALUES (new.id, new.name);
+        END;
+    """)
+    conn.execute("INSERT INTO students_fts (students_fts) VALUES ('rebuild')")
+
+# Append new versions; never edit or renumber an applied one
+MIGRATIONS = [
+    Migration(1, "Create and seed the students table", _create_students_table),
+    Migration(2, "Index course, (course, age) and name", _create_student_indexes),
+    Migration(3, "FTS5 name index (STUDENTS_FTS)", _create_students_fts, enabled=lambda: STUDENTS_FTS),
+]
+
+def migrate(target=None):
+    """Applies pending migrations (up to `target`); returns the ones applied."""
+    return run_migrations(get_db_connection(), MIGRATIONS, target)
+
+def verify_db():
+    """Startup check: raises SchemaVersionError if `manage.py migrate` has not been run."""
+    return verify_schema(get_db_connection(), MIGRATIONS)
+
+# ============================================
+# Listing (filters + keyset pagination)
+# ============================================
+STUDENTS_PAGE_DEFAULT = 100
+STUDENTS_PAGE_MAX = 1000
+STUDENT_SORT_FIELDS = ("id", "name", "age", "course")
+
+def _int_arg(name, minimum=None):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"Query parameter '{name}' must be an integer")
+    if minimum is not None and value < minimum:
+        raise ValueError(f"Query parameter '{name}' must be at least {minimum}")
+    return value
+
+def _prefix_upper_bound(prefix):
+    """Smallest string greater than every string starting with `prefix` (for an index range)."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+def build_students_query(args):
+    """
+    SELECT for GET /students from its query parameters; returns (sql, params, limit).
+    Every filter is a sargable condition on an indexed column, and pages continue after
+    the row `after_id` in the requested sort order, so a page costs an index seek plus
+    `limit` rows however deep the client has paged.
+    """
+    conditions, params = [], []
 
-init_db()
+    course = args.get("course")
+    if course:
+        conditions.append("course = ?")
+        params.append(course)
+    min_age, max_age = _int_arg("min_age", 0), _int_arg("max_age", 0)
+    if min_age is not None:
+        conditions.append("age >= ?")
+        params.append(min_age)
+    if max_age is not None:
+        conditions.append("age <= ?")
+        params.append(max_age)
+    name = args.get("name")
+    if name:
+        # Case-sensitive prefix as a range, so idx_students_name is used (LIKE would scan)
+        conditions.append("name >= ? AND name < ?")
+        params.extend([name, _prefix_upper_bound(name)])
+    search = args.get("q")
+    if search:
+        if not STUDENTS_FTS:
+            raise ValueError("Full-text search is not enabled (set STUDENTS_FTS=true)")
+        conditions.append("id IN (SELECT rowid FROM students_fts WHERE students_fts MATCH ?)")
+        params.append(search)
+
+    sort = args.get("sort", "id")
+    field = sort.lstrip("-")
+    if field not in STUDENT_SORT_FIELDS:
+        raise ValueError(f"Query parameter 'sort' must be one of {', '.join(STUDENT_SORT_FIELDS)} (prefix '-' for descending)")
+    descending = sort.startswith("-")
+    direction, comparison = ("DESC", "<") if descending else ("ASC", ">")
+
+    after_id = _int_arg("after_id")
+    if after_id is not None:
+        if field == "id":
+            conditions.append(f"id {comparison} ?")
+        else:
+            # Row value comparison against the cursor row: (sort value, id) is unique
+            conditions.append(f"({field}, id) {comparison} (SELECT {field}, id FROM students WHERE id = ?)")
+        params.append(after_id)
+
+    limit = _int_arg("limit", 1) or STUDENTS_PAGE_DEFAULT
+    limit = min(limit, STUDENTS_PAGE_MAX)
+
+    sql = "SELECT * FROM students"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    order = f"id {direction}" if field == "id" else f"{field} {direction}, id {direction}"
+    sql += f" ORDER BY {order} LIMIT ?"
+    params.append(limit)
+    return sql, params, limit
 
 class StudentsGETResource(Resource):
+    """
+    GET /students?course=&min_age=&max_age=&name=&q=&sort=&after_id=&limit=
+    One page of students. When the page is full, X-Next-Cursor holds the `after_id` for the
+    next page (keep the same filters and sort).
+    """
     def get(self):
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM students")
-        result = [dict(row) for row in cursor.fetchall()]
-        conn.close()
-        return result
+        try:
+            query, params, limit = build_students_query(request.args)
+        except ValueError as e:
+            return {"message": str(e)}, 400
+
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            result = [dict(row) for row in cursor.fetchall()]
+
+        headers = {"X-Next-Cursor": str(result[-1]["id"])} if len(result) == limit else {}
+        return result, 200, headers
 
 class StudentGETResource(Resource):
     def get(self, id):
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
 
-        query = "SELECT * FROM students WHERE id = ?"
-        cursor.execute(query, (id,))
-        
-        result = cursor.fetchone()
-        conn.close()
+            query = "SELECT * FROM students WHERE id = ?"
+            cursor.execute(query, (id,))
+            
+            result = cursor.fetchone()
 
         if result:
             return dict(result) 
@@ -95,18 +239,11 @@ class StudentPOSTResource(Resource):
         except ValueError:
             return {"message": "Field 'age' must be an integer"}, 400
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        query = "INSERT INTO students (name, age, course) VALUES (?, ?, ?)"
-        cursor.execute(query, (name, age, course))
-        
-        new_id = cursor.lastrowid
-        conn.commit()
-        
-        cursor.execute("SELECT * FROM students WHERE id = ?", (new_id,))
-        new_student = cursor.fetchone()
-        conn.close()
+        # One statement in one transaction: RETURNING echoes the stored row (id, created_at).
+        # fetchall() finishes the statement, which SQLite requires before the commit
+        with get_db_connection() as conn:
+            query = "INSERT INTO students (name, age, course) VALUES (?, ?, ?) RETURNING *"
+            new_student, = conn.execute(query, (name, age, course)).fetchall()
 
         return dict(new_student), 201
 
@@ -128,37 +265,138 @@ class StudentPUTResource(Resource):
         except ValueError:
             return {"message": "Field 'age' must be an integer"}, 400
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        query = "UPDATE students SET name = ?, age = ?, course = ? WHERE id = ?"
-        cursor.execute(query, (name, age, course, id))
-        
-        conn.commit()
-        
-        if cursor.rowcount == 0:
-            conn.close()
+        with get_db_connection() as conn:
+            query = "UPDATE students SET name = ?, age = ?, course = ? WHERE id = ? RETURNING *"
+            updated_rows = conn.execute(query, (name, age, course, id)).fetchall()
+
+        if not updated_rows:
             return {"message": f"Student with id {id} not found"}, 404
-        
-        cursor.execute("SELECT * FROM students WHERE id = ?", (id,))
-        updated_student = cursor.fetchone()
-        conn.close()
+        updated_student = updated_rows[0]
             
         return dict(updated_student)
 
 class StudentDELETEResource(Resource):
     def delete(self, id):
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
 
-        query = "DELETE FROM students WHERE id = ?"
-        cursor.execute(query, (id,))
-        
-        conn.commit()
+            query = "DELETE FROM students WHERE id = ?"
+            cursor.execute(query, (id,))
 
         if cursor.rowcount == 0:
-            conn.close()
             return {"message": f"Student with id {id} not found"}, 404
             
-        conn.close()
-        return {"message":f"Student with id {id} deleted"}, 204
\ No newline at end of file
+        return {"message":f"Student with id {id} deleted"}, 204
+
+# ============================================
+# Bulk Import / Export
+# ============================================
+BULK_CHUNK_SIZE = int(os.environ.get("BULK_CHUNK_SIZE", 1000)) # Rows per executemany/transaction
+BULK_MAX_ERRORS = int(os.environ.get("BULK_MAX_ERRORS", 100)) # Row errors listed in the response
+EXPORT_PAGE_SIZE = int(os.environ.get("EXPORT_PAGE_SIZE", 1000)) # Rows fetched from the cursor per chunk
+EXPORT_COLUMNS = ("id", "name", "age", "course", "created_at")
+BULK_MIMETYPES = ("text/csv", "application/x-ndjson", "application/jsonl")
+
+def _parse_student(data):
+    """Validates one bulk row; returns ((name, age, course), None) or (None, message)."""
+    if not isinstance(data, dict):
+        return None, "Row must be an object"
+    name, age, course = data.get("name"), data.get("age"), data.get("course")
+    if not all([name, age, course]):
+        return None, "Missing required fields: 'name', 'age', and 'course'"
+    try:
+        age = int(age)
+    except (TypeError, ValueError):
+        return None, "Field 'age' must be an integer"
+    return (name, age, course), None
+
+def _read_bulk_rows():
+    """Yields (row_number, dict or None) from the streamed body without buffering it."""
+    body = io.TextIOWrapper(request.stream, encoding="utf-8", newline="")
+    if request.mimetype == "text/csv":
+        for number, row in enumerate(csv.DictReader(body), start=1):
+            yield number, row
+    else:
+        number = 0
+        for line in body:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                yield number, None
+
+class StudentsBulkResource(Resource):
+    """
+    POST /students/bulk - CSV (with a name,age,course header) or NDJSON body, read as a stream.
+    Valid rows are inserted with executemany, one transaction per BULK_CHUNK_SIZE rows; invalid
+    rows are skipped and reported by row number.
+    """
+    def post(self):
+        if request.mimetype not in BULK_MIMETYPES:
+            return {"message": "Content-Type must be text/csv or application/x-ndjson"}, 415
+
+        inserted, failed, errors = 0, 0, []
+        chunk = []
+        query = "INSERT INTO students (name, age, course) VALUES (?, ?, ?)"
+        conn = get_db_connection()
+        try:
+            for number, row in _read_bulk_rows():
+                values, message = _parse_student(row) if row is not None else (None, "Invalid JSON")
+                if message:
+                    failed += 1
+                    if len(errors) < BULK_MAX_ERRORS:
+                        errors.append({"row": number, "message": message})
+                    continue
+                chunk.append(values)
+                if len(chunk) >= BULK_CHUNK_SIZE:
+                    with conn:
+                        conn.executemany(query, chunk)
+                    inserted += len(chunk)
+                    chunk = []
+            if chunk:
+                with conn:
+                    conn.executemany(query, chunk)
+                inserted += len(chunk)
+        except (UnicodeDecodeError, csv.Error) as e:
+            # Chunks already committed stay; report how far the import got
+            return {"message": f"Could not read the body: {e}", "inserted": inserted}, 400
+
+        if inserted == 0 and failed == 0:
+            return {"message": "Body contains no students"}, 400
+        return {"inserted": inserted, "failed": failed, "errors": errors}, 200
+
+class StudentsExportResource(Resource):
+    """GET /students/export?format=ndjson|csv - every student, streamed page by page off one cursor."""
+    def get(self):
+        export_format = request.args.get("format", "ndjson")
+        if export_format not in ("ndjson", "csv"):
+            return {"message": "Query parameter 'format' must be 'ndjson' or 'csv'"}, 400
+
+        def stream():
+            cursor = get_db_connection().execute(f"SELECT {', '.join(EXPORT_COLUMNS)} FROM students ORDER BY id")
+            try:
+                if export_format == "csv":
+                    buffer = io.StringIO()
+                    writer = csv.writer(buffer)
+                    writer.writerow(EXPORT_COLUMNS)
+                while True:
+                    page = cursor.fetchmany(EXPORT_PAGE_SIZE)
+                    if not page:
+                        break
+                    if export_format == "csv":
+                        writer.writerows(tuple(row) for row in page)
+                        yield buffer.getvalue()
+                        buffer.seek(0)
+                        buffer.truncate()
+                    else:
+                        yield "".join(json.dumps(dict(row)) + "\n" for row in page)
+                if export_format == "csv" and buffer.tell():
+                    yield buffer.getvalue()
+            finally:
+                # Also runs when the client disconnects mid-export
+                cursor.close()
+
+        mimetype = "text/csv" if export_format == "csv" else "application/x-ndjson"
+        return Response(stream_with_context(stream()), mimetype=mimetype)
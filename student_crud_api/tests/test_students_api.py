@@ -93,4 +93,116 @@ def test_get_student_by_id(client):
     
     assert get_response.status_code == 200
     assert get_response.json["id"] == student_id
-    assert get_response.json["name"] == test_student_name
\ No newline at end of file
+    assert get_response.json["name"] == test_student_name
+
+
+def test_metrics_record_route_latency_and_db_calls(client):
+    client.get("/students")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    body = response.get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{method="GET",route="/students"' in body
+    calls = [line for line in body.splitlines() if line.startswith('db_calls_total{method="GET",route="/students"')]
+    assert calls and int(calls[0].rsplit(" ", 1)[1]) >= 1
+
+
+def test_connections_are_pooled_in_wal_mode(client):
+    from resources.studentResource import db_pool, get_db_connection
+    client.get("/students")
+    opened = db_pool.connections_opened
+    client.get("/students")
+    client.post(
+        "/students",
+        data=json.dumps({"name": "Pooled", "age": 23, "course": "Databases"}),
+        content_type="application/json"
+    )
+    assert db_pool.connections_opened == opened
+    with get_db_connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_write_returns_stored_row(client):
+    post = client.post(
+        "/students",
+        data=json.dumps({"name": "Returning", "age": "30", "course": "SQL"}),
+        content_type="application/json"
+    )
+    assert post.status_code == 201
+    assert post.json["age"] == 30
+    assert post.json["created_at"]
+
+    missing = client.put(
+        "/students/999999",
+        data=json.dumps({"name": "Nobody", "age": 30, "course": "SQL"}),
+        content_type="application/json"
+    )
+    assert missing.status_code == 404
+
+
+def test_bulk_import_csv_reports_bad_rows(client):
+    body = "name,age,course\nBulk One,20,Physics\nBulk Two,abc,Physics\nBulk Three,22,\nBulk Four,23,Biology\n"
+    response = client.post("/students/bulk", data=body, content_type="text/csv")
+    assert response.status_code == 200
+    assert response.json["inserted"] == 2
+    assert response.json["failed"] == 2
+    assert [error["row"] for error in response.json["errors"]] == [2, 3]
+
+    unsupported = client.post("/students/bulk", data="{}", content_type="application/xml")
+    assert unsupported.status_code == 415
+
+
+def test_bulk_import_ndjson_and_export(client):
+    body = "\n".join(json.dumps({"name": f"Export {n}", "age": 20 + n, "course": "Export"}) for n in range(3))
+    response = client.post("/students/bulk", data=body + "\nnot json\n", content_type="application/x-ndjson")
+    assert response.json["inserted"] == 3
+    assert response.json["errors"] == [{"row": 4, "message": "Invalid JSON"}]
+
+    export = client.get("/students/export")
+    assert export.mimetype == "application/x-ndjson"
+    rows = [json.loads(line) for line in export.get_data(as_text=True).splitlines()]
+    assert [row["name"] for row in rows if row["course"] == "Export"] == ["Export 0", "Export 1", "Export 2"]
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+
+    csv_export = client.get("/students/export?format=csv")
+    lines = csv_export.get_data(as_text=True).splitlines()
+    assert lines[0] == "id,name,age,course,created_at"
+    assert len(lines) == len(rows) + 1
+
+
+def test_list_students_filters_and_keyset_pages(client):
+    rows = [{"name": f"Keyset {n}", "age": 30 - n, "course": "Keyset Studies"} for n in range(5)]
+    client.post("/students/bulk", data="\n".join(json.dumps(row) for row in rows), content_type="application/x-ndjson")
+
+    first = client.get("/students?course=Keyset Studies&min_age=27&sort=age&limit=2")
+    assert first.status_code == 200
+    assert [s["age"] for s in first.json] == [27, 28]
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get(f"/students?course=Keyset Studies&min_age=27&sort=age&limit=2&after_id={cursor}")
+    assert [s["age"] for s in second.json] == [29, 30]
+
+    by_name = client.get("/students?name=Keyset&sort=-id&max_age=27")
+    assert [s["name"] for s in by_name.json] == ["Keyset 4", "Keyset 3"]
+    assert "X-Next-Cursor" not in by_name.headers
+
+    assert client.get("/students?sort=height").status_code == 400
+    assert client.get("/students?limit=0").status_code == 400
+
+
+def test_migrations_apply_once_and_verify(tmp_path):
+    import sqlite3
+    from resources.studentResource import MIGRATIONS
+    from util.migrations import SchemaVersionError, run_migrations, verify_schema
+    conn = sqlite3.connect(tmp_path / "migrations.db")
+
+    try:
+        verify_schema(conn, MIGRATIONS)
+        assert False, "an empty database must fail verification"
+    except SchemaVersionError as e:
+        assert "manage.py migrate" in str(e)
+
+    assert [m.version for m in run_migrations(conn, MIGRATIONS, target=1)] == [1]
+    assert [m.version for m in run_migrations(conn, MIGRATIONS)] == [2]
+    assert run_migrations(conn, MIGRATIONS) == []
+    assert verify_schema(conn, MIGRATIONS) == 2
+    assert conn.execute("SELECT COUNT(*) FROM students").fetchone()[0] == 4
+    conn.close()
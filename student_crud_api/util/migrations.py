@@ -0,0 +1,108 @@
+from datetime import datetime, timezone
+import sqlite3
+
+# ============================================
+# Schema Migrations (SQLite)
+# ============================================
+# Applied versions are recorded in this table; run pending ones with `python manage.py migrate`
+MIGRATIONS_TABLE = "migrations"
+
+
+class Migration:
+    """One schema change: `apply(conn)` runs inside the transaction that records `version`."""
+
+    def __init__(self, version, description, apply, enabled=None):
+        self.version = version
+        self.description = description
+        self.apply = apply
+        # Optional features (e.g. behind an env flag) are only required while enabled
+        self.enabled = enabled
+
+    def is_enabled(self):
+        return self.enabled is None or self.enabled()
+
+
+class SchemaVersionError(RuntimeError):
+    """The database is missing migrations this code needs."""
+
+
+def applied_versions(conn):
+    try:
+        return {row[0] for row in conn.execute(f"SELECT version FROM {MIGRATIONS_TABLE}")}
+    except sqlite3.OperationalError:
+        # No migrations table yet: nothing has been applied
+        return set()
+
+
+def pending_migrations(conn, migrations):
+    applied = applied_versions(conn)
+    return [m for m in sorted(migrations, key=lambda m: m.version) if m.version not in applied and m.is_enabled()]
+
+
+def run_migrations(conn, migrations, target=None):
+    """
+    Applies pending migrations in version order, up to `target` when given. Each one runs in
+    its own BEGIN IMMEDIATE transaction together with its `migrations` row, so a failure leaves
+    no partial change and concurrent runners apply each version once.
+    Returns the migrations applied by this call.
+    """
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """)
+    applied = []
+    for migration in pending_migrations(conn, migrations):
+        if target is not None and migration.version > target:
+            break
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute(f"SELECT 1 FROM {MIGRATIONS_TABLE} WHERE version = ?", (migration.version,)).fetchone():
+                # Applied by another runner since pending_migrations() looked
+                conn.rollback()
+                continue
+            migration.apply(conn)
+            conn.execute(
+                f"INSERT INTO {MIGRATIONS_TABLE} (version, description, applied_at) VALUES (?, ?, ?)",
+                (migration.version, migration.description, datetime.now(timezone.utc).isoformat())
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(migration)
+    return applied
+
+
+def verify_schema(conn, migrations):
+    """
+    Startup check: raises SchemaVersionError unless every enabled migration is applied.
+    A database ahead of the code is accepted, so migrations can run before a rolling deploy.
+    Returns the highest applied version.
+    """
+    pending = pending_migrations(conn, migrations)
+    if pending:
+        versions = ", ".join(str(m.version) for m in pending)
+        raise SchemaVersionError(f"Database schema is missing migrations {versions}; run `python manage.py migrate`")
+    return max(applied_versions(conn), default=0)
+
+
+def migration_status(conn, migrations):
+    """One row per known migration, for `manage.py status`."""
+    recorded = {}
+    try:
+        for row in conn.execute(f"SELECT version, applied_at FROM {MIGRATIONS_TABLE}"):
+            recorded[row[0]] = row[1]
+    except sqlite3.OperationalError:
+        pass
+    return [
+        {
+            "version": m.version,
+            "description": m.description,
+            "enabled": m.is_enabled(),
+            "applied_at": recorded.get(m.version)
+        }
+        for m in sorted(migrations, key=lambda m: m.version)
+    ]
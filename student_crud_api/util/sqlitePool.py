@@ -0,0 +1,81 @@
+import os
+import sqlite3
+import threading
+from util.requestMetrics import TimedConnection
+
+# ============================================
+# SQLite Connection Configuration
+# ============================================
+STUDENTS_DB = os.environ.get("STUDENTS_DB", "students.db")
+# NORMAL is durable in WAL mode except for the last commits before a power loss
+SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_CACHE_KIB = int(os.environ.get("SQLITE_CACHE_KIB", 16384)) # Page cache per connection
+SQLITE_MMAP_BYTES = int(os.environ.get("SQLITE_MMAP_BYTES", 268435456)) # 256 MiB, 0 disables
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_STATEMENT_CACHE = int(os.environ.get("SQLITE_STATEMENT_CACHE", 256)) # Prepared statements per connection
+
+
+class SQLiteConnectionPool:
+    """
+    One long-lived connection per thread (and per process: a forked gunicorn worker opens
+    its own), so each request reuses an open connection with a warm page cache and prepared
+    statements instead of connecting to the file again.
+
+    The database runs in WAL mode, so readers never block on the writer and each other;
+    writers still take turns, waiting up to SQLITE_BUSY_TIMEOUT_MS for the lock.
+    Use the connection as a context manager (`with pool.connection() as conn:`) so each
+    request commits or rolls back its transaction; the connection itself stays open.
+    """
+
+    def __init__(self, path=STUDENTS_DB):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._inherited = []
+        self.connections_opened = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            factory=TimedConnection,
+            timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+            cached_statements=SQLITE_STATEMENT_CACHE
+        )
+        conn.row_factory = sqlite3.Row
+        # journal_mode is stored in the database file; the others are per connection
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KIB}")
+        conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_BYTES}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        with self._lock:
+            self.connections_opened += 1
+        return conn
+
+    def connection(self):
+        """This thread's connection, opened on first use."""
+        if self._pid != os.getpid():
+            # Forked: connections opened by the parent must not be used (or closed) here
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._inherited.append(self._local)
+                    self._local = threading.local()
+                    self._pid = os.getpid()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        elif conn.in_transaction:
+            # Left open by a request that did not finish its transaction
+            conn.rollback()
+        return conn
+
+    def close(self):
+        """Closes this thread's connection (e.g. after a one-off maintenance task)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def stats(self):
+        return {"path": self.path, "connections_opened": self.connections_opened}